@@ -0,0 +1,107 @@
+"""partition chat messages by month
+
+Revision ID: 0f367d887509
+Revises: 3b3ef30cae16
+Create Date: 2026-10-18 10:05:31.502114
+
+Rebuilds chat_messages as a table range-partitioned on created_at, with one
+partition per month (chat_messages_pYYYYMM) and a default partition
+catching anything outside them. The primary key becomes (id, created_at),
+as a partitioned table's keys must include the partition column.
+
+Existing rows are copied in the migration, which holds an exclusive lock
+on the messages table until it commits.
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0f367d887509'
+down_revision: Union[str, None] = '3b3ef30cae16'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Months created ahead of the current one; maintenance keeps extending this
+MONTHS_AHEAD = 3
+
+COLUMNS = "id, session_id, message, sender, resource, created_at, updated_at"
+
+
+def _next_month(month: datetime) -> datetime:
+    return month.replace(year=month.year + month.month // 12, month=month.month % 12 + 1)
+
+
+def _create_month_partition(month: datetime) -> None:
+    op.execute(
+        f"CREATE TABLE chat_messages_p{month:%Y%m} PARTITION OF chat_messages "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_next_month(month).isoformat()}')"
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("ALTER TABLE chat_messages RENAME TO chat_messages_unpartitioned")
+    op.execute("ALTER TABLE chat_messages_unpartitioned RENAME CONSTRAINT chat_messages_pkey TO chat_messages_unpartitioned_pkey")
+    op.execute("ALTER TABLE chat_messages_unpartitioned RENAME CONSTRAINT chat_messages_session_id_fkey TO chat_messages_unpartitioned_session_id_fkey")
+    op.execute("ALTER INDEX idx_message_session_created RENAME TO idx_message_unpartitioned_session_created")
+
+    op.create_table('chat_messages',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('session_id', sa.UUID(), nullable=False),
+    sa.Column('message', sa.String(), nullable=False),
+    sa.Column('sender', postgresql.ENUM('USER', 'AI', name='sender_options', create_type=False), nullable=False),
+    sa.Column('resource', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['session_id'], ['chat_sessions.session_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id', 'created_at'),
+    postgresql_partition_by='RANGE (created_at)',
+    )
+    op.create_index('idx_message_session_created', 'chat_messages', ['session_id', 'created_at', 'id'], unique=False)
+    op.execute("CREATE TABLE chat_messages_default PARTITION OF chat_messages DEFAULT")
+
+    # One partition per month from the oldest message to a few months ahead
+    now = datetime.now(timezone.utc)
+    oldest = op.get_bind().execute(
+        sa.text("SELECT min(created_at) FROM chat_messages_unpartitioned")
+    ).scalar() or now
+    month = oldest.astimezone(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    last = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    for _ in range(MONTHS_AHEAD):
+        last = _next_month(last)
+    while month <= last:
+        _create_month_partition(month)
+        month = _next_month(month)
+
+    op.execute(f"INSERT INTO chat_messages ({COLUMNS}) SELECT {COLUMNS} FROM chat_messages_unpartitioned")
+    op.drop_table('chat_messages_unpartitioned')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE chat_messages RENAME TO chat_messages_partitioned")
+    op.execute("ALTER TABLE chat_messages_partitioned RENAME CONSTRAINT chat_messages_pkey TO chat_messages_partitioned_pkey")
+    op.execute("ALTER TABLE chat_messages_partitioned RENAME CONSTRAINT chat_messages_session_id_fkey TO chat_messages_partitioned_session_id_fkey")
+    op.execute("ALTER INDEX idx_message_session_created RENAME TO idx_message_partitioned_session_created")
+
+    op.create_table('chat_messages',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('session_id', sa.UUID(), nullable=False),
+    sa.Column('message', sa.String(), nullable=False),
+    sa.Column('sender', postgresql.ENUM('USER', 'AI', name='sender_options', create_type=False), nullable=False),
+    sa.Column('resource', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['session_id'], ['chat_sessions.session_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_message_session_created', 'chat_messages', ['session_id', 'created_at', 'id'], unique=False)
+
+    op.execute(f"INSERT INTO chat_messages ({COLUMNS}) SELECT {COLUMNS} FROM chat_messages_partitioned")
+    # Drops every partition with it
+    op.drop_table('chat_messages_partitioned')
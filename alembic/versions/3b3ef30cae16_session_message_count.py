@@ -0,0 +1,42 @@
+"""session message count
+
+Revision ID: 3b3ef30cae16
+Revises: 3f4d2f082997
+Create Date: 2026-10-18 09:52:40.117305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b3ef30cae16'
+down_revision: Union[str, None] = '3f4d2f082997'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('chat_sessions', sa.Column('message_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill counters of existing sessions
+    op.execute(
+        """
+        UPDATE chat_sessions AS s
+        SET message_count = m.total
+        FROM (
+            SELECT session_id, count(*) AS total
+            FROM chat_messages
+            GROUP BY session_id
+        ) AS m
+        WHERE s.session_id = m.session_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('chat_sessions', 'message_count')
@@ -0,0 +1,36 @@
+"""keyset pagination indexes
+
+Revision ID: 3f4d2f082997
+Revises: 216a6c0aa36f
+Create Date: 2026-10-18 09:30:12.418230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f4d2f082997'
+down_revision: Union[str, None] = '216a6c0aa36f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('idx_session_platform_created', 'chat_sessions', ['platform', 'created_at', 'session_id'], unique=False)
+    op.create_index('idx_session_user_platform_created', 'chat_sessions', ['user_id', 'platform', 'created_at', 'session_id'], unique=False)
+    op.drop_index('idx_session_user_platform', table_name='chat_sessions')
+    op.create_index('idx_message_session_created', 'chat_messages', ['session_id', 'created_at', 'id'], unique=False)
+    op.drop_index(op.f('ix_chat_messages_session_id'), table_name='chat_messages')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f('ix_chat_messages_session_id'), 'chat_messages', ['session_id'], unique=False)
+    op.drop_index('idx_message_session_created', table_name='chat_messages')
+    op.create_index('idx_session_user_platform', 'chat_sessions', ['user_id', 'platform'], unique=False)
+    op.drop_index('idx_session_user_platform_created', table_name='chat_sessions')
+    op.drop_index('idx_session_platform_created', table_name='chat_sessions')
@@ -0,0 +1,216 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Optional
+
+from redis import asyncio as aioredis
+from sqlalchemy import text
+
+from app.core.celery_worker import celery_app
+from app.core.config import get_settings
+from app.core.logging import setup_logging
+from app.db.session import get_async_engine, get_replica_engine
+from trading_agent.runtime import agent_runtime
+
+logger = setup_logging()
+settings = get_settings()
+
+
+def _pool_usage(pool, pool_size: int, max_overflow: int) -> dict:
+    """Usage of a pool against the capacity it was configured with"""
+    size = pool.size()
+    checked_out = pool.checkedout()
+    capacity = pool_size + max_overflow
+    return {
+        "size": size,
+        "checked_out": checked_out,
+        "capacity": capacity,
+        "saturation": round(checked_out / capacity, 3) if capacity else 0.0,
+    }
+
+
+class HealthProber:
+    """
+    Probes the service dependencies on an interval in the background, so
+    readiness probes read a cached report instead of taking connections
+    from pools that real traffic needs.
+
+    Every check reports its status and latency. The service is ready while
+    the `critical` checks are healthy and the last report is fresh.
+    """
+
+    def __init__(
+        self,
+        interval_seconds: float,
+        timeout_seconds: float,
+        saturation_threshold: float,
+        critical: list,
+    ):
+        self.interval_seconds = interval_seconds
+        self.timeout_seconds = timeout_seconds
+        self.saturation_threshold = saturation_threshold
+        self.critical = set(critical)
+
+        self._redis: Optional[aioredis.Redis] = None
+        self._task: Optional[asyncio.Task] = None
+        self._checks: Dict[str, dict] = {}
+        self._checked_at: Optional[float] = None
+        self._checked_at_iso: Optional[str] = None
+
+    def _get_redis(self) -> aioredis.Redis:
+        if self._redis is None:
+            self._redis = aioredis.from_url(
+                settings.redis_url,
+                socket_connect_timeout=self.timeout_seconds,
+                socket_timeout=self.timeout_seconds,
+            )
+        return self._redis
+
+    async def _check_postgres(self) -> dict:
+        async with get_async_engine().connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        return {"type": "postgresql"}
+
+    async def _check_adk_database(self) -> dict:
+        runtimes = agent_runtime.runtimes()
+        if not runtimes:
+            return {"status": "unhealthy", "error": "agent runtimes not started"}
+
+        # Every platform's session service points at the same database
+        engine = runtimes[0].session_service.db_engine
+
+        def ping():
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+
+        await asyncio.to_thread(ping)
+        return {"type": "postgresql"}
+
+    async def _check_replica(self) -> dict:
+        async with get_replica_engine().connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        return {"type": "postgresql"}
+
+    async def _check_redis(self) -> dict:
+        await self._get_redis().ping()
+        return {}
+
+    async def _check_celery(self) -> dict:
+        replies = await asyncio.to_thread(celery_app.control.ping, timeout=self.timeout_seconds)
+        if not replies:
+            return {"status": "unhealthy", "error": "no workers replied", "workers": 0}
+        return {"workers": len(replies)}
+
+    async def _check_pools(self) -> dict:
+        pool_size, max_overflow = settings.postgres_pool_sizing
+        pools = {"app": _pool_usage(get_async_engine().sync_engine.pool, pool_size, max_overflow)}
+        if get_replica_engine() is not None:
+            pools["replica"] = _pool_usage(get_replica_engine().sync_engine.pool, pool_size, max_overflow)
+        for runtime in agent_runtime.runtimes():
+            pools[f"adk_{runtime.app_name}"] = _pool_usage(
+                runtime.session_service.db_engine.pool,
+                settings.adk_pool_size,
+                settings.adk_max_overflow,
+            )
+
+        saturated = [
+            name for name, usage in pools.items()
+            if usage["saturation"] >= self.saturation_threshold
+        ]
+        return {
+            "status": "degraded" if saturated else "healthy",
+            "saturated": saturated,
+            "pools": pools,
+        }
+
+    async def _run_check(self, check: Callable[[], Awaitable[dict]]) -> dict:
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(check(), self.timeout_seconds)
+        except asyncio.TimeoutError:
+            result = {"status": "unhealthy", "error": f"timed out after {self.timeout_seconds}s"}
+        except Exception as e:
+            result = {"status": "unhealthy", "error": str(e)}
+        result.setdefault("status", "healthy")
+        result["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return result
+
+    async def probe(self) -> None:
+        """Run every check concurrently and publish the report"""
+        checks = {
+            "postgres": self._check_postgres,
+            "adk_database": self._check_adk_database,
+            "redis": self._check_redis,
+            "db_pools": self._check_pools,
+        }
+        if settings.postgres_replica_server:
+            checks["replica"] = self._check_replica
+        if settings.upload_parse_celery_min_mb:
+            checks["celery"] = self._check_celery
+
+        results = await asyncio.gather(*(self._run_check(check) for check in checks.values()))
+        previous = self._checks
+        self._checks = dict(zip(checks, results))
+        self._checked_at = time.monotonic()
+        self._checked_at_iso = datetime.now(timezone.utc).isoformat()
+
+        for name, result in self._checks.items():
+            was = previous.get(name, {}).get("status", "healthy")
+            if result["status"] != was:
+                logger.warning(f"Health check {name}: {was} -> {result['status']} {result.get('error', '')}")
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.probe()
+            except Exception as e:
+                logger.error(f"Health probe failed: {e}")
+
+    async def start(self) -> None:
+        """Probe once, then keep probing in the background"""
+        if self._task is not None:
+            return
+        await self.probe()
+        self._task = asyncio.create_task(self._loop(), name="health-prober")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    @property
+    def is_fresh(self) -> bool:
+        # A stalled prober must not keep reporting a stale "ready"
+        return (
+            self._checked_at is not None
+            and time.monotonic() - self._checked_at <= 3 * self.interval_seconds
+        )
+
+    @property
+    def is_ready(self) -> bool:
+        return self.is_fresh and all(
+            result["status"] == "healthy"
+            for name, result in self._checks.items()
+            if name in self.critical
+        )
+
+    def report(self) -> dict:
+        """The cached results of the last probe"""
+        return {
+            "ready": self.is_ready,
+            "checked_at": self._checked_at_iso,
+            "checks": self._checks,
+        }
+
+
+health_prober = HealthProber(
+    interval_seconds=settings.health_probe_interval_seconds,
+    timeout_seconds=settings.health_probe_timeout_seconds,
+    saturation_threshold=settings.health_pool_saturation_threshold,
+    critical=settings.health_critical_checks,
+)
@@ -1,15 +1,48 @@
 from datetime import datetime, timezone
 from fastapi import APIRouter, Depends
-from sqlalchemy import text
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.responses import JSONResponse
 
-from app.db.session import get_async_session
-from app.api.health.schema import HealthCheckResponse
+from app.api.health.prober import health_prober
+from app.api.health.schema import HealthCheckResponse, LivenessResponse, ReadinessResponse
 from app.core.config import get_settings
+from app.core.logging import logging_stats
+from app.core.rate_limit import rate_limiter
+from app.db.replica import replica_lag_guard
+from chat.db.writer import message_writer
+from trading_agent.runtime import agent_runtime
+from trading_agent.utils.history import history_compactor
+from trading_agent.utils.llm_gate import llm_gate
+from trading_agent.utils.market_cache import market_intel_cache
+from trading_agent.utils.session_lock import session_turn_lock
+from trading_agent.utils.upload_cache import upload_cache
 
 router = APIRouter()
 
 
+@router.get(
+    "/live",
+    response_model=LivenessResponse,
+    summary="Liveness Probe",
+    description="Whether the process is up and serving requests; touches no dependency",
+)
+async def liveness():
+    return LivenessResponse()
+
+
+@router.get(
+    "/ready",
+    response_model=ReadinessResponse,
+    summary="Readiness Probe",
+    description="Cached dependency checks; 503 while a critical dependency is down",
+    responses={503: {"model": ReadinessResponse}},
+)
+async def readiness():
+    report = health_prober.report()
+    if not report["ready"]:
+        return JSONResponse(status_code=503, content=report)
+    return report
+
+
 @router.get(
     "",
     response_model=HealthCheckResponse,
@@ -17,30 +50,53 @@ router = APIRouter()
     description="Check the health status of the API and its dependencies",
 )
 async def health_check(
-    db: AsyncSession = Depends(get_async_session),
     settings = Depends(get_settings),
 ):
     """
-    Health check endpoint that verifies:
-    - API is running
-    - Database connection is working
-    - Redis connection is working (optional)
+    Health report combining:
+    - the background prober's checks (Postgres, ADK database, Redis,
+      Celery, pool saturation) with their status and latency, which
+      decide the overall status
+    - statistics of the pools, caches, queues and limiters
     """
     
-    services = {}
-    
-    # Check database
-    try:
-        await db.execute(text("SELECT 1"))
-        services["database"] = {
-            "status": "healthy",
-            "type": "postgresql",
-        }
-    except Exception as e:
-        services["database"] = {
-            "status": "unhealthy",
-            "error": str(e),
-        }
+    services = dict(health_prober.report()["checks"])
+    stats = {}
+    
+    # ADK session service pools
+    if agent_runtime.is_started:
+        stats["adk_pools"] = agent_runtime.pool_stats()
+    
+    # Parsed upload cache
+    stats["upload_cache"] = upload_cache.stats()
+    
+    # LLM concurrency and rate limits
+    stats["llm_gate"] = llm_gate.stats()
+    if settings.rate_limit_enabled:
+        stats["rate_limiter"] = rate_limiter.stats()
+    
+    # Conversation history compaction
+    if settings.history_compaction_enabled:
+        stats["history_compaction"] = history_compactor.stats()
+    
+    # Per-session turn serialization
+    if settings.session_lock_enabled:
+        stats["session_locks"] = session_turn_lock.stats()
+    
+    # Market intelligence response cache
+    if settings.market_intel_cache_enabled:
+        stats["market_intel_cache"] = market_intel_cache.stats()
+    
+    # Message write-behind queue
+    if message_writer.enabled:
+        stats["message_writer"] = message_writer.stats()
+    
+    # Read replica routing
+    if settings.postgres_replica_server:
+        stats["replica_routing"] = replica_lag_guard.stats()
+    
+    # Log writer queue
+    stats["logging"] = logging_stats()
     
     # Overall status
     overall_status = "healthy" if all(
@@ -52,4 +108,5 @@ async def health_check(
         version="1.0.0",
         timestamp=datetime.now(timezone.utc).isoformat(),
         services=services,
+        stats=stats,
     )
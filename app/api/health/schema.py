@@ -6,3 +6,16 @@ class HealthCheckResponse(BaseModel):
     version: str = Field(default="1.0.0")
     timestamp: str
     services: dict = Field(default_factory=dict)
+    stats: dict = Field(default_factory=dict)
+
+
+class LivenessResponse(BaseModel):
+    """Liveness probe response"""
+    status: str = Field(default="alive")
+
+
+class ReadinessResponse(BaseModel):
+    """Readiness probe response, from the last background probe"""
+    ready: bool
+    checked_at: str | None = None
+    checks: dict = Field(default_factory=dict)
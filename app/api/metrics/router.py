@@ -0,0 +1,17 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from app.core.metrics import render_metrics
+
+router = APIRouter()
+
+
+@router.get(
+    "",
+    summary="Metrics",
+    description="Prometheus metrics of every worker",
+    include_in_schema=False,
+)
+async def metrics():
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
@@ -1,6 +1,7 @@
 from fastapi import APIRouter
 
 from app.api.health.router import router as health_router 
+from app.api.metrics.router import router as metrics_router
 from chat.router import router as chat_router
 
 # Main API router
@@ -12,6 +13,11 @@ api_router.include_router(
     prefix="/health",
     tags=["Health"],
 )
+api_router.include_router(
+    metrics_router,
+    prefix="/metrics",
+    tags=["Metrics"],
+)
 api_router.include_router(
     chat_router,
     prefix="/chat",
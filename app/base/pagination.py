@@ -0,0 +1,35 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, NamedTuple, Optional, Tuple
+from uuid import UUID
+
+from app.core.exceptions import BadRequestError
+
+
+class Page(NamedTuple):
+    """One page of a listing"""
+    items: List[Any]
+    total: Optional[int]
+    next_cursor: Optional[str]
+    has_more: bool
+
+
+def encode_cursor(created_at: datetime, identifier: Any) -> str:
+    """Opaque keyset cursor pointing at a (created_at, id) position"""
+    payload = json.dumps(
+        {"c": created_at.isoformat(), "i": str(identifier)},
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """Decode a cursor created by `encode_cursor`"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["c"]), UUID(payload["i"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise BadRequestError("Invalid pagination cursor", details={"cursor": cursor})
@@ -16,12 +16,16 @@ class DataResponse(BaseResponse, Generic[DataT]):
 class ListResponse(BaseResponse, Generic[DataT]):
     """Response for list endpoints with pagination"""
     data: List[DataT] = Field(default_factory=list, description="List of items")
-    total: int = Field(default=0, description="Total count of items")
+    total: Optional[int] = Field(default=0, description="Total count of items, omitted when not requested")
     page: int = Field(default=1, ge=1, description="Current page number")
     page_size: int = Field(default=50, ge=1, le=100, description="Items per page")
+    next_cursor: Optional[str] = Field(default=None, description="Cursor of the next page")
+    has_more: Optional[bool] = Field(default=None, description="Whether another page exists")
 
     @property
-    def total_pages(self) -> int:
+    def total_pages(self) -> Optional[int]:
+        if self.total is None:
+            return None
         if self.page_size == 0:
             return 0
         return (self.total + self.page_size - 1) // self.page_size
@@ -36,6 +40,8 @@ class ListResponse(BaseResponse, Generic[DataT]):
             "page": data.pop("page"),
             "page_size": data.pop("page_size"),
             "total_pages": self.total_pages,
+            "next_cursor": data.pop("next_cursor"),
+            "has_more": data.pop("has_more"),
         }
         
         # Add meta to response
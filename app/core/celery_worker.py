@@ -1,4 +1,5 @@
 from celery import Celery
+from celery.schedules import crontab
 
 from app.core.config import get_settings
 settings = get_settings()
@@ -7,9 +8,17 @@ celery_app = Celery(
     "worker",
     broker=settings.celery_broker_url,
     backend=settings.celery_result_backend,
-    include=[],
+    include=["trading_agent.tasks", "chat.tasks"],
 )
 
 celery_app.conf.task_routes = {
     "tasks.*": {"queue": "default"},
+}
+
+# Run by `celery beat`
+celery_app.conf.beat_schedule = {
+    "maintain-chat-partitions": {
+        "task": "tasks.maintain_chat_partitions",
+        "schedule": crontab(hour=settings.chat_partition_maintenance_hour, minute=17),
+    },
 }
\ No newline at end of file
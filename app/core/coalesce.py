@@ -0,0 +1,151 @@
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Optional
+
+from redis import asyncio as aioredis
+from redis.exceptions import LockError, RedisError
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.core.exceptions import ConflictError
+from app.core.logging import setup_logging
+from app.core.singleflight import SingleFlight
+
+logger = setup_logging()
+settings = get_settings()
+
+LOCK_KEY_PREFIX = "coalesce:lock:"
+RESULT_KEY_PREFIX = "coalesce:result:"
+
+
+def coalesce_key(*parts: Any) -> str:
+    """Stable hash of the parts identifying a request"""
+    return hashlib.sha256(
+        "\x1f".join("" if part is None else str(part) for part in parts).encode()
+    ).hexdigest()
+
+
+class RequestCoalescer:
+    """
+    Runs identical concurrent requests once. Followers await the leader's
+    result: in-process through single-flight, across workers through a Redis
+    lock and a short-lived result key. With a `result_ttl`, results are also
+    kept so retries arriving just after the leader finishes reuse them.
+    """
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        lock_seconds: int = 120,
+        wait_seconds: int = 120,
+        poll_interval: float = 0.1,
+    ):
+        self.lock_seconds = lock_seconds
+        self.wait_seconds = wait_seconds
+        self.poll_interval = poll_interval
+        self._redis = aioredis.from_url(redis_url, decode_responses=True) if redis_url else None
+        self._results = TTLCache(max_entries=4096)
+        self._flights = SingleFlight()
+
+        self.replayed = 0
+
+    async def run(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        result_ttl: int = 0,
+    ) -> Any:
+        """Result of `fn`, shared with every identical request in flight"""
+        result = self._results.get(key)
+        if result is not None:
+            self.replayed += 1
+            return result
+
+        return await self._flights.do(key, lambda: self._run(key, fn, result_ttl))
+
+    async def _run(self, key: str, fn: Callable[[], Awaitable[Any]], result_ttl: int) -> Any:
+        if self._redis is None:
+            return self._remember(key, await fn(), result_ttl)
+
+        started = False
+
+        async def lead():
+            nonlocal started
+            started = True
+            return await fn()
+
+        try:
+            return await self._run_across_workers(key, lead, result_ttl)
+        except RedisError as e:
+            if started:
+                raise
+            logger.warning(f"Request coalescing via redis failed, running uncoalesced: {e}")
+            return self._remember(key, await fn(), result_ttl)
+
+    async def _run_across_workers(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        result_ttl: int,
+    ) -> Any:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.wait_seconds
+        lock = self._redis.lock(LOCK_KEY_PREFIX + key, timeout=self.lock_seconds)
+        waited = False
+
+        while True:
+            # Without replay, only requests that waited on a running leader share its result
+            if result_ttl > 0 or waited:
+                payload = await self._redis.get(RESULT_KEY_PREFIX + key)
+                if payload is not None:
+                    self.replayed += 1
+                    return self._remember(key, json.loads(payload), result_ttl)
+
+            # No lock and no result means no leader (or a failed one): take over
+            if await lock.acquire(blocking=False):
+                break
+            waited = True
+
+            if loop.time() >= deadline:
+                raise ConflictError("An identical request is still being processed")
+            await asyncio.sleep(self.poll_interval)
+
+        try:
+            result = await fn()
+            # Followers poll for the result, so it's kept briefly even without a TTL
+            await self._redis.set(
+                RESULT_KEY_PREFIX + key,
+                json.dumps(result, default=str),
+                ex=max(result_ttl, int(self.poll_interval * 10) + 1),
+            )
+            return self._remember(key, result, result_ttl)
+        finally:
+            try:
+                await lock.release()
+            except LockError:
+                logger.warning(f"Coalescing lock {key[:12]} expired before its request finished")
+
+    def _remember(self, key: str, result: Any, result_ttl: int) -> Any:
+        if result_ttl > 0:
+            self._results.set(key, result, ttl_seconds=result_ttl)
+        return result
+
+    def stats(self) -> dict:
+        return {
+            **self._flights.stats(),
+            "replayed": self.replayed,
+            "cross_worker": self._redis is not None,
+        }
+
+    async def close(self) -> None:
+        if self._redis is not None:
+            await self._redis.aclose()
+
+
+request_coalescer = RequestCoalescer(
+    redis_url=settings.redis_url if settings.chat_coalesce_redis_enabled else None,
+    lock_seconds=settings.chat_coalesce_lock_seconds,
+    # Longer than the lock so followers outlive a crashed leader's lock
+    wait_seconds=settings.chat_coalesce_lock_seconds + 30,
+)
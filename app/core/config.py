@@ -13,6 +13,14 @@ class Settings(BaseSettings):
     debug: bool = Field(default=True, description="Debug mode")
     port: int = Field(default=8000)
     log_level: Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"] = "INFO"
+    log_format: Literal["json", "text"] = "json"
+    log_queue_size: int = Field(default=10000, ge=100, description="Records buffered for the log writer thread")
+    log_sample_rates: Dict[str, float] = Field(
+        default_factory=dict,
+        description="Share of DEBUG/INFO records kept per logger name, e.g. {\"sqlalchemy.engine\": 0.1}",
+    )
+    request_log_sample_rate: float = Field(default=1.0, ge=0, le=1, description="Share of successful requests logged")
+    slow_request_ms: int = Field(default=1000, ge=1, description="Requests at least this slow are always logged")
     
     # API
     api_v1_prefix: str = "/api/v1"
@@ -39,11 +47,50 @@ class Settings(BaseSettings):
     postgres_user: str = Field(default="postgres")
     postgres_password: str = Field(default="postgres")
     postgres_db: str = Field(default="artemis_db")
-    postgres_pool_size: int = Field(default=10, ge=5, le=100)
-    postgres_max_overflow: int = Field(default=10, ge=0, le=50)
+    postgres_pool_size: int | None = Field(default=None, ge=1, le=100, description="Per-worker pool size; derived from the connection budget when unset")
+    postgres_max_overflow: int | None = Field(default=None, ge=0, le=50)
+    postgres_connection_budget: int = Field(default=80, ge=2, description="Connections shared by all API workers")
+    postgres_sync_pool_size: int = Field(default=2, ge=1, le=100, description="Per-process pool of the sync engine (Celery, scripts)")
+    postgres_sync_max_overflow: int = Field(default=2, ge=0, le=50)
+    postgres_statement_cache_size: int = Field(default=100, ge=0, description="Prepared statements cached per asyncpg connection")
+    postgres_pgbouncer: bool = Field(default=False, description="Connect through PgBouncer in transaction pooling mode")
+    web_concurrency: int = Field(default=1, ge=1, description="Uvicorn worker processes (WEB_CONCURRENCY)")
     postgres_pool_timeout: int = Field(default=30, ge=10, le=60)
     postgres_pool_recycle: int = Field(default=3600, ge=300)
     adk_db: str = "adk_sessions"
+    adk_pool_size: int = Field(default=5, ge=1, le=100)
+    adk_max_overflow: int = Field(default=5, ge=0, le=50)
+    
+    # Database reads (replica routing, read-only sessions)
+    postgres_replica_server: str | None = Field(default=None, description="Read replica host; reads use the primary when unset")
+    postgres_replica_port: int | None = Field(default=None, ge=1, le=65535)
+    replica_lag_guard_seconds: float = Field(default=5, ge=0, description="Reads of data written this recently go to the primary")
+    replica_lag_guard_redis_enabled: bool = Field(default=False, description="Share recent writes across workers")
+    read_session_mode: Literal["autocommit", "readonly"] = Field(
+        default="autocommit",
+        description="autocommit: no BEGIN/COMMIT at all; readonly: one READ ONLY transaction per request",
+    )
+    session_count_cache_seconds: int = Field(default=30, ge=0)
+    
+    # Chat message partitioning and retention
+    chat_partition_months_ahead: int = Field(default=3, ge=1, le=24, description="Monthly message partitions created ahead of time")
+    chat_partition_maintenance_hour: int = Field(default=3, ge=0, le=23, description="UTC hour of the nightly partition maintenance")
+    chat_partition_lock_timeout_ms: int = Field(default=5000, ge=100, description="Longest wait for the chat_messages lock when attaching or detaching a partition")
+    chat_message_retention_months: int | None = Field(default=None, ge=1, description="Months of messages kept in the database; older ones are archived")
+    chat_archive_dir: str = Field(default="archives/chat_messages", description="Where archived message partitions are written")
+    
+    # Chat session deletion
+    chat_delete_celery_min_messages: int | None = Field(default=None, ge=1, description="Sessions with this many messages, and bulk deletes, are deleted in batches on Celery")
+    chat_delete_batch_size: int = Field(default=5000, ge=100, description="Messages deleted per transaction by batched deletes")
+    
+    # Health probes
+    health_probe_interval_seconds: float = Field(default=10, gt=0)
+    health_probe_timeout_seconds: float = Field(default=2, gt=0)
+    health_pool_saturation_threshold: float = Field(default=0.9, gt=0, le=1)
+    health_critical_checks: List[str] = Field(
+        default=["postgres", "adk_database"],
+        description="Checks that must pass for /health/ready",
+    )
     
     # Redis
     redis_host: str = Field(default="localhost")
@@ -51,6 +98,53 @@ class Settings(BaseSettings):
     redis_db: int = Field(default=0, ge=0, le=15)
     redis_password: str | None = None
     
+    # Chat message write-behind
+    message_write_behind_enabled: bool = False
+    message_write_behind_flush_ms: int = Field(default=200, ge=10, le=10000)
+    message_write_behind_batch_size: int = Field(default=200, ge=1, le=1000)
+    message_write_behind_durable: bool = Field(default=False, description="Queue turns in a Redis stream for crash safety")
+    
+    # Upload cache
+    upload_cache_max_mb: int = Field(default=256, ge=1)
+    upload_cache_ttl_seconds: int = Field(default=3600, ge=60)
+    upload_cache_redis_enabled: bool = False
+    
+    # Conversation history compaction
+    history_compaction_enabled: bool = True
+    history_keep_turns: int = Field(default=10, ge=1, description="Most recent turns always sent verbatim")
+    history_compact_min_turns: int = Field(default=10, ge=1, description="Older turns accumulated before a summary is (re)built")
+    history_summary_model: str = "gemini-2.0-flash"
+    
+    # Chat request coalescing
+    chat_coalesce_enabled: bool = True
+    chat_coalesce_redis_enabled: bool = Field(default=False, description="Coalesce identical requests across workers")
+    chat_coalesce_lock_seconds: int = Field(default=120, ge=5)
+    chat_coalesce_result_seconds: int = Field(default=0, ge=0, description="Identical requests this soon after completion reuse the result; 0 merges in-flight requests only")
+    chat_idempotency_ttl_seconds: int = Field(default=24 * 3600, ge=60)
+    
+    # Per-session turn serialization
+    session_lock_enabled: bool = True
+    session_lock_max_queue: int = Field(default=2, ge=0, description="Turns allowed to wait behind the running one")
+    session_lock_wait_seconds: int = Field(default=60, ge=1)
+    session_lock_retry_after_seconds: int = Field(default=5, ge=1)
+    session_lock_redis_enabled: bool = Field(default=False, description="Serialize turns across workers")
+    session_lock_ttl_seconds: int = Field(default=300, ge=30, description="Expiry of a crashed worker's session lock")
+    
+    # Market intelligence response cache
+    market_intel_cache_enabled: bool = True
+    market_intel_cache_ttl_seconds: int = Field(default=300, ge=1, description="TTL while markets are open")
+    market_intel_cache_closed_ttl_seconds: int = Field(default=6 * 3600, ge=60, description="TTL cap while FX markets are closed")
+    market_intel_cache_max_entries: int = Field(default=1024, ge=1)
+    market_intel_cache_redis_enabled: bool = False
+    
+    # Upload parsing
+    upload_max_size_mb: int = Field(default=200, ge=1)
+    upload_parse_workers: int = Field(default=2, ge=1, le=32)
+    upload_parse_concurrency: int = Field(default=4, ge=1, le=64)
+    upload_parse_inline_max_kb: int = Field(default=256, ge=0, description="Smaller uploads are parsed on a thread instead of the process pool")
+    upload_parse_celery_min_mb: int | None = Field(default=None, description="Uploads of at least this size are parsed by a Celery worker")
+    upload_spool_dir: str | None = Field(default=None, description="Directory for spooled uploads, must be shared with Celery workers")
+    
     # Celery
     celery_broker_url: str | None = None
     celery_result_backend: str | None = None
@@ -65,6 +159,20 @@ class Settings(BaseSettings):
     # Rate Limiting
     rate_limit_enabled: bool = True
     rate_limit_per_minute: int = 60
+    rate_limit_burst: int | None = Field(default=None, ge=1, description="Bucket size, defaults to the per-minute rate")
+    rate_limit_platform_per_minute: int = Field(default=1200, ge=1)
+    rate_limit_agent_per_minute: int = Field(default=20, ge=1, description="Agent turns per user and platform")
+    rate_limit_redis_enabled: bool = Field(default=True, description="Share buckets across workers; falls back to in-process")
+    rate_limit_trusted_proxies: List[str] = Field(
+        default=["127.0.0.1/32", "172.16.0.0/12"],
+        description="Proxy addresses/CIDRs whose X-Forwarded-For is trusted for the client address (loopback and the compose network)",
+    )
+    
+    # LLM concurrency (per worker)
+    llm_max_concurrency: int = Field(default=8, ge=1)
+    llm_max_waiting: int = Field(default=64, ge=0)
+    llm_queue_wait_seconds: int = Field(default=30, ge=1)
+    llm_quota_retry_after_seconds: int = Field(default=10, ge=1, description="Admission pause after an upstream quota error")
     
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -91,6 +199,16 @@ class Settings(BaseSettings):
             return "DEBUG" if app_env == "dev" else "INFO"
         return v.upper()
     
+    @property
+    def postgres_pool_sizing(self) -> tuple[int, int]:
+        """Per-worker (pool_size, max_overflow) of the async engine"""
+        per_worker = max(2, self.postgres_connection_budget // self.web_concurrency)
+        pool_size = self.postgres_pool_size or (per_worker + 1) // 2
+        max_overflow = self.postgres_max_overflow
+        if max_overflow is None:
+            max_overflow = max(per_worker - pool_size, 0)
+        return pool_size, max_overflow
+    
     @property
     def postgres_async_url(self) -> str:
         """PostgreSQL async connection URL"""
@@ -99,6 +217,16 @@ class Settings(BaseSettings):
             f"@{self.postgres_server}:{self.postgres_port}/{self.postgres_db}"
         )
     
+    @property
+    def postgres_replica_async_url(self) -> str | None:
+        """Read replica async connection URL, if a replica is configured"""
+        if not self.postgres_replica_server:
+            return None
+        return (
+            f"postgresql+asyncpg://{self.postgres_user}:{self.postgres_password}"
+            f"@{self.postgres_replica_server}:{self.postgres_replica_port or self.postgres_port}/{self.postgres_db}"
+        )
+    
     @property
     def postgres_sync_url(self) -> str:
         """PostgreSQL sync connection URL (for Alembic & Celery)"""
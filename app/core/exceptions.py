@@ -9,10 +9,12 @@ class APIError(Exception):
         status_code: int,
         message: str,
         details: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
     ):
         self.status_code = status_code
         self.message = message
         self.details = details or {}
+        self.headers = headers
         super().__init__(message)
 
 
@@ -51,6 +53,13 @@ class ConflictError(APIError):
         super().__init__(status_code=409, message=message, details=details)
 
 
+class PayloadTooLargeError(APIError):
+    """413 Payload Too Large"""
+    
+    def __init__(self, message: str = "Payload too large", details: Optional[Dict[str, Any]] = None):
+        super().__init__(status_code=413, message=message, details=details)
+
+
 class UnprocessableEntityError(APIError):
     """422 Unprocessable Entity"""
     
@@ -58,6 +67,23 @@ class UnprocessableEntityError(APIError):
         super().__init__(status_code=422, message=message, details=details)
 
 
+class TooManyRequestsError(APIError):
+    """429 Too Many Requests"""
+    
+    def __init__(
+        self,
+        message: str = "Too many requests",
+        retry_after: int = 1,
+        details: Optional[Dict[str, Any]] = None,
+    ):
+        super().__init__(
+            status_code=429,
+            message=message,
+            details=details,
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
 class InternalServerError(APIError):
     """500 Internal Server Error"""
     
@@ -1,30 +1,113 @@
+import atexit
+import json
 import logging
+import os
+import queue
+import random
 import sys
+import threading
+from datetime import datetime, timezone
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Optional
 
 from app.core.config import get_settings
+from app.core.request_context import get_request_id
 
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_ATTRS = frozenset(
+    logging.LogRecord("", 0, "", 0, "", None, None).__dict__
+) | {"message", "asctime", "request_id"}
 
-def setup_logging():
-    """Configure application logging"""
-    settings = get_settings()
-    
+_lock = threading.Lock()
+_queue_handler: Optional["NonBlockingQueueHandler"] = None
+_listener: Optional[QueueListener] = None
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp every record with the id of the request being handled"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = get_request_id()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a share of the DEBUG/INFO records of chatty loggers.
+    Rates apply to a logger and its children; warnings and above always pass.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+
+    def _rate(self, name: str) -> Optional[float]:
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+        return None
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        rate = self._rate(record.name)
+        return rate is None or random.random() < rate
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with the request id and `extra` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exception"] = record.exc_text
+        return json.dumps(payload, default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Hands records to the listener thread; drops them when the queue is full"""
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render the message (and traceback) now, while args are still valid,
+        # but leave the final formatting to the listener thread
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            NonBlockingQueueHandler.dropped += 1
+
+
+def _build_handlers(settings) -> list:
     # Create logs directory if it doesn't exist
     log_dir = Path("logs")
     log_dir.mkdir(exist_ok=True)
-    
-    # Configure root logger
-    logger = logging.getLogger()
-    logger.setLevel(settings.log_level)
-    
-    # Remove existing handlers to avoid duplicates
-    logger.handlers.clear()
-    
-    # Console handler with formatting
+
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(settings.log_level)
-    
+
     # File handler with rotation
     file_handler = RotatingFileHandler(
         log_dir / f"{settings.app_env}.log",
@@ -32,23 +115,88 @@ def setup_logging():
         backupCount=5,
     )
     file_handler.setLevel(logging.INFO)
-    
-    # Formatter
-    formatter = logging.Formatter(
-        fmt="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
-    
+
+    if settings.log_format == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(
+            fmt="%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
     console_handler.setFormatter(formatter)
     file_handler.setFormatter(formatter)
-    
-    # Add handlers
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
-    
-    # Silence noisy libraries in production
-    if settings.app_env == "prod":
-        logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
-        logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
-    
-    return logger
\ No newline at end of file
+    return [console_handler, file_handler]
+
+
+def _start_listener() -> None:
+    global _listener
+    _listener = QueueListener(_queue_handler.queue, *_build_handlers(get_settings()), respect_handler_level=True)
+    _listener.start()
+
+
+def _restart_in_child() -> None:
+    """A forked process inherits the queue but not the listener thread"""
+    global _listener, _lock
+    if _queue_handler is None:
+        return
+    _lock = threading.Lock()
+    _queue_handler.queue = queue.Queue(maxsize=get_settings().log_queue_size)
+    _listener = None
+    _start_listener()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def setup_logging():
+    """
+    Configure application logging once per process and return the root logger.
+
+    Log calls only enqueue the record; a listener thread formats it and does
+    the console and file I/O, so request handlers never block on disk.
+    """
+    global _queue_handler
+    logger = logging.getLogger()
+    if _queue_handler is not None:
+        return logger
+
+    with _lock:
+        if _queue_handler is not None:
+            return logger
+
+        settings = get_settings()
+        logger.setLevel(settings.log_level)
+
+        # Replace handlers installed by anyone else (e.g. basicConfig)
+        logger.handlers.clear()
+
+        _queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=settings.log_queue_size))
+        # Filters run on the calling thread, where the request context is set
+        _queue_handler.addFilter(SamplingFilter(settings.log_sample_rates))
+        _queue_handler.addFilter(RequestIdFilter())
+        logger.addHandler(_queue_handler)
+        _start_listener()
+
+        atexit.register(shutdown_logging)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=_restart_in_child)
+
+        # Silence noisy libraries in production
+        if settings.app_env == "prod":
+            logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
+            logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
+
+    return logger
+
+
+def logging_stats() -> dict:
+    return {
+        "queued": _queue_handler.queue.qsize() if _queue_handler is not None else 0,
+        "dropped": NonBlockingQueueHandler.dropped,
+    }
@@ -0,0 +1,172 @@
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+# Set (before the app is imported) when uvicorn runs several workers
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+# Seconds; spans fast DB calls up to long agent runs
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by endpoint",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+STAGE_DURATION = Histogram(
+    "chat_stage_duration_seconds",
+    "Latency of the stages of a chat request",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+AGENT_DURATION = Histogram(
+    "agent_run_duration_seconds",
+    "Latency of each agent and sub-agent run",
+    ["agent"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_DURATION = Histogram(
+    "agent_llm_call_duration_seconds",
+    "Latency of model calls until their first response",
+    ["agent"],
+    buckets=LATENCY_BUCKETS,
+)
+TOOL_DURATION = Histogram(
+    "agent_tool_call_duration_seconds",
+    "Latency of agent tool calls",
+    ["tool", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+QUEUE_WAIT = Histogram(
+    "queue_wait_seconds",
+    "Time spent waiting for a session lock or an LLM slot",
+    ["queue"],
+    buckets=LATENCY_BUCKETS,
+)
+QUEUE_REJECTIONS = Counter(
+    "queue_rejections_total",
+    "Requests rejected by a queue or rate limit",
+    ["queue", "reason"],
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections",
+    "Database pool connections by state",
+    ["engine", "state"],
+    multiprocess_mode="livesum",
+)
+
+POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the pool",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+POOL_CHECKOUT_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts_total",
+    "Checkouts that gave up after the pool timeout",
+    ["engine"],
+)
+POOL_CONNECTION_AGE = Histogram(
+    "db_pool_connection_age_seconds",
+    "Age of pooled connections when they are closed or invalidated",
+    ["engine"],
+    buckets=(1, 10, 60, 300, 600, 1800, 3600, 7200, 21600, 86400),
+)
+
+
+@contextmanager
+def observe_stage(stage: str) -> Iterator[None]:
+    """Record the duration of the enclosed block as a chat stage"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_DURATION.labels(stage).observe(time.perf_counter() - started)
+
+
+def timed_pool_class(name: str, base: type = QueuePool) -> type:
+    """
+    Pool class (for `poolclass=`) recording how long checkouts wait for a
+    connection. Pool events only fire once a connection is handed out, so
+    the public `Pool.connect()` every engine checkout goes through is timed;
+    the figure includes opening a new connection and the pre-ping. Pools
+    recreated by `engine.dispose()` keep the class.
+    """
+
+    class TimedPool(base):
+        def connect(self):
+            started = time.perf_counter()
+            try:
+                return super().connect()
+            except PoolTimeoutError:
+                POOL_CHECKOUT_TIMEOUTS.labels(name).inc()
+                raise
+            finally:
+                POOL_CHECKOUT_WAIT.labels(name).observe(time.perf_counter() - started)
+
+    TimedPool.__name__ = TimedPool.__qualname__ = f"Timed{base.__name__}"
+    return TimedPool
+
+
+def instrument_pool(engine: Engine, name: str) -> None:
+    """
+    Collect the pool metrics of an engine; pass `engine.sync_engine` for
+    async engines. Listeners are set on the engine, so they follow the pool
+    when `engine.dispose()` recreates it.
+    """
+
+    def update(*_):
+        pool = engine.pool
+        DB_POOL_CONNECTIONS.labels(name, "size").set(pool.size())
+        DB_POOL_CONNECTIONS.labels(name, "checked_out").set(pool.checkedout())
+        DB_POOL_CONNECTIONS.labels(name, "idle").set(pool.checkedin())
+        DB_POOL_CONNECTIONS.labels(name, "overflow").set(max(pool.overflow(), 0))
+
+    for event_name in ("connect", "checkout", "checkin", "close"):
+        event.listen(engine, event_name, update)
+
+    @event.listens_for(engine, "connect")
+    def stamp_connection(dbapi_connection, connection_record):
+        connection_record.info["connected_at"] = time.monotonic()
+
+    def observe_age(dbapi_connection, connection_record, *_):
+        connected_at = connection_record.info.pop("connected_at", None)
+        if connected_at is not None:
+            POOL_CONNECTION_AGE.labels(name).observe(time.monotonic() - connected_at)
+
+    event.listen(engine, "close", observe_age)
+    event.listen(engine, "invalidate", observe_age)
+    update()
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Exposition of every worker's metrics when multi-process, else this process's"""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    """Drop this worker's live gauges from the multi-process aggregate"""
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,132 @@
+import math
+import time
+from typing import NamedTuple, Optional, Tuple
+
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.core.logging import setup_logging
+
+logger = setup_logging()
+settings = get_settings()
+
+REDIS_KEY_PREFIX = "rate-limit:"
+# Requests use local buckets this long after a Redis failure
+REDIS_RETRY_SECONDS = 5
+
+# Atomic token bucket; the Redis clock keeps every worker on the same time base
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = (cost - tokens) / rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return {allowed, tostring(tokens), tostring(retry_after)}
+"""
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    remaining: int
+    retry_after: int
+
+
+class TokenBucketLimiter:
+    """
+    Token buckets refilled at `per_minute` tokens per minute, holding up to
+    `burst` tokens. Buckets live in Redis so every worker shares them; when
+    Redis is unavailable the worker falls back to in-process buckets.
+    """
+
+    def __init__(self, redis_url: Optional[str] = None):
+        self._redis = aioredis.from_url(redis_url) if redis_url else None
+        self._script = self._redis.register_script(TOKEN_BUCKET_SCRIPT) if self._redis else None
+        # Idle buckets are full again long before they are evicted
+        self._local = TTLCache(max_entries=10_000, ttl_seconds=3600)
+        self._redis_retry_at = 0.0
+
+        self.allowed = 0
+        self.limited = 0
+        self.redis_errors = 0
+
+    def _take_local(self, key: str, rate: float, capacity: float, cost: float) -> Tuple[bool, float, float]:
+        now = time.monotonic()
+        tokens, ts = self._local.get(key) or (capacity, now)
+        tokens = min(capacity, tokens + (now - ts) * rate)
+
+        if tokens >= cost:
+            self._local.set(key, (tokens - cost, now))
+            return True, tokens - cost, 0.0
+
+        self._local.set(key, (tokens, now))
+        return False, tokens, (cost - tokens) / rate
+
+    async def hit(
+        self,
+        key: str,
+        per_minute: int,
+        burst: Optional[int] = None,
+        cost: int = 1,
+    ) -> RateLimitResult:
+        """Take `cost` tokens from the bucket of `key`"""
+        rate = per_minute / 60
+        capacity = burst or per_minute
+
+        if self._script is not None and time.monotonic() >= self._redis_retry_at:
+            try:
+                allowed, tokens, retry_after = await self._script(
+                    keys=[REDIS_KEY_PREFIX + key],
+                    args=[rate, capacity, cost],
+                )
+                allowed, tokens, retry_after = bool(allowed), float(tokens), float(retry_after)
+            except RedisError as e:
+                self.redis_errors += 1
+                logger.warning(f"Rate limiter redis unavailable, using local buckets: {e}")
+                self._redis_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+                allowed, tokens, retry_after = self._take_local(key, rate, capacity, cost)
+        else:
+            allowed, tokens, retry_after = self._take_local(key, rate, capacity, cost)
+
+        if allowed:
+            self.allowed += 1
+        else:
+            self.limited += 1
+
+        return RateLimitResult(allowed, int(tokens), max(1, math.ceil(retry_after)))
+
+    def stats(self) -> dict:
+        return {
+            "backend": "redis" if self._redis is not None else "in-process",
+            "allowed": self.allowed,
+            "limited": self.limited,
+            "redis_errors": self.redis_errors,
+        }
+
+    async def close(self) -> None:
+        if self._redis is not None:
+            await self._redis.aclose()
+
+
+rate_limiter = TokenBucketLimiter(
+    redis_url=settings.redis_url if settings.rate_limit_redis_enabled else None,
+)
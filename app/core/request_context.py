@@ -0,0 +1,21 @@
+import re
+import uuid
+from contextvars import ContextVar
+from typing import Optional
+
+# Id of the request being handled; "-" outside of requests
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+# Incoming ids are reused only when they are short and log-safe
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+
+def get_request_id() -> str:
+    return request_id_var.get()
+
+
+def new_request_id(incoming: Optional[str] = None) -> str:
+    """Propagate a caller's request id, or create one"""
+    if incoming and _VALID_REQUEST_ID.match(incoming):
+        return incoming
+    return uuid.uuid4().hex
@@ -0,0 +1,109 @@
+import time
+from typing import List, Optional
+from uuid import UUID
+
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.core.logging import setup_logging
+
+logger = setup_logging()
+settings = get_settings()
+
+REDIS_KEY_PREFIX = "replica-lag:"
+
+# After a Redis failure, skip it for this long instead of failing every read
+REDIS_RETRY_SECONDS = 5
+
+
+def read_affinity_keys(session_id=None, user_id: Optional[str] = None) -> List[str]:
+    """Keys the lag guard tracks for a chat session and a user's session list"""
+    keys = []
+    if session_id:
+        try:
+            keys.append(f"session:{UUID(str(session_id))}")
+        except ValueError:
+            pass
+    if user_id:
+        keys.append(f"user:{user_id}")
+    return keys
+
+
+class ReplicaLagGuard:
+    """
+    Remembers what was written in the last `window_seconds` (a chat session,
+    a user's session list), so reads of it go to the primary until the
+    replica has caught up. With Redis, writes seen by one worker pin the
+    reads of every worker.
+    """
+
+    def __init__(self, window_seconds: float, redis_url: Optional[str] = None):
+        self.window_seconds = window_seconds
+        self._recent = TTLCache(max_entries=50_000, ttl_seconds=window_seconds)
+        self._redis = aioredis.from_url(redis_url) if redis_url else None
+        self._redis_retry_at = 0.0
+
+        self.primary_reads = 0
+        self.replica_reads = 0
+
+    def _redis_available(self) -> bool:
+        return self._redis is not None and time.monotonic() >= self._redis_retry_at
+
+    def _redis_failed(self, e: RedisError) -> None:
+        self._redis_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+        logger.warning(f"Replica lag guard redis unavailable, using local writes only: {e}")
+
+    async def mark_written(self, *keys: str) -> None:
+        """Pin reads of `keys` to the primary for the guard window"""
+        if not self.window_seconds:
+            return
+        for key in keys:
+            self._recent.set(key, True)
+
+        if self._redis_available():
+            try:
+                async with self._redis.pipeline(transaction=False) as pipe:
+                    for key in keys:
+                        pipe.set(f"{REDIS_KEY_PREFIX}{key}", 1, px=int(self.window_seconds * 1000))
+                    await pipe.execute()
+            except RedisError as e:
+                self._redis_failed(e)
+
+    async def use_primary(self, *keys: str) -> bool:
+        """Whether a read of `keys` must go to the primary"""
+        keys = [key for key in keys if key]
+        pinned = any(self._recent.get(key) for key in keys)
+
+        if not pinned and keys and self._redis_available():
+            try:
+                pinned = bool(await self._redis.exists(*(f"{REDIS_KEY_PREFIX}{key}" for key in keys)))
+            except RedisError as e:
+                # Unknown replication state; the primary is always current
+                self._redis_failed(e)
+                pinned = True
+
+        if pinned:
+            self.primary_reads += 1
+        else:
+            self.replica_reads += 1
+        return pinned
+
+    async def close(self) -> None:
+        if self._redis is not None:
+            await self._redis.aclose()
+
+    def stats(self) -> dict:
+        return {
+            "window_seconds": self.window_seconds,
+            "recent_writes": self._recent.stats()["entries"],
+            "primary_reads": self.primary_reads,
+            "replica_reads": self.replica_reads,
+        }
+
+
+replica_lag_guard = ReplicaLagGuard(
+    window_seconds=settings.replica_lag_guard_seconds,
+    redis_url=settings.redis_url if settings.replica_lag_guard_redis_enabled else None,
+)
@@ -1,7 +1,9 @@
 import asyncio
-from typing import AsyncGenerator
+import uuid
+from typing import AsyncGenerator, Optional
 
-from sqlalchemy import create_engine
+from fastapi import Request
+from sqlalchemy import Engine, create_engine
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
@@ -9,67 +11,161 @@ from sqlalchemy.ext.asyncio import (
     create_async_engine,
 )
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.core.config import get_settings
 from app.core.logging import setup_logging
+from app.core.metrics import instrument_pool, timed_pool_class
 from app.db.base import Base
+from app.db.replica import read_affinity_keys, replica_lag_guard
 
 logger = setup_logging()
 settings = get_settings()
 
-# Async Engine (for FastAPI)
-async_engine: AsyncEngine = create_async_engine(
-    settings.postgres_async_url,
-    echo=settings.debug,
-    pool_size=settings.postgres_pool_size,
-    max_overflow=settings.postgres_max_overflow,
-    pool_timeout=settings.postgres_pool_timeout,
-    pool_recycle=settings.postgres_pool_recycle,
-    pool_pre_ping=True
-)
-
-# Async session factory
-AsyncSessionLocal = async_sessionmaker(
-    bind=async_engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autocommit=False,
-    autoflush=False,
-)
+_async_engine: Optional[AsyncEngine] = None
+_replica_engine: Optional[AsyncEngine] = None
+_sync_engine: Optional[Engine] = None
+_async_sessionmaker: Optional[async_sessionmaker] = None
+_read_sessionmakers: dict = {}
+_sync_sessionmaker: Optional[sessionmaker] = None
 
 
-# Sync Engine (for Celery & Alembic)
-sync_engine = create_engine(
-    settings.postgres_sync_url,
-    echo=settings.debug,
-    pool_size=settings.postgres_pool_size,
-    max_overflow=settings.postgres_max_overflow,
-    pool_timeout=settings.postgres_pool_timeout,
-    pool_recycle=settings.postgres_pool_recycle,
-    pool_pre_ping=True,
-    connect_args={
-        "connect_timeout": 10
+def _asyncpg_connect_args() -> dict:
+    if settings.postgres_pgbouncer:
+        # PgBouncer in transaction mode may hand each transaction a different
+        # server connection, so prepared statements can't be cached or reused
+        # by name
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4().hex}__",
+        }
+    return {
+        "statement_cache_size": settings.postgres_statement_cache_size,
+        "prepared_statement_cache_size": settings.postgres_statement_cache_size,
     }
-)
 
-# Sync session factory
-SyncSessionLocal = sessionmaker(
-    bind=sync_engine,
-    autocommit=False,
-    autoflush=False,
-    expire_on_commit=False,
-)
+
+# Engines are created on first use, so each process only opens the pool
+# of its role: API workers the async one, Celery workers the sync one.
+def _create_async_engine(url: str, name: str) -> AsyncEngine:
+    pool_size, max_overflow = settings.postgres_pool_sizing
+    engine = create_async_engine(
+        url,
+        echo=settings.debug,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.postgres_pool_timeout,
+        pool_recycle=settings.postgres_pool_recycle,
+        pool_pre_ping=True,
+        poolclass=timed_pool_class(name, AsyncAdaptedQueuePool),
+        connect_args=_asyncpg_connect_args(),
+    )
+    instrument_pool(engine.sync_engine, name)
+    logger.info(f"Async engine {name} created (pool_size={pool_size}, max_overflow={max_overflow})")
+    return engine
+
+
+def get_async_engine() -> AsyncEngine:
+    """Async engine (for FastAPI) on the primary, sized from the per-worker connection budget"""
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = _create_async_engine(settings.postgres_async_url, "app")
+    return _async_engine
+
+
+def get_replica_engine() -> Optional[AsyncEngine]:
+    """Async engine on the read replica, or None when no replica is configured"""
+    global _replica_engine
+    if _replica_engine is None and settings.postgres_replica_async_url:
+        _replica_engine = _create_async_engine(settings.postgres_replica_async_url, "replica")
+    return _replica_engine
+
+
+def get_sync_engine() -> Engine:
+    """Sync engine (for Celery & scripts)"""
+    global _sync_engine
+    if _sync_engine is None:
+        _sync_engine = create_engine(
+            settings.postgres_sync_url,
+            echo=settings.debug,
+            pool_size=settings.postgres_sync_pool_size,
+            max_overflow=settings.postgres_sync_max_overflow,
+            pool_timeout=settings.postgres_pool_timeout,
+            pool_recycle=settings.postgres_pool_recycle,
+            pool_pre_ping=True,
+            poolclass=timed_pool_class("sync"),
+            connect_args={
+                "connect_timeout": 10
+            }
+        )
+        instrument_pool(_sync_engine, "sync")
+    return _sync_engine
+
+
+def get_async_sessionmaker() -> async_sessionmaker:
+    """Async session factory"""
+    global _async_sessionmaker
+    if _async_sessionmaker is None:
+        _async_sessionmaker = async_sessionmaker(
+            bind=get_async_engine(),
+            class_=AsyncSession,
+            expire_on_commit=False,
+            autocommit=False,
+            autoflush=False,
+        )
+    return _async_sessionmaker
+
+
+def _read_only(engine: AsyncEngine) -> AsyncEngine:
+    """A view of `engine`, sharing its pool, whose connections never write"""
+    if settings.read_session_mode == "autocommit":
+        # No transaction is opened, so there is no BEGIN and no COMMIT to send
+        return engine.execution_options(isolation_level="AUTOCOMMIT")
+    return engine.execution_options(postgresql_readonly=True)
+
+
+def get_read_sessionmaker(replica: bool = False) -> Optional[async_sessionmaker]:
+    """Read-only async session factory on the primary, or on the replica if one is configured"""
+    factory = _read_sessionmakers.get(replica)
+    if factory is None:
+        engine = get_replica_engine() if replica else get_async_engine()
+        if engine is None:
+            return None
+        factory = _read_sessionmakers[replica] = async_sessionmaker(
+            bind=_read_only(engine),
+            class_=AsyncSession,
+            expire_on_commit=False,
+            autocommit=False,
+            autoflush=False,
+        )
+    return factory
+
+
+def get_sync_sessionmaker() -> sessionmaker:
+    """Sync session factory"""
+    global _sync_sessionmaker
+    if _sync_sessionmaker is None:
+        _sync_sessionmaker = sessionmaker(
+            bind=get_sync_engine(),
+            autocommit=False,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+    return _sync_sessionmaker
 
 
 # Session Dependencies
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
     """
-    FastAPI dependency for async database sessions
+    FastAPI dependency for read-write async database sessions.
+    Commits once after the handler, unless it already committed everything.
     """
-    async with AsyncSessionLocal() as session:
+    async with get_async_sessionmaker()() as session:
         try:
             yield session
-            await session.commit()
+            if session.in_transaction():
+                await session.commit()
         except Exception:
             await session.rollback()
             raise
@@ -77,11 +173,31 @@ async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
+async def get_async_read_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    FastAPI dependency for read endpoints: a read-only session on the read
+    replica, or on the primary while the lag guard holds a recent write of
+    the requested chat session (`session_id` path parameter) or user
+    (`user_id` query parameter). It is never committed.
+    """
+    replica = get_read_sessionmaker(replica=True)
+    if replica is None or await replica_lag_guard.use_primary(*read_affinity_keys(
+        request.path_params.get("session_id"),
+        request.query_params.get("user_id"),
+    )):
+        factory = get_read_sessionmaker()
+    else:
+        factory = replica
+
+    async with factory() as session:
+        yield session
+
+
 def get_sync_session() -> Session:
     """
     Get sync session for Celery tasks.
     """
-    return SyncSessionLocal()
+    return get_sync_sessionmaker()()
 
 
 # Database Initialization
@@ -94,7 +210,7 @@ async def init_db(retries: int = 10, delay: int = 2) -> None:
     
     for attempt in range(1, retries + 1):
         try:
-            async with async_engine.begin() as conn:
+            async with get_async_engine().begin() as conn:
                 await conn.run_sync(Base.metadata.create_all)
                 print("Database connection established!")
                 return
@@ -112,7 +228,7 @@ async def init_db(retries: int = 10, delay: int = 2) -> None:
 def init_db_sync() -> None:
     """Initialize database tables synchronously (for scripts/testing)"""
     try:
-        Base.metadata.create_all(bind=sync_engine)
+        Base.metadata.create_all(bind=get_sync_engine())
         print("Database tables created successfully!")
     except Exception as e:
         print(f"Failed to create database tables: {e}")
@@ -120,14 +236,29 @@ def init_db_sync() -> None:
             
 async def close_db() -> None:
     """Close database connections gracefully"""
-    try:
-        await async_engine.dispose()
-        logger.info("Async database connections closed")
-    except Exception as e:
-        logger.error(f"Error closing async database connections: {e}")
+    from trading_agent.runtime import agent_runtime
+
+    await agent_runtime.close()
+
+    if _async_engine is not None:
+        try:
+            await _async_engine.dispose()
+            logger.info("Async database connections closed")
+        except Exception as e:
+            logger.error(f"Error closing async database connections: {e}")
     
-    try:
-        sync_engine.dispose()
-        logger.info("Sync database connections closed")
-    except Exception as e:
-        logger.error(f"Error closing sync database connections: {e}")
+    if _replica_engine is not None:
+        try:
+            await _replica_engine.dispose()
+            logger.info("Replica database connections closed")
+        except Exception as e:
+            logger.error(f"Error closing replica database connections: {e}")
+    
+    await replica_lag_guard.close()
+    
+    if _sync_engine is not None:
+        try:
+            _sync_engine.dispose()
+            logger.info("Sync database connections closed")
+        except Exception as e:
+            logger.error(f"Error closing sync database connections: {e}")
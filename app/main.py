@@ -2,13 +2,24 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 
 from app.core.config import get_settings
-from app.core.logging import setup_logging
+from app.core.logging import setup_logging, shutdown_logging
 from app.db.session import init_db, close_db
 from app.middleware import (
     register_middlewares, 
     register_exception_handlers
 )
 from app.api.router import api_router
+from app.api.health.prober import health_prober
+from app.core.coalesce import request_coalescer
+from app.core.metrics import mark_process_dead
+from app.core.rate_limit import rate_limiter
+from chat.db.writer import message_writer
+from trading_agent.runtime import agent_runtime
+from trading_agent.utils.history import history_compactor
+from trading_agent.utils.market_cache import market_intel_cache
+from trading_agent.utils.session_lock import session_turn_lock
+from trading_agent.utils.parse_pool import upload_parser
+from trading_agent.utils.upload_cache import upload_cache
 
 # Initialize logger
 logger = setup_logging()
@@ -21,13 +32,27 @@ async def lifespan(app: FastAPI):
     logger.info("Starting up application...")
     await init_db()
     logger.info("Database initialized successfully")
+    agent_runtime.start()
+    await message_writer.start()
+    await health_prober.start()
     
     yield
     
     # Shutdown
     logger.info("Shutting down application...")
+    await health_prober.stop()
+    await history_compactor.close()
+    await message_writer.stop()
     await close_db()
+    await upload_cache.close()
+    await market_intel_cache.close()
+    await request_coalescer.close()
+    await session_turn_lock.close()
+    await rate_limiter.close()
+    upload_parser.close()
+    mark_process_dead()
     logger.info("Application shutdown complete")
+    shutdown_logging()
 
 
 def create_application() -> FastAPI:
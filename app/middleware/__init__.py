@@ -9,6 +9,7 @@ from starlette.middleware.gzip import GZipMiddleware
 from app.core.config import get_settings
 from app.core.exceptions import APIError
 from app.middleware.logging import LoggingMiddleware
+from app.middleware.rate_limit import RateLimitMiddleware
 from app.middleware.timing import TimingMiddleware
 
 from .exception_handler import (
@@ -23,9 +24,12 @@ def register_middlewares(app: FastAPI) -> None:
     """Register all application middlewares in correct order"""
     settings = get_settings()
     
-    # Timing middleware (outermost - measures total time)
-    if settings.debug:
-        app.add_middleware(TimingMiddleware)
+    # Rate limiting (innermost - rejected requests still get CORS headers and logs)
+    if settings.rate_limit_enabled:
+        app.add_middleware(RateLimitMiddleware)
+    
+    # Timing middleware (request latency metrics)
+    app.add_middleware(TimingMiddleware)
     
     # Logging middleware
     app.add_middleware(LoggingMiddleware)
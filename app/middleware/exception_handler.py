@@ -87,6 +87,7 @@ async def api_error_handler(_: Request, exc: APIError) -> JSONResponse:
     return JSONResponse(
         status_code=exc.status_code,
         content=content,
+        headers=exc.headers,
     )
 
 
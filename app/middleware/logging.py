@@ -1,44 +1,68 @@
-import uuid
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
+import random
+import time
 
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import get_settings
 from app.core.logging import setup_logging
+from app.core.request_context import new_request_id, request_id_var
 
 logger = setup_logging()
+settings = get_settings()
+
+
+class LoggingMiddleware:
+    """
+    Pure ASGI middleware assigning each request an id (the caller's
+    X-Request-ID when valid) that every log record of the request carries,
+    and logging one structured line per request. Successful requests are
+    sampled; errors and slow requests are always logged.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = new_request_id(Headers(scope=scope).get("x-request-id"))
+        token = request_id_var.set(request_id)
+        scope.setdefault("state", {})["request_id"] = request_id
+
+        start = time.perf_counter()
+        status_code = 500
 
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message).append("X-Request-ID", request_id)
+            await send(message)
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware to log all requests and responses"""
-    
-    async def dispatch(self, request: Request, call_next) -> Response:
-        # Generate request ID
-        request_id = str(uuid.uuid4())
-        request.state.request_id = request_id
-        
-        # Log request
-        logger.info(
-            f"[{request_id}] {request.method} {request.url.path} "
-            f"- Client: {request.client.host if request.client else 'unknown'}"
-        )
-        
-        # Process request
         try:
-            response = await call_next(request)
-            
-            # Add request ID to response headers
-            response.headers["X-Request-ID"] = request_id
-            
-            # Log response
-            logger.info(
-                f"[{request_id}] Response: {response.status_code}"
-            )
-            
-            return response
-            
+            await self.app(scope, receive, send_with_request_id)
         except Exception as e:
-            logger.error(
-                f"[{request_id}] Request failed: {str(e)}",
-                exc_info=True,
-            )
-            raise
\ No newline at end of file
+            logger.error(f"Request failed: {e}", exc_info=True)
+            raise
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            if (
+                status_code >= 500
+                or duration_ms >= settings.slow_request_ms
+                or random.random() < settings.request_log_sample_rate
+            ):
+                client = scope.get("client")
+                logger.info(
+                    f"{scope['method']} {scope['path']} {status_code} {duration_ms:.1f}ms",
+                    extra={
+                        "http_method": scope["method"],
+                        "http_path": scope["path"],
+                        "http_status": status_code,
+                        "duration_ms": round(duration_ms, 2),
+                        "client_ip": client[0] if client else None,
+                    },
+                )
+            request_id_var.reset(token)
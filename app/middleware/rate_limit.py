@@ -0,0 +1,119 @@
+import ipaddress
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import get_settings
+from app.core.logging import setup_logging
+from app.core.metrics import QUEUE_REJECTIONS
+from app.core.rate_limit import rate_limiter
+
+logger = setup_logging()
+settings = get_settings()
+
+# Paths never rate limited (suffixes of the API prefix)
+EXEMPT_PATHS = ("/health", "/metrics", "/docs", "/redoc", "/openapi.json")
+
+TRUSTED_PROXIES = [
+    ipaddress.ip_network(proxy, strict=False)
+    for proxy in settings.rate_limit_trusted_proxies
+]
+
+
+def _is_trusted_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in TRUSTED_PROXIES)
+
+
+def client_address(scope: Scope) -> Optional[str]:
+    """
+    The address of the client, as seen by the first proxy we trust.
+    X-Forwarded-For is walked from the right, so entries a client prepends
+    itself are never used while it connects through a trusted proxy.
+    """
+    client = scope.get("client")
+    address = client[0] if client else None
+    if address is None or not _is_trusted_proxy(address):
+        return address
+
+    forwarded = []
+    for name, value in scope.get("headers", []):
+        if name == b"x-forwarded-for":
+            forwarded.extend(part.strip() for part in value.decode("latin-1").split(","))
+    for hop in reversed(forwarded):
+        if not hop:
+            continue
+        address = hop
+        if not _is_trusted_proxy(hop):
+            break
+    return address
+
+
+class RateLimitMiddleware:
+    """
+    Per-client and per-platform token buckets on API requests.
+    Clients are identified by address, taken from X-Forwarded-For only
+    behind a trusted proxy; user ids sent by the client are not trusted.
+    Agent turns are limited per user separately, in the agent service.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        path = scope.get("path", "")
+        if (
+            scope["type"] != "http"
+            or not path.startswith(settings.api_v1_prefix)
+            or path[len(settings.api_v1_prefix):].startswith(EXEMPT_PATHS)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope)
+        client = client_address(scope) or "unknown"
+        buckets = [(f"client:{client}", settings.rate_limit_per_minute, settings.rate_limit_burst)]
+
+        platform = request.query_params.get("platform")
+        if platform:
+            buckets.append((f"platform:{platform}", settings.rate_limit_platform_per_minute, None))
+
+        remaining = None
+        for key, per_minute, burst in buckets:
+            result = await rate_limiter.hit(key, per_minute, burst)
+            if not result.allowed:
+                logger.warning(f"Rate limited {key} on {request.method} {path}")
+                QUEUE_REJECTIONS.labels("rate_limit", key.split(":", 1)[0]).inc()
+                response = JSONResponse(
+                    status_code=429,
+                    content={
+                        "success": False,
+                        "status_code": 429,
+                        "message": "Rate limit exceeded, please retry later",
+                        "error_type": "TooManyRequestsError",
+                    },
+                    headers={
+                        "Retry-After": str(result.retry_after),
+                        "X-RateLimit-Limit": str(per_minute),
+                        "X-RateLimit-Remaining": "0",
+                    },
+                )
+                await response(scope, receive, send)
+                return
+            if remaining is None:
+                remaining = result.remaining
+
+        async def send_with_limits(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("X-RateLimit-Limit", str(settings.rate_limit_per_minute))
+                headers.append("X-RateLimit-Remaining", str(remaining))
+            await send(message)
+
+        await self.app(scope, receive, send_with_limits)
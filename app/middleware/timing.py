@@ -1,33 +1,57 @@
 import time
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
 
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import get_settings
 from app.core.logging import setup_logging
+from app.core.metrics import REQUEST_DURATION
 
 logger = setup_logging()
+settings = get_settings()
+
+
+class TimingMiddleware:
+    """
+    Pure ASGI middleware timing requests with `perf_counter`.
+    X-Process-Time is the time until the response starts; the latency
+    histogram records the full request, including streamed bodies.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message).append(
+                    "X-Process-Time", f"{time.perf_counter() - start:.6f}"
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            duration = time.perf_counter() - start
 
+            # Labelled by endpoint name to keep cardinality bounded
+            route = scope.get("route")
+            REQUEST_DURATION.labels(
+                scope["method"],
+                getattr(route, "name", None) or "unmatched",
+                status_code,
+            ).observe(duration)
 
-class TimingMiddleware(BaseHTTPMiddleware):
-    """Middleware to measure and log request processing time"""
-    
-    async def dispatch(self, request: Request, call_next) -> Response:
-        start_time = time.time()
-        
-        # Process request
-        response = await call_next(request)
-        
-        # Calculate duration
-        duration = time.time() - start_time
-        
-        # Add timing header
-        response.headers["X-Process-Time"] = str(duration)
-        
-        # Log slow requests (> 1 second)
-        if duration > 1.0:
-            logger.warning(
-                f"Slow request: {request.method} {request.url.path} "
-                f"took {duration:.2f}s"
-            )
-        
-        return response
\ No newline at end of file
+            if duration * 1000 >= settings.slow_request_ms:
+                logger.warning(
+                    f"Slow request: {scope['method']} {scope['path']} took {duration:.2f}s"
+                )
@@ -0,0 +1,108 @@
+"""
+Compare the ORM chat-turn persistence path with the single-statement path.
+
+ORM: the previous path, kept here as the baseline: add the session
+(commit + refresh), then add the messages and bump the counter (commit).
+Core: SessionCRUD.persist_turns (session upsert CTE + multi-row message
+insert, one commit).
+
+Runs against the configured PostgreSQL database; the benchmark sessions
+are deleted afterwards.
+
+Usage:
+    python -m benchmarks.chat_persistence --turns 200
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from uuid import uuid4
+
+from sqlalchemy import delete, event, update
+
+from app.db.session import get_async_engine, get_async_sessionmaker
+from chat.db.crud import SessionCRUD, build_turn
+from chat.db.models import Message, Session
+from chat.schema import MessageCreate
+from chat.utils.choices import PLATFORMS, SENDER_OPTIONS
+
+BENCH_USER = "benchmark-chat-persistence"
+
+
+def turn_messages():
+    return [
+        MessageCreate(message="How did my XAUUSD trades do this week?", sender=SENDER_OPTIONS.USER),
+        MessageCreate(message="You closed 12 XAUUSD trades with a 58% win rate.", sender=SENDER_OPTIONS.AI),
+    ]
+
+
+async def orm_turn(crud: SessionCRUD, session_data: dict) -> None:
+    db = crud.db
+    session = Session(session_id=uuid4(), **session_data)
+    db.add(session)
+    await db.commit()
+    await db.refresh(session)
+
+    messages = [
+        Message(session_id=session.session_id, message=msg.message, sender=msg.sender, resource=msg.resource)
+        for msg in turn_messages()
+    ]
+    db.add_all(messages)
+    await db.execute(
+        update(Session)
+        .where(Session.session_id == session.session_id)
+        .values(message_count=Session.message_count + len(messages))
+    )
+    await db.commit()
+
+
+async def core_turn(crud: SessionCRUD, session_data: dict) -> None:
+    await crud.persist_turns([build_turn(uuid4(), session_data, turn_messages())])
+
+
+async def run(label: str, turn, turns: int) -> None:
+    statements = 0
+
+    def count_statement(*_):
+        nonlocal statements
+        statements += 1
+
+    sync_engine = get_async_engine().sync_engine
+    event.listen(sync_engine, "before_cursor_execute", count_statement)
+
+    durations = []
+    session_data = {"user_id": BENCH_USER, "platform": PLATFORMS.RESTRO}
+    async with get_async_sessionmaker()() as db:
+        crud = SessionCRUD(db)
+        for _ in range(turns):
+            start = time.perf_counter()
+            await turn(crud, session_data)
+            durations.append(time.perf_counter() - start)
+
+    event.remove(sync_engine, "before_cursor_execute", count_statement)
+
+    durations.sort()
+    print(
+        f"{label:<6} mean {statistics.mean(durations) * 1000:7.2f} ms   "
+        f"p95 {durations[int(len(durations) * 0.95) - 1] * 1000:7.2f} ms   "
+        f"statements/turn {statements / turns:4.1f}"
+    )
+
+
+async def main(turns: int) -> None:
+    # warm up the pool
+    await run("warmup", core_turn, 5)
+    await run("orm", orm_turn, turns)
+    await run("core", core_turn, turns)
+
+    async with get_async_sessionmaker()() as db:
+        await db.execute(delete(Session).where(Session.user_id == BENCH_USER))
+        await db.commit()
+    await get_async_engine().dispose()
+
+
+if __name__ == "__main__":
+    cli = argparse.ArgumentParser(description=__doc__)
+    cli.add_argument("--turns", type=int, default=200)
+    args = cli.parse_args()
+    asyncio.run(main(args.turns))
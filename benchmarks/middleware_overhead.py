@@ -0,0 +1,110 @@
+"""
+Compare the per-request overhead of the BaseHTTPMiddleware logging/timing
+middleware with the pure ASGI implementations, on a `/health`-style endpoint.
+
+Each stack wraps the same trivial app and is driven in-process through
+httpx's ASGI transport, so the numbers are middleware cost plus a constant
+client/routing floor (the `bare` stack). Log output is disabled to measure
+the middleware machinery rather than the console.
+
+Usage:
+    python -m benchmarks.middleware_overhead --requests 2000
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+import uuid
+
+import httpx
+from fastapi import FastAPI, Request
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import Response
+
+from app.middleware.logging import LoggingMiddleware
+from app.middleware.timing import TimingMiddleware
+
+logger = logging.getLogger("benchmark")
+
+
+class LegacyLoggingMiddleware(BaseHTTPMiddleware):
+    """The previous LoggingMiddleware"""
+
+    async def dispatch(self, request: Request, call_next) -> Response:
+        request_id = str(uuid.uuid4())
+        request.state.request_id = request_id
+        logger.info(f"[{request_id}] {request.method} {request.url.path}")
+        response = await call_next(request)
+        response.headers["X-Request-ID"] = request_id
+        logger.info(f"[{request_id}] Response: {response.status_code}")
+        return response
+
+
+class LegacyTimingMiddleware(BaseHTTPMiddleware):
+    """The previous TimingMiddleware"""
+
+    async def dispatch(self, request: Request, call_next) -> Response:
+        start_time = time.perf_counter()
+        response = await call_next(request)
+        duration = time.perf_counter() - start_time
+        response.headers["X-Process-Time"] = str(duration)
+        if duration > 1.0:
+            logger.warning(f"Slow request: {request.method} {request.url.path}")
+        return response
+
+
+def build_app(middleware: list) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    for middleware_class in middleware:
+        app.add_middleware(middleware_class)
+    return app
+
+
+STACKS = {
+    "bare": [],
+    "base_http": [LegacyTimingMiddleware, LegacyLoggingMiddleware],
+    "pure_asgi": [TimingMiddleware, LoggingMiddleware],
+}
+
+
+async def run(label: str, app: FastAPI, requests: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(50):
+            await client.get("/health")
+
+        durations = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            response = await client.get("/health")
+            durations.append(time.perf_counter() - start)
+            assert response.status_code == 200
+
+    mean_us = statistics.mean(durations) * 1e6
+    p99_us = statistics.quantiles(durations, n=100)[98] * 1e6
+    print(f"{label:>10}: mean {mean_us:8.1f}us  p99 {p99_us:8.1f}us")
+    return mean_us
+
+
+async def main(requests: int) -> None:
+    logging.disable(logging.CRITICAL)
+    means = {label: await run(label, build_app(stack), requests) for label, stack in STACKS.items()}
+
+    floor = means["bare"]
+    print(
+        f"overhead per request: base_http {means['base_http'] - floor:.1f}us, "
+        f"pure_asgi {means['pure_asgi'] - floor:.1f}us"
+    )
+
+
+if __name__ == "__main__":
+    cli = argparse.ArgumentParser(description=__doc__)
+    cli.add_argument("--requests", type=int, default=2000)
+    args = cli.parse_args()
+    asyncio.run(main(args.requests))
@@ -0,0 +1,140 @@
+"""
+Compare database round trips of the session list/messages endpoints with
+the previous dependency (one transaction, committed after the handler)
+and the read-only dependency (READ_SESSION_MODE, never committed).
+
+Round trips are the SQL statements plus the BEGIN/COMMIT/ROLLBACK that
+asyncpg sends for transactions.
+
+Runs against the configured PostgreSQL database; the benchmark sessions
+are deleted afterwards.
+
+Usage:
+    python -m benchmarks.read_sessions --requests 500
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from uuid import uuid4
+
+import httpx
+from asyncpg.transaction import Transaction
+from fastapi import FastAPI
+from sqlalchemy import delete, event
+
+from app.db.session import (
+    get_async_engine,
+    get_async_read_session,
+    get_async_sessionmaker,
+)
+from chat.db.crud import SessionCRUD, build_turn
+from chat.db.models import Session
+from chat.router import router as chat_router
+from chat.schema import MessageCreate
+from chat.utils.choices import PLATFORMS, SENDER_OPTIONS
+
+BENCH_USER = "benchmark-read-sessions"
+
+round_trips = 0
+
+
+def count_round_trip(*_):
+    global round_trips
+    round_trips += 1
+
+
+def counted(method):
+    async def wrapper(self, *args, **kwargs):
+        count_round_trip()
+        return await method(self, *args, **kwargs)
+    return wrapper
+
+
+# BEGIN/COMMIT/ROLLBACK bypass the SQLAlchemy cursor events
+Transaction.start = counted(Transaction.start)
+Transaction.commit = counted(Transaction.commit)
+Transaction.rollback = counted(Transaction.rollback)
+
+
+async def legacy_session():
+    """The previous get_async_session: always committed after the handler"""
+    async with get_async_sessionmaker()() as session:
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+
+
+async def seed(sessions: int) -> str:
+    turns = [
+        build_turn(
+            uuid4(),
+            {"user_id": BENCH_USER, "platform": PLATFORMS.RESTRO},
+            [
+                MessageCreate(message="How did my XAUUSD trades do this week?", sender=SENDER_OPTIONS.USER),
+                MessageCreate(message="You closed 12 XAUUSD trades with a 58% win rate.", sender=SENDER_OPTIONS.AI),
+            ],
+        )
+        for _ in range(sessions)
+    ]
+    async with get_async_sessionmaker()() as db:
+        await SessionCRUD(db).persist_turns(turns)
+    return str(turns[0].session["session_id"])
+
+
+async def run(label: str, app: FastAPI, urls: list, requests: int) -> None:
+    global round_trips
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for url in urls:
+            await client.get(url)
+
+        round_trips = 0
+        durations = []
+        for index in range(requests):
+            start = time.perf_counter()
+            response = await client.get(urls[index % len(urls)])
+            durations.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.text
+
+    durations.sort()
+    print(
+        f"{label:<10} mean {statistics.mean(durations) * 1000:7.2f} ms   "
+        f"p95 {durations[int(len(durations) * 0.95) - 1] * 1000:7.2f} ms   "
+        f"round trips/request {round_trips / requests:4.1f}"
+    )
+
+
+async def main(requests: int, sessions: int) -> None:
+    session_id = await seed(sessions)
+    urls = [
+        f"/chat/sessions?platform={PLATFORMS.RESTRO.value}&user_id={BENCH_USER}&include_total=true",
+        f"/chat/sessions/messages/{session_id}",
+    ]
+
+    app = FastAPI()
+    app.include_router(chat_router, prefix="/chat")
+    sync_engine = get_async_engine().sync_engine
+    event.listen(sync_engine, "before_cursor_execute", count_round_trip)
+
+    app.dependency_overrides[get_async_read_session] = legacy_session
+    await run("legacy", app, urls, requests)
+    app.dependency_overrides.clear()
+    await run("read_only", app, urls, requests)
+
+    event.remove(sync_engine, "before_cursor_execute", count_round_trip)
+    async with get_async_sessionmaker()() as db:
+        await db.execute(delete(Session).where(Session.user_id == BENCH_USER))
+        await db.commit()
+    await get_async_engine().dispose()
+
+
+if __name__ == "__main__":
+    cli = argparse.ArgumentParser(description=__doc__)
+    cli.add_argument("--requests", type=int, default=500)
+    cli.add_argument("--sessions", type=int, default=50)
+    args = cli.parse_args()
+    asyncio.run(main(args.requests, args.sessions))
@@ -0,0 +1,75 @@
+"""
+Benchmark the trade-history analytics engine on synthetic broker exports.
+
+Usage:
+    python -m benchmarks.trade_analytics --rows 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from trading_agent.analytics import TradeAnalytics
+
+SYMBOLS = ["EURUSD", "GBPUSD", "USDJPY", "XAUUSD", "NAS100", "US30", "BTCUSD"]
+STRATEGIES = ["breakout", "scalp", "swing", "news", None]
+
+
+def synthetic_history(rows: int, seed: int = 42) -> pd.DataFrame:
+    """Broker-like export with the raw header names the parser has to map"""
+    rng = np.random.default_rng(seed)
+    open_time = pd.Timestamp("2020-01-01", tz="UTC") + pd.to_timedelta(
+        np.sort(rng.integers(0, 5 * 365 * 24 * 3600, rows)), unit="s"
+    )
+    entry = rng.uniform(1.0, 2000.0, rows)
+    return pd.DataFrame({
+        "Symbol": rng.choice(SYMBOLS, rows),
+        "Type": rng.choice(["buy", "sell"], rows),
+        "Volume": rng.choice([0.01, 0.1, 0.5, 1.0, 2.0], rows),
+        "Open Price": entry,
+        "Close Price": entry * rng.normal(1.0, 0.002, rows),
+        "Profit": rng.normal(2.0, 75.0, rows),
+        "Open Time": open_time,
+        "Close Time": open_time + pd.to_timedelta(rng.integers(30, 3 * 24 * 3600, rows), unit="s"),
+        "Strategy": rng.choice(STRATEGIES, rows),
+        "Comment": rng.choice(["", "sl", "tp"], rows),
+    })
+
+
+def timed(label: str, func, repeat: int = 1):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<32} {best * 1000:10.1f} ms")
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = timed("generate", lambda: synthetic_history(args.rows))
+    print(f"rows: {len(df):,}  raw memory: {df.memory_usage(deep=True).sum() / 2**20:.1f} MiB")
+
+    analytics = timed("build analytics", lambda: TradeAnalytics(df), args.repeat)
+    timed("get_summary", analytics.get_summary, args.repeat)
+    timed("get_symbol_stats", lambda: analytics.get_group_stats("symbol", "XAUUSD"), args.repeat)
+    timed("get_equity_curve", lambda: analytics.get_equity_curve(50), args.repeat)
+    timed(
+        "query_trades",
+        lambda: analytics.query_trades(symbol="EURUSD", side="buy", min_pnl=100, limit=20),
+        args.repeat,
+    )
+    timed("to_dict(records) baseline", lambda: df.to_dict(orient="records"))
+
+    print(f"columnar memory: {analytics.frame.memory_usage(deep=True).sum() / 2**20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
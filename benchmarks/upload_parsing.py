@@ -0,0 +1,88 @@
+"""
+Measure event-loop responsiveness while a large trade history upload is parsed.
+
+A heartbeat coroutine ticks every 10 ms; the worst tick delay shows how long
+the loop was blocked. Parsing directly on the loop is compared with the
+upload parser (thread / process pool).
+
+Usage:
+    python -m benchmarks.upload_parsing --rows 500000 --concurrent 4
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from fastapi import UploadFile
+
+from benchmarks.trade_analytics import synthetic_history
+from trading_agent.utils.file_parser import parse_upload
+from trading_agent.utils.parse_pool import UploadParser
+
+TICK_SECONDS = 0.01
+
+
+async def heartbeat(stop: asyncio.Event, lags: list) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK_SECONDS)
+        lags.append(time.perf_counter() - start - TICK_SECONDS)
+
+
+async def measure(label: str, parse, uploads: list) -> None:
+    stop = asyncio.Event()
+    lags: list = []
+    ticker = asyncio.create_task(heartbeat(stop, lags))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(parse(upload) for upload in uploads))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await ticker
+    lags.sort()
+    p99 = lags[int(len(lags) * 0.99) - 1] if lags else 0.0
+    print(
+        f"{label:<20} total {elapsed * 1000:9.1f} ms   "
+        f"loop lag max {max(lags, default=0) * 1000:8.1f} ms   p99 {p99 * 1000:8.1f} ms"
+    )
+
+
+async def main(rows: int, concurrent: int, workers: int) -> None:
+    path = os.path.join(tempfile.gettempdir(), "bench_trade_history.csv")
+    synthetic_history(rows).to_csv(path, index=False)
+    size = os.path.getsize(path)
+    print(f"file: {size / 2**20:.1f} MiB, {rows:,} rows, {concurrent} concurrent upload(s)")
+
+    def uploads():
+        return [
+            UploadFile(file=open(path, "rb"), filename="history.csv", size=size)
+            for _ in range(concurrent)
+        ]
+
+    async def on_loop(upload: UploadFile):
+        return parse_upload(upload.file, upload.filename)
+
+    parser = UploadParser(workers=workers, concurrency=concurrent, inline_max_bytes=0)
+
+    async def in_pool(upload: UploadFile):
+        return await parser.parse(upload, size)
+
+    # warm up the process pool so worker start-up is not measured
+    await in_pool(uploads()[0])
+
+    await measure("on event loop", on_loop, uploads())
+    await measure("process pool", in_pool, uploads())
+
+    parser.close()
+    os.unlink(path)
+
+
+if __name__ == "__main__":
+    cli = argparse.ArgumentParser(description=__doc__)
+    cli.add_argument("--rows", type=int, default=500_000)
+    cli.add_argument("--concurrent", type=int, default=4)
+    cli.add_argument("--workers", type=int, default=4)
+    args = cli.parse_args()
+    asyncio.run(main(args.rows, args.concurrent, args.workers))
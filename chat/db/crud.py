@@ -1,51 +1,135 @@
+from datetime import datetime, timedelta, timezone
 from fastapi import HTTPException
-from typing import Optional, List, Tuple
+from typing import NamedTuple, Optional, List, Tuple
 from uuid import UUID, uuid4
 
-from sqlalchemy import select, func
+from sqlalchemy import select, func, tuple_, insert, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.base.pagination import Page, decode_cursor, encode_cursor
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.core.metrics import observe_stage
+from app.db.replica import read_affinity_keys, replica_lag_guard
 from chat.db.models import Session, Message
 from chat.utils.choices import PLATFORMS
 from chat.schema import SessionSchema, SessionMessage
 
+settings = get_settings()
+
+# Exact session counts per (platform, user_id) filter
+session_count_cache = TTLCache(
+    max_entries=4096,
+    ttl_seconds=settings.session_count_cache_seconds,
+)
+
+
+class ChatTurn(NamedTuple):
+    """Rows of one chat turn: the session upsert values and its messages"""
+    session: dict
+    messages: List[dict]
+
+
+def build_turn(
+    session_id: UUID,
+    session_data: dict,
+    message_data: List,
+    now: Optional[datetime] = None,
+) -> ChatTurn:
+    """Build the insert rows of a chat turn; ids and timestamps are fixed here"""
+    session_id = UUID(str(session_id))
+    now = now or datetime.now(timezone.utc)
+
+    session_row = {
+        "session_id": session_id,
+        "user_id": session_data.get("user_id"),
+        "platform": session_data.get("platform"),
+        "created_at": now,
+        "updated_at": now,
+    }
+
+    # Offset timestamps so messages of a turn keep their order
+    message_rows = [
+        {
+            "id": uuid4(),
+            "session_id": session_id,
+            "message": msg.message,
+            "sender": msg.sender,
+            "resource": msg.resource,
+            "created_at": now + timedelta(microseconds=index),
+            "updated_at": now,
+        }
+        for index, msg in enumerate(message_data)
+    ]
+
+    return ChatTurn(session_row, message_rows)
+
+
 class SessionCRUD:
     def __init__(self, db: AsyncSession):
         self.db = db
 
+    async def _count_sessions(self, base_stmt, cache_key: tuple) -> int:
+        """Exact session count, cached briefly per filter"""
+        total = session_count_cache.get(cache_key)
+        if total is None:
+            count_stmt = select(func.count()).select_from(base_stmt.subquery())
+            total_result = await self.db.execute(count_stmt)
+            total = total_result.scalar_one()
+            session_count_cache.set(cache_key, total)
+        return total
+
+
     async def get_list(
         self,
         page: int,
         page_size: int,
         platform: PLATFORMS,
         user_id: Optional[str] = None,
-    ) -> Tuple[List[SessionSchema], int]:
+        cursor: Optional[str] = None,
+        include_total: bool = False,
+    ) -> Page:
 
         # Base query
         base_stmt = select(Session).where(Session.platform == platform)
         if user_id:
             base_stmt = base_stmt.where(Session.user_id == user_id)
 
-        # Total count
-        count_stmt = select(func.count()).select_from(base_stmt.subquery())
-        total_result = await self.db.execute(count_stmt)
-        total = total_result.scalar_one()
+        # Total count only on request
+        total = None
+        if include_total:
+            total = await self._count_sessions(base_stmt, (platform, user_id))
 
-        # Pagination
-        stmt = (
-            base_stmt.order_by(Session.created_at.desc())
-            .offset((page - 1) * page_size)
-            .limit(page_size)
+        # Keyset pagination on (created_at, session_id), page offset as fallback
+        stmt = base_stmt.order_by(
+            Session.created_at.desc(),
+            Session.session_id.desc(),
         )
-        result = await self.db.execute(stmt)
+        if cursor:
+            created_at, session_id = decode_cursor(cursor)
+            stmt = stmt.where(
+                tuple_(Session.created_at, Session.session_id) < tuple_(created_at, session_id)
+            )
+        else:
+            stmt = stmt.offset((page - 1) * page_size)
+
+        # One extra row tells whether another page exists
+        result = await self.db.execute(stmt.limit(page_size + 1))
         sessions = result.scalars().all()
+        has_more = len(sessions) > page_size
+        sessions = sessions[:page_size]
 
         session_list = [
             SessionSchema.model_validate(session)
             for session in sessions
         ]
 
-        return session_list, total
+        next_cursor = None
+        if has_more:
+            next_cursor = encode_cursor(sessions[-1].created_at, sessions[-1].session_id)
+
+        return Page(session_list, total, next_cursor, has_more)
 
 
     async def get_session_messages(
@@ -53,79 +137,154 @@ class SessionCRUD:
         session_id: UUID,
         page: int = 1,
         page_size: int = 20,
-    ) -> Tuple[List[SessionMessage], int]:
+        cursor: Optional[str] = None,
+    ) -> Page:
         
-        # Base query for this session
-        base_stmt = select(Message).where(Message.session_id == session_id)
-
-        # Total count
-        count_stmt = select(func.count()).select_from(base_stmt.subquery())
-        total_result = await self.db.execute(count_stmt)
-        total = total_result.scalar_one()
+        # Total from the session's message counter
+        session_result = await self.db.execute(
+            select(Session.message_count, Session.created_at).where(Session.session_id == session_id)
+        )
+        session_row = session_result.one_or_none()
+        total = session_row.message_count if session_row else 0
 
-        # Paginated messages
+        # Keyset pagination on (created_at, id), page offset as fallback
         stmt = (
-            base_stmt.order_by(Message.created_at.asc())
-            .offset((page - 1) * page_size)
-            .limit(page_size)
+            select(Message)
+            .where(Message.session_id == session_id)
+            .order_by(Message.created_at.asc(), Message.id.asc())
         )
-        result = await self.db.execute(stmt)
+        if session_row:
+            # No message predates its session; the bound prunes older
+            # monthly partitions (with a day of slack for clock skew)
+            stmt = stmt.where(Message.created_at >= session_row.created_at - timedelta(days=1))
+        if cursor:
+            created_at, message_id = decode_cursor(cursor)
+            stmt = stmt.where(
+                tuple_(Message.created_at, Message.id) > tuple_(created_at, message_id)
+            )
+        else:
+            stmt = stmt.offset((page - 1) * page_size)
+
+        result = await self.db.execute(stmt.limit(page_size + 1))
         messages = result.scalars().all()
+        has_more = len(messages) > page_size
+        messages = messages[:page_size]
 
         message_list = [
             SessionMessage.model_validate(message)
             for message in messages
         ]
 
-        return message_list, total
+        next_cursor = None
+        if has_more:
+            next_cursor = encode_cursor(messages[-1].created_at, messages[-1].id)
+
+        return Page(message_list, total, next_cursor, has_more)
+
+
+    async def persist_turns(self, turns: List[ChatTurn]) -> None:
+        """Persist any number of chat turns with one multi-row statement and one commit."""
+        if not turns:
+            return
+
+        # One upsert row per session; a batch may hold several turns of a session
+        sessions = {}
+        message_rows = []
+        for turn in turns:
+            row = sessions.get(turn.session["session_id"])
+            if row is None:
+                sessions[turn.session["session_id"]] = {
+                    **turn.session,
+                    "message_count": len(turn.messages),
+                }
+            else:
+                row["message_count"] += len(turn.messages)
+                row["updated_at"] = max(row["updated_at"], turn.session["updated_at"])
+            message_rows.extend(turn.messages)
 
+        session_stmt = pg_insert(Session).values(list(sessions.values()))
+        session_upsert = session_stmt.on_conflict_do_update(
+            index_elements=[Session.session_id],
+            set_={
+                "message_count": Session.message_count + session_stmt.excluded.message_count,
+                "updated_at": session_stmt.excluded.updated_at,
+            },
+        ).cte("session_upsert")
 
-    async def create_session(self, session_id: UUID, session_data:dict):
-        session = Session(
-            session_id=session_id,
-            user_id=session_data.get("user_id", None),
-            platform=session_data.get("platform", None),
+        await self.db.execute(
+            insert(Message).values(message_rows).add_cte(session_upsert)
         )
+        with observe_stage("db_commit"):
+            await self.db.commit()
 
-        self.db.add(session)
-        await self.db.commit()
-        await self.db.refresh(session)
-        return session
+        await replica_lag_guard.mark_written(*(
+            key
+            for row in sessions.values()
+            for key in read_affinity_keys(row["session_id"], row["user_id"])
+        ))
+        for row in sessions.values():
+            session_count_cache.delete((row["platform"], row["user_id"]))
+            session_count_cache.delete((row["platform"], None))
 
 
-    async def create_message_bulk(
-        self,
-        session_id: UUID,
-        message_data: List,
-    ):
-        messages = []
-
-        for msg in message_data:
-            messages.append(
-                Message(
-                    id=uuid4(),
-                    session_id=session_id,
-                    message=msg.message,
-                    sender=msg.sender,
-                    resource=msg.resource,
-                )
-            )
+    def _forget_sessions(self, platform: PLATFORMS, user_ids) -> None:
+        for user_id in set(user_ids):
+            session_count_cache.delete((platform, user_id))
+        session_count_cache.delete((platform, None))
 
-        self.db.add_all(messages)
-        await self.db.commit()
-        return messages
 
+    async def delete(self, session_id: UUID, max_messages: Optional[int] = None):
+        """
+        Delete a session, and its messages through the FK cascade, with one
+        DELETE ... RETURNING. Sessions with more than `max_messages` messages
+        are left for batched deletion and None is returned for them.
+        """
+        stmt = delete(Session).where(Session.session_id == session_id)
+        if max_messages is not None:
+            stmt = stmt.where(Session.message_count <= max_messages)
 
-    async def delete(self, session_id: UUID):
         result = await self.db.execute(
-            select(Session).where(Session.session_id == session_id)
+            stmt.returning(Session.session_id, Session.user_id, Session.platform, Session.message_count)
         )
-        session = result.scalar_one_or_none()
+        deleted = result.one_or_none()
 
-        if not session:
-            raise HTTPException(status_code=404, detail="Session not found")
+        if deleted is None:
+            exists = await self.db.scalar(
+                select(Session.session_id).where(Session.session_id == session_id)
+            )
+            if exists is None:
+                raise HTTPException(status_code=404, detail="Session not found")
+            return None
 
-        await self.db.delete(session)
         await self.db.commit()
+        await replica_lag_guard.mark_written(*read_affinity_keys(session_id, deleted.user_id))
+        self._forget_sessions(deleted.platform, [deleted.user_id])
+
+        return deleted
+
+
+    async def delete_many(self, platform: PLATFORMS, user_id: Optional[str] = None, limit: int = 100):
+        """
+        Delete up to `limit` sessions of a platform (and user) with one
+        DELETE ... RETURNING; call again until fewer than `limit` come back.
+        """
+        ids = select(Session.session_id).where(Session.platform == platform)
+        if user_id is not None:
+            ids = ids.where(Session.user_id == user_id)
+
+        result = await self.db.execute(
+            delete(Session)
+            .where(Session.session_id.in_(ids.limit(limit)))
+            .returning(Session.session_id, Session.user_id)
+        )
+        deleted = result.all()
+        await self.db.commit()
+
+        await replica_lag_guard.mark_written(*(
+            key
+            for row in deleted
+            for key in read_affinity_keys(row.session_id, row.user_id)
+        ))
+        self._forget_sessions(platform, [row.user_id for row in deleted])
 
-        return session
+        return deleted
@@ -0,0 +1,100 @@
+"""
+Batched deletion of chat sessions for Celery workers.
+
+A session's messages are deleted a chunk at a time, each chunk in its own
+short transaction, before the session row itself. Deleting a huge session
+therefore never holds row locks on chat_messages for long, unlike a single
+cascading DELETE.
+"""
+from collections import defaultdict
+from typing import List, Optional
+
+from sqlalchemy import delete, func, select, text, update
+
+from app.core.config import get_settings
+from app.core.logging import setup_logging
+from app.db.session import get_sync_engine
+from chat.db.models import Session
+from chat.db.writer import mark_sessions_deleted
+from chat.utils.choices import PLATFORMS
+from trading_agent.utils.adk_sessions import delete_adk_sessions, get_adk_engine
+
+logger = setup_logging()
+settings = get_settings()
+
+# Sessions picked up per pass
+SESSION_BATCH = 100
+
+_DELETE_MESSAGE_CHUNK = text(
+    """
+    DELETE FROM chat_messages
+    WHERE (id, created_at) IN (
+        SELECT id, created_at FROM chat_messages
+        WHERE session_id = :session_id
+        LIMIT :chunk
+    )
+    """
+)
+
+
+def _delete_messages(session_id, chunk: int) -> int:
+    engine = get_sync_engine()
+    total = 0
+    while True:
+        with engine.begin() as conn:
+            deleted = conn.execute(_DELETE_MESSAGE_CHUNK, {"session_id": session_id, "chunk": chunk}).rowcount
+            if deleted:
+                conn.execute(
+                    update(Session)
+                    .where(Session.session_id == session_id)
+                    .values(message_count=func.greatest(Session.message_count - deleted, 0))
+                )
+        total += deleted
+        if deleted < chunk:
+            return total
+
+
+def purge_sessions(
+    session_ids: Optional[List[str]] = None,
+    platform: Optional[PLATFORMS] = None,
+    user_id: Optional[str] = None,
+    chunk: Optional[int] = None,
+) -> dict:
+    """
+    Delete the given sessions, or every session of a platform (and user),
+    with their messages and ADK sessions
+    """
+    chunk = chunk or settings.chat_delete_batch_size
+    stmt = select(Session.session_id, Session.platform).order_by(Session.session_id).limit(SESSION_BATCH)
+    if session_ids is not None:
+        stmt = stmt.where(Session.session_id.in_(session_ids))
+    if platform is not None:
+        stmt = stmt.where(Session.platform == platform)
+    if user_id is not None:
+        stmt = stmt.where(Session.user_id == user_id)
+
+    sessions = 0
+    messages = 0
+    adk_sessions = 0
+    while True:
+        with get_sync_engine().connect() as conn:
+            rows = conn.execute(stmt).all()
+        if not rows:
+            break
+
+        # Queued write-behind turns must not recreate the sessions
+        mark_sessions_deleted(session_id for session_id, _ in rows)
+
+        by_platform = defaultdict(list)
+        for session_id, session_platform in rows:
+            messages += _delete_messages(session_id, chunk)
+            with get_sync_engine().begin() as conn:
+                conn.execute(delete(Session).where(Session.session_id == session_id))
+            by_platform[session_platform].append(str(session_id))
+
+        for session_platform, ids in by_platform.items():
+            adk_sessions += delete_adk_sessions(get_adk_engine(), session_platform.value, ids)
+        sessions += len(rows)
+
+    logger.info(f"Purged {sessions} session(s), {messages} message(s) and {adk_sessions} ADK session(s)")
+    return {"sessions": sessions, "messages": messages, "adk_sessions": adk_sessions}
@@ -1,8 +1,9 @@
+from datetime import datetime, timezone
 from uuid import UUID
 import uuid
 from typing import Optional, Dict
 
-from sqlalchemy import Enum, Index, ForeignKey
+from sqlalchemy import DateTime, Enum, Index, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID, JSONB
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -29,12 +30,23 @@ class Session(BaseModel):
         nullable=False,
     )
 
+    message_count: Mapped[int] = mapped_column(
+        default=0,
+        server_default="0",
+        nullable=False,
+    )
+
     __table_args__ = (
-        Index("idx_session_user_platform", "user_id", "platform"),
+        Index("idx_session_platform_created", "platform", "created_at", "session_id"),
+        Index("idx_session_user_platform_created", "user_id", "platform", "created_at", "session_id"),
     )
 
 
 class Message(BaseModel):
+    """
+    Range-partitioned by month on `created_at` (chat_messages_pYYYYMM);
+    see chat.db.partitions for their maintenance and archival.
+    """
     __tablename__ = "chat_messages"
 
     id: Mapped[UUID] = mapped_column(
@@ -43,10 +55,17 @@ class Message(BaseModel):
         default=uuid.uuid4,
     )
 
+    # Part of the primary key, as the partition key must be
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        primary_key=True,
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
     session_id: Mapped[UUID] = mapped_column(
         PG_UUID(as_uuid=True),
         ForeignKey("chat_sessions.session_id", ondelete="CASCADE"),
-        index=True,
         nullable=False,
     )
 
@@ -61,3 +80,8 @@ class Message(BaseModel):
         JSONB,
         nullable=True
     )
+
+    __table_args__ = (
+        Index("idx_message_session_created", "session_id", "created_at", "id"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
@@ -0,0 +1,435 @@
+"""
+Maintenance of the monthly partitions of chat_messages.
+
+- New months are created ahead of time, so inserts never land in the
+  default partition. Attaching and detaching lock chat_messages against
+  inserts, so those steps give up after CHAT_PARTITION_LOCK_TIMEOUT_MS
+  and are retried on the next run (months are created well ahead).
+- With a retention policy, months older than CHAT_MESSAGE_RETENTION_MONTHS
+  are archived to zstd-compressed Parquet files in CHAT_ARCHIVE_DIR, then
+  detached and dropped.
+- Archives can be restored into the table again.
+
+Runs nightly on Celery beat (tasks.maintain_chat_partitions), or by hand:
+    python -m chat.db.partitions maintain
+    python -m chat.db.partitions list
+    python -m chat.db.partitions archive chat_messages_p202401
+    python -m chat.db.partitions restore archives/chat_messages/chat_messages_p202401.parquet
+"""
+import argparse
+import json
+import os
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import Column, DateTime, MetaData, Table, Text, insert, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID as PG_UUID
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError
+
+from app.core.config import get_settings
+from app.core.logging import setup_logging
+from app.db.session import get_sync_engine
+
+logger = setup_logging()
+settings = get_settings()
+
+PARENT_TABLE = "chat_messages"
+DEFAULT_PARTITION = "chat_messages_default"
+_PARTITION_NAME = re.compile(r"^chat_messages_p(\d{4})(\d{2})$")
+
+# Restored partitions are left alone by the retention policy
+RESTORED_COMMENT = "restored from archive"
+
+# Only one maintenance run at a time across workers
+MAINTENANCE_LOCK_ID = 0x63686174  # "chat"
+
+COLUMNS = ("id", "session_id", "message", "sender", "resource", "created_at", "updated_at")
+
+ARCHIVE_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("session_id", pa.string()),
+    ("message", pa.string()),
+    ("sender", pa.string()),
+    ("resource", pa.string()),  # JSON text
+    ("created_at", pa.timestamp("us", tz="UTC")),
+    ("updated_at", pa.timestamp("us", tz="UTC")),
+])
+
+BATCH_ROWS = 10_000
+
+
+class ArchiveResult(NamedTuple):
+    partition: str
+    path: Path
+    rows: int
+
+
+class RestoreResult(NamedTuple):
+    partition: str
+    restored: int
+    skipped: int
+
+
+def month_start(value: datetime) -> datetime:
+    value = value.astimezone(timezone.utc) if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{PARENT_TABLE}_p{month:%Y%m}"
+
+
+def partition_month(name: str) -> Optional[datetime]:
+    """Month held by a monthly partition, or None for other tables"""
+    match = _PARTITION_NAME.match(name)
+    if not match:
+        return None
+    return datetime(int(match[1]), int(match[2]), 1, tzinfo=timezone.utc)
+
+
+def list_partitions(conn: Connection) -> List[str]:
+    """Monthly partitions attached to chat_messages, oldest first"""
+    rows = conn.execute(
+        text(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = :parent
+            """
+        ),
+        {"parent": PARENT_TABLE},
+    ).scalars()
+    return sorted(name for name in rows if partition_month(name) is not None)
+
+
+def _set_lock_timeout(conn: Connection) -> None:
+    """Bound lock waits of the current transaction, so message inserts never queue behind it for long"""
+    conn.execute(text(f"SET LOCAL lock_timeout = {int(settings.chat_partition_lock_timeout_ms)}"))
+
+
+def _is_restored(conn: Connection, name: str) -> bool:
+    comment = conn.execute(
+        text("SELECT obj_description(CAST(:name AS regclass), 'pg_class')"),
+        {"name": name},
+    ).scalar()
+    return comment == RESTORED_COMMENT
+
+
+def create_partition(conn: Connection, month: datetime) -> str:
+    """
+    Create the partition of a month. Rows of that month already caught by
+    the default partition are moved into it, as Postgres refuses to attach
+    a range the default partition holds rows of.
+
+    ATTACH blocks inserts into chat_messages while it holds its lock, so
+    lock waits are bounded by CHAT_PARTITION_LOCK_TIMEOUT_MS, and a CHECK
+    constraint matching the bounds spares Postgres the scan of the new
+    partition. The default partition is still scanned; it is normally
+    empty as months are created ahead.
+    """
+    name = partition_name(month)
+    bounds = {"start": month, "end": add_months(month, 1)}
+    start, end = bounds["start"].isoformat(), bounds["end"].isoformat()
+
+    _set_lock_timeout(conn)
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    conn.execute(
+        text(
+            f"ALTER TABLE {name} ADD CONSTRAINT {name}_bounds "
+            f"CHECK (created_at >= '{start}' AND created_at < '{end}')"
+        )
+    )
+    moved = conn.execute(
+        text(
+            f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION}
+                WHERE created_at >= :start AND created_at < :end
+                RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+            """
+        ),
+        bounds,
+    ).rowcount
+    conn.execute(
+        text(
+            f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{start}') TO ('{end}')"
+        )
+    )
+    conn.execute(text(f"ALTER TABLE {name} DROP CONSTRAINT {name}_bounds"))
+
+    logger.info(f"Created partition {name}" + (f" ({moved} row(s) moved from the default partition)" if moved else ""))
+    return name
+
+
+def ensure_partitions(conn: Connection, months_ahead: int, now: Optional[datetime] = None) -> List[str]:
+    """Create the partitions of the current month and the next `months_ahead` ones"""
+    existing = set(list_partitions(conn))
+    current = month_start(now or datetime.now(timezone.utc))
+
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if partition_name(month) in existing:
+            continue
+        try:
+            created.append(create_partition(conn, month))
+            conn.commit()
+        except OperationalError as e:
+            # Most likely the lock timeout; the month is retried on the next run
+            conn.rollback()
+            logger.warning(f"Could not create partition {partition_name(month)}: {e}")
+    conn.commit()
+    return created
+
+
+def _archive_path(archive_dir: Path, name: str) -> Path:
+    return archive_dir / f"{name}.parquet"
+
+
+def archive_partition(conn: Connection, name: str, archive_dir: Path) -> ArchiveResult:
+    """
+    Write a partition to a Parquet file, then detach and drop it.
+    The partition is only dropped if it still holds exactly the rows written.
+    """
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    path = _archive_path(archive_dir, name)
+    partial = path.with_suffix(".parquet.partial")
+
+    rows = 0
+    metadata = {b"partition": name.encode(), b"table": PARENT_TABLE.encode()}
+    with pq.ParquetWriter(partial, ARCHIVE_SCHEMA.with_metadata(metadata), compression="zstd") as writer:
+        result = conn.execution_options(stream_results=True, yield_per=BATCH_ROWS).execute(
+            text(
+                f"""
+                SELECT CAST(id AS text), CAST(session_id AS text), message,
+                       CAST(sender AS text), CAST(resource AS text), created_at, updated_at
+                FROM {name}
+                ORDER BY created_at, id
+                """
+            )
+        )
+        for batch in result.partitions():
+            writer.write_table(pa.Table.from_pylist(
+                [dict(zip(COLUMNS, row)) for row in batch],
+                schema=ARCHIVE_SCHEMA,
+            ))
+            rows += len(batch)
+        result.close()
+    conn.rollback()
+
+    with open(partial, "rb") as archive:
+        os.fsync(archive.fileno())
+
+    try:
+        _set_lock_timeout(conn)
+        conn.execute(text(f"LOCK TABLE {name} IN ACCESS EXCLUSIVE MODE"))
+        current = conn.execute(text(f"SELECT count(*) FROM {name}")).scalar()
+        if current != rows:
+            raise RuntimeError(f"{name} changed while archiving ({rows} row(s) written, {current} now)")
+
+        # Keep the session counters in line with the messages left
+        conn.execute(
+            text(
+                f"""
+                UPDATE chat_sessions AS s
+                SET message_count = GREATEST(s.message_count - m.total, 0)
+                FROM (SELECT session_id, count(*) AS total FROM {name} GROUP BY session_id) AS m
+                WHERE s.session_id = m.session_id
+                """
+            )
+        )
+        conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+        conn.execute(text(f"DROP TABLE {name}"))
+    except Exception:
+        conn.rollback()
+        partial.unlink(missing_ok=True)
+        raise
+
+    # The archive is in place before the rows are gone for good
+    os.replace(partial, path)
+    conn.commit()
+
+    logger.info(f"Archived {rows} row(s) of {name} to {path}")
+    return ArchiveResult(name, path, rows)
+
+
+def apply_retention(
+    conn: Connection,
+    retention_months: int,
+    archive_dir: Path,
+    now: Optional[datetime] = None,
+) -> List[ArchiveResult]:
+    """Archive every partition of a month older than the retention window"""
+    cutoff = add_months(month_start(now or datetime.now(timezone.utc)), -retention_months)
+    archived = []
+    for name in list_partitions(conn):
+        if partition_month(name) >= cutoff:
+            break
+        if _is_restored(conn, name):
+            continue
+        try:
+            archived.append(archive_partition(conn, name, archive_dir))
+        except OperationalError as e:
+            # Most likely the lock timeout; the partition is retried on the next run
+            conn.rollback()
+            logger.warning(f"Could not archive partition {name}: {e}")
+        except Exception as e:
+            # One bad month (e.g. rows changing while archiving) doesn't hold back the others
+            conn.rollback()
+            logger.error(f"Archiving partition {name} failed: {e}")
+    conn.rollback()
+    return archived
+
+
+def restore_archive(conn: Connection, path: Path) -> RestoreResult:
+    """
+    Load an archive back into chat_messages, recreating its partition if
+    needed. Messages of sessions deleted since, and messages already
+    present, are skipped; session counters are recomputed.
+    """
+    archive = pq.ParquetFile(path)
+    name = (archive.schema_arrow.metadata or {}).get(b"partition", b"").decode() or path.stem
+    month = partition_month(name)
+    if month is None:
+        raise ValueError(f"{path} is not a chat_messages partition archive")
+
+    staging = Table(
+        "chat_messages_restore",
+        MetaData(),
+        Column("id", PG_UUID(as_uuid=False)),
+        Column("session_id", PG_UUID(as_uuid=False)),
+        Column("message", Text),
+        Column("sender", Text),
+        Column("resource", JSONB(none_as_null=True)),
+        Column("created_at", DateTime(timezone=True)),
+        Column("updated_at", DateTime(timezone=True)),
+        prefixes=["TEMPORARY"],
+        postgresql_on_commit="DROP",
+    )
+
+    try:
+        if name not in list_partitions(conn):
+            create_partition(conn, month)
+        conn.execute(text(f"COMMENT ON TABLE {name} IS '{RESTORED_COMMENT}'"))
+
+        staging.create(conn)
+        total = 0
+        for batch in archive.iter_batches(batch_size=BATCH_ROWS):
+            rows = batch.to_pylist()
+            for row in rows:
+                # Stored as JSON text; the JSONB type expects the decoded value
+                row["resource"] = json.loads(row["resource"]) if row["resource"] is not None else None
+            conn.execute(insert(staging), rows)
+            total += len(rows)
+
+        restored = conn.execute(
+            text(
+                f"""
+                INSERT INTO {PARENT_TABLE} ({", ".join(COLUMNS)})
+                SELECT r.id, r.session_id, r.message, CAST(r.sender AS sender_options),
+                       r.resource, r.created_at, r.updated_at
+                FROM chat_messages_restore AS r
+                JOIN chat_sessions AS s ON s.session_id = r.session_id
+                ON CONFLICT DO NOTHING
+                """
+            )
+        ).rowcount
+
+        conn.execute(
+            text(
+                f"""
+                UPDATE chat_sessions AS s
+                SET message_count = (SELECT count(*) FROM {PARENT_TABLE} AS m WHERE m.session_id = s.session_id)
+                WHERE s.session_id IN (SELECT DISTINCT session_id FROM chat_messages_restore)
+                """
+            )
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    logger.info(f"Restored {restored} row(s) of {name} from {path} ({total - restored} skipped)")
+    return RestoreResult(name, restored, total - restored)
+
+
+def run_maintenance(now: Optional[datetime] = None) -> dict:
+    """Create upcoming partitions and apply the retention policy"""
+    with get_sync_engine().connect() as conn:
+        if not conn.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": MAINTENANCE_LOCK_ID}).scalar():
+            logger.info("Chat partition maintenance already running elsewhere")
+            return {"skipped": True}
+        conn.commit()
+
+        try:
+            created = ensure_partitions(conn, settings.chat_partition_months_ahead, now)
+            archived = []
+            if settings.chat_message_retention_months:
+                archived = apply_retention(
+                    conn,
+                    settings.chat_message_retention_months,
+                    Path(settings.chat_archive_dir),
+                    now,
+                )
+        finally:
+            conn.rollback()
+            conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MAINTENANCE_LOCK_ID})
+            conn.commit()
+
+    return {
+        "created": created,
+        "archived": [{"partition": a.partition, "path": str(a.path), "rows": a.rows} for a in archived],
+    }
+
+
+def _print_listing() -> None:
+    with get_sync_engine().connect() as conn:
+        for name in list_partitions(conn):
+            rows = conn.execute(text(f"SELECT count(*) FROM {name}")).scalar()
+            marker = " (restored)" if _is_restored(conn, name) else ""
+            print(f"{name:<28} {rows:>10} row(s){marker}")
+        default_rows = conn.execute(text(f"SELECT count(*) FROM {DEFAULT_PARTITION}")).scalar()
+        print(f"{DEFAULT_PARTITION:<28} {default_rows:>10} row(s)")
+
+    archive_dir = Path(settings.chat_archive_dir)
+    for path in sorted(archive_dir.glob("*.parquet")):
+        rows = pq.ParquetFile(path).metadata.num_rows
+        print(f"{path} {rows} row(s), {path.stat().st_size / 1024 / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    cli = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = cli.add_subparsers(dest="command", required=True)
+    commands.add_parser("maintain", help="Create upcoming partitions and apply retention")
+    commands.add_parser("list", help="List partitions and archives")
+    archive_cmd = commands.add_parser("archive", help="Archive and drop one partition")
+    archive_cmd.add_argument("partition")
+    restore_cmd = commands.add_parser("restore", help="Restore a Parquet archive")
+    restore_cmd.add_argument("path", type=Path)
+    args = cli.parse_args()
+
+    if args.command == "maintain":
+        print(run_maintenance())
+    elif args.command == "list":
+        _print_listing()
+    elif args.command == "archive":
+        with get_sync_engine().connect() as conn:
+            print(archive_partition(conn, args.partition, Path(settings.chat_archive_dir)))
+    elif args.command == "restore":
+        with get_sync_engine().connect() as conn:
+            print(restore_archive(conn, args.path))
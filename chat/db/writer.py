@@ -0,0 +1,407 @@
+import asyncio
+import json
+import os
+import socket
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from uuid import UUID
+
+import redis
+from redis import asyncio as aioredis
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.core.logging import setup_logging
+from app.db.session import get_async_sessionmaker
+from chat.db.crud import ChatTurn, SessionCRUD
+from chat.utils.choices import PLATFORMS, SENDER_OPTIONS
+
+logger = setup_logging()
+settings = get_settings()
+
+STREAM_KEY = "chat:write-behind"
+STREAM_GROUP = "chat-writers"
+PENDING_KEY_PREFIX = "chat:write-behind:pending:"
+DELETED_KEY_PREFIX = "chat:write-behind:deleted:"
+DEAD_LETTER_KEY = "chat:write-behind:dead"
+
+# Redis entries left unacknowledged this long belong to a dead worker
+RECLAIM_IDLE_MS = 30_000
+PENDING_TTL_SECONDS = 300
+MAX_FLUSH_ATTEMPTS = 5
+# Turns of deleted sessions are discarded if they are flushed within this window
+DELETED_TTL_SECONDS = 86_400
+DEAD_LETTER_MAX_LEN = 10_000
+
+
+def _encode_turn(turn: ChatTurn) -> str:
+    def encode(value):
+        if isinstance(value, (UUID, datetime)):
+            return str(value) if isinstance(value, UUID) else value.isoformat()
+        if isinstance(value, (PLATFORMS, SENDER_OPTIONS)):
+            return value.value
+        raise TypeError(f"Unserializable value: {value!r}")
+
+    return json.dumps({"session": turn.session, "messages": turn.messages}, default=encode)
+
+
+def _decode_turn(payload: str) -> ChatTurn:
+    data = json.loads(payload)
+
+    session = data["session"]
+    session["session_id"] = UUID(session["session_id"])
+    session["platform"] = PLATFORMS(session["platform"])
+    session["created_at"] = datetime.fromisoformat(session["created_at"])
+    session["updated_at"] = datetime.fromisoformat(session["updated_at"])
+
+    messages = data["messages"]
+    for message in messages:
+        message["id"] = UUID(message["id"])
+        message["session_id"] = UUID(message["session_id"])
+        message["sender"] = SENDER_OPTIONS(message["sender"])
+        message["created_at"] = datetime.fromisoformat(message["created_at"])
+        message["updated_at"] = datetime.fromisoformat(message["updated_at"])
+
+    return ChatTurn(session, messages)
+
+
+def mark_sessions_deleted(session_ids: Iterable) -> None:
+    """
+    Blocking variant of `MessageWriteBehind.forget_sessions`, for Celery
+    workers deleting sessions outside the API process.
+    """
+    if not (settings.message_write_behind_enabled and settings.message_write_behind_durable):
+        return
+
+    client = redis.Redis.from_url(settings.redis_url)
+    try:
+        with client.pipeline(transaction=False) as pipe:
+            for session_id in session_ids:
+                pipe.set(DELETED_KEY_PREFIX + str(session_id), 1, ex=DELETED_TTL_SECONDS)
+            pipe.execute()
+    finally:
+        client.close()
+
+
+class MessageWriteBehind:
+    """
+    Opt-in write-behind persistence of chat turns.
+
+    Turns are queued and flushed in batches (every `flush_interval_ms` or
+    `batch_size` turns) with one multi-row insert. The queue is in-process by
+    default; with `durable=True` it is a Redis stream consumed through a
+    consumer group, so turns of a crashed worker are reclaimed by another,
+    and turns that still fail after MAX_FLUSH_ATTEMPTS deliveries are moved
+    to a dead-letter stream. Readers call `wait_for_session` before listing
+    messages to keep read-after-write consistency; deleting a session calls
+    `forget_sessions` so its queued turns don't bring it back.
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        flush_interval_ms: int,
+        batch_size: int,
+        durable: bool = False,
+        redis_url: Optional[str] = None,
+    ):
+        self.enabled = enabled
+        self.flush_interval = flush_interval_ms / 1000
+        self.batch_size = batch_size
+        self.durable = durable and redis_url is not None
+        self._redis_url = redis_url
+        self._redis = None
+        self._consumer = f"{socket.gethostname()}-{os.getpid()}"
+
+        self._queue: "asyncio.Queue[ChatTurn]" = asyncio.Queue()
+        self._pending: Dict[UUID, int] = defaultdict(int)
+        self._deleted = TTLCache(max_entries=10_000, ttl_seconds=DELETED_TTL_SECONDS)
+        self._stream_length = 0
+        self._flushed = asyncio.Condition()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        self.flushed_turns = 0
+        self.flushed_batches = 0
+        self.failed_batches = 0
+        self.discarded_turns = 0
+        self.dead_lettered_turns = 0
+
+    async def start(self) -> None:
+        if not self.enabled or self._task is not None:
+            return
+
+        if self.durable:
+            self._redis = aioredis.from_url(self._redis_url, decode_responses=True)
+            try:
+                await self._redis.xgroup_create(STREAM_KEY, STREAM_GROUP, id="0", mkstream=True)
+            except aioredis.ResponseError as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+
+        self._stopping = False
+        self._task = asyncio.create_task(self._run(), name="message-write-behind")
+        logger.info(
+            f"Message write-behind started ({'redis stream' if self.durable else 'in-process'})"
+        )
+
+    async def stop(self) -> None:
+        """Drain every queued turn and stop the flusher"""
+        if self._task is None:
+            return
+
+        self._stopping = True
+        await self._task
+        self._task = None
+
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+        logger.info("Message write-behind drained")
+
+    async def enqueue(self, turn: ChatTurn) -> None:
+        session_id = turn.session["session_id"]
+
+        if self.durable:
+            pipe = self._redis.pipeline(transaction=False)
+            pipe.incr(PENDING_KEY_PREFIX + str(session_id))
+            pipe.expire(PENDING_KEY_PREFIX + str(session_id), PENDING_TTL_SECONDS)
+            pipe.xadd(STREAM_KEY, {"turn": _encode_turn(turn)})
+            await pipe.execute()
+        else:
+            self._pending[session_id] += 1
+            await self._queue.put(turn)
+
+    async def forget_sessions(self, session_ids: Iterable) -> None:
+        """Discard queued turns of deleted sessions instead of writing them back"""
+        if not self.enabled:
+            return
+
+        session_ids = [UUID(str(session_id)) for session_id in session_ids]
+        for session_id in session_ids:
+            self._deleted.set(session_id, True)
+
+        if self.durable and self._redis is not None and session_ids:
+            pipe = self._redis.pipeline(transaction=False)
+            for session_id in session_ids:
+                pipe.set(DELETED_KEY_PREFIX + str(session_id), 1, ex=DELETED_TTL_SECONDS)
+            await pipe.execute()
+
+    async def wait_for_session(self, session_id: UUID, timeout: float = 5.0) -> None:
+        """Wait until queued turns of a session are written to the database"""
+        if not self.enabled:
+            return
+
+        async def flushed_locally():
+            async with self._flushed:
+                await self._flushed.wait_for(lambda: not self._pending.get(session_id))
+
+        async def flushed_everywhere():
+            key = PENDING_KEY_PREFIX + str(session_id)
+            while int(await self._redis.get(key) or 0) > 0:
+                await asyncio.sleep(self.flush_interval / 2)
+
+        try:
+            await asyncio.wait_for(
+                flushed_everywhere() if self.durable else flushed_locally(),
+                timeout,
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Timed out waiting for queued messages of session {session_id}")
+
+    # Flushing
+    # ======================================
+    async def _collect(self) -> List[tuple]:
+        """Next batch as (entry_id, turn) pairs; entry_id is None for in-process turns"""
+        if self.durable:
+            return await self._collect_stream()
+
+        batch = []
+        try:
+            turn = await asyncio.wait_for(self._queue.get(), self.flush_interval)
+            batch.append((None, turn))
+        except asyncio.TimeoutError:
+            return batch
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append((None, await asyncio.wait_for(self._queue.get(), timeout)))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _collect_stream(self) -> List[tuple]:
+        # Acknowledged entries are deleted, so the length is what is still queued
+        self._stream_length = await self._redis.xlen(STREAM_KEY)
+
+        # Entries of crashed consumers first, then new ones
+        reclaimed = await self._redis.xautoclaim(
+            STREAM_KEY,
+            STREAM_GROUP,
+            self._consumer,
+            min_idle_time=RECLAIM_IDLE_MS,
+            count=self.batch_size,
+        )
+        entries = list(reclaimed[1])
+
+        if len(entries) < self.batch_size:
+            response = await self._redis.xreadgroup(
+                STREAM_GROUP,
+                self._consumer,
+                {STREAM_KEY: ">"},
+                count=self.batch_size - len(entries),
+                block=int(self.flush_interval * 1000),
+            )
+            for _, stream_entries in response or []:
+                entries.extend(stream_entries)
+
+        return [(entry_id, _decode_turn(fields["turn"])) for entry_id, fields in entries]
+
+    async def _persist(self, turns: List[ChatTurn], attempts: int = MAX_FLUSH_ATTEMPTS) -> Optional[Exception]:
+        """Write the turns; returns the last error when every attempt failed"""
+        error = None
+        for attempt in range(1, attempts + 1):
+            try:
+                async with get_async_sessionmaker()() as db:
+                    await SessionCRUD(db).persist_turns(turns)
+                return None
+            except Exception as e:
+                error = e
+                logger.error(f"Write-behind flush of {len(turns)} turn(s) failed (attempt {attempt}): {e}")
+                if attempt < attempts:
+                    await asyncio.sleep(min(2 ** attempt * 0.1, 5))
+        return error
+
+    async def _split_deleted(self, batch: List[tuple]) -> tuple:
+        """Split a batch into turns to write and turns of deleted sessions"""
+        session_ids = list({turn.session["session_id"] for _, turn in batch})
+        deleted = {session_id for session_id in session_ids if self._deleted.get(session_id)}
+
+        if self.durable:
+            pipe = self._redis.pipeline(transaction=False)
+            for session_id in session_ids:
+                pipe.exists(DELETED_KEY_PREFIX + str(session_id))
+            for session_id, exists in zip(session_ids, await pipe.execute()):
+                if exists:
+                    deleted.add(session_id)
+
+        live = [entry for entry in batch if entry[1].session["session_id"] not in deleted]
+        return live, [entry for entry in batch if entry[1].session["session_id"] in deleted]
+
+    async def _isolate_failures(self, batch: List[tuple]) -> List[tuple]:
+        """
+        Write the turns of a failed durable batch one by one, so one bad turn
+        doesn't hold back the rest. Turns that fail again stay in the stream
+        for a later delivery, up to MAX_FLUSH_ATTEMPTS deliveries, and are then
+        moved to the dead-letter stream. Returns the entries that are settled.
+        """
+        settled = []
+        dead = []
+        for entry_id, turn in batch:
+            error = await self._persist([turn], attempts=1)
+            if error is None:
+                self.flushed_turns += 1
+                settled.append((entry_id, turn))
+                continue
+
+            pending = await self._redis.xpending_range(
+                STREAM_KEY, STREAM_GROUP, min=entry_id, max=entry_id, count=1
+            )
+            if pending and pending[0]["times_delivered"] >= MAX_FLUSH_ATTEMPTS:
+                dead.append((entry_id, turn, error))
+                settled.append((entry_id, turn))
+
+        if dead:
+            pipe = self._redis.pipeline(transaction=False)
+            for entry_id, turn, error in dead:
+                pipe.xadd(
+                    DEAD_LETTER_KEY,
+                    {"turn": _encode_turn(turn), "entry_id": entry_id, "error": str(error)[:1000]},
+                    maxlen=DEAD_LETTER_MAX_LEN,
+                    approximate=True,
+                )
+            await pipe.execute()
+            self.dead_lettered_turns += len(dead)
+            logger.error(f"Moved {len(dead)} chat turn(s) to {DEAD_LETTER_KEY} after {MAX_FLUSH_ATTEMPTS} deliveries")
+        return settled
+
+    async def _flush(self, batch: List[tuple]) -> None:
+        live, settled = await self._split_deleted(batch)
+        self.discarded_turns += len(settled)
+
+        if live:
+            if await self._persist([turn for _, turn in live]) is None:
+                self.flushed_turns += len(live)
+                self.flushed_batches += 1
+                settled.extend(live)
+            else:
+                self.failed_batches += 1
+                if self.durable:
+                    # Unsettled entries are reclaimed by a later flush
+                    settled.extend(await self._isolate_failures(live))
+                else:
+                    logger.error(f"Dropped {len(live)} chat turn(s) after {MAX_FLUSH_ATTEMPTS} attempts")
+                    settled.extend(live)
+
+        if not settled:
+            return
+        turns = [turn for _, turn in settled]
+
+        if self.durable:
+            entry_ids = [entry_id for entry_id, _ in settled]
+            pipe = self._redis.pipeline(transaction=False)
+            pipe.xack(STREAM_KEY, STREAM_GROUP, *entry_ids)
+            pipe.xdel(STREAM_KEY, *entry_ids)
+            for turn in turns:
+                pipe.decr(PENDING_KEY_PREFIX + str(turn.session["session_id"]))
+            await pipe.execute()
+            return
+
+        async with self._flushed:
+            for turn in turns:
+                session_id = turn.session["session_id"]
+                if session_id in self._pending:
+                    self._pending[session_id] -= 1
+                    if self._pending[session_id] <= 0:
+                        del self._pending[session_id]
+            self._flushed.notify_all()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                batch = await self._collect()
+                if batch:
+                    await self._flush(batch)
+                elif self._stopping and (self.durable or self._queue.empty()):
+                    # Durable turns stay in the stream for the next flusher
+                    return
+            except Exception as e:
+                logger.error(f"Write-behind flusher error: {e}")
+                await asyncio.sleep(self.flush_interval)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "durable": self.durable,
+            "queued_turns": self._stream_length if self.durable else sum(self._pending.values()),
+            "flushed_turns": self.flushed_turns,
+            "flushed_batches": self.flushed_batches,
+            "failed_batches": self.failed_batches,
+            "discarded_turns": self.discarded_turns,
+            "dead_lettered_turns": self.dead_lettered_turns,
+        }
+
+
+message_writer = MessageWriteBehind(
+    enabled=settings.message_write_behind_enabled,
+    flush_interval_ms=settings.message_write_behind_flush_ms,
+    batch_size=settings.message_write_behind_batch_size,
+    durable=settings.message_write_behind_durable,
+    redis_url=settings.redis_url,
+)
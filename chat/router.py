@@ -2,17 +2,18 @@ import json
 from uuid import UUID
 from typing import Optional
 
-from fastapi import APIRouter, Depends, Query, UploadFile, File, Form
+from fastapi import APIRouter, Depends, Header, Query, Response, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_async_session
+from app.db.session import get_async_read_session, get_async_session
 from app.base.schema import DataResponse, ListResponse, BaseResponse
 
 from chat.services import SessionService
 from chat.utils.choices import PLATFORMS
 from trading_agent.services import TradingAgentClient
 
-from trading_agent.utils.file_parser import file_parser
+from trading_agent.utils.file_parser import load_trade_data
 
 router = APIRouter()
 
@@ -23,30 +24,43 @@ async def get_session_service(
     return SessionService(db)
 
 
+# Read-only endpoints may be served by the read replica
+async def get_read_session_service(
+    db: AsyncSession = Depends(get_async_read_session),
+) -> SessionService:
+    return SessionService(db)
+
+
 @router.get("/sessions", response_model=ListResponse)
 async def get_session_list(
     platform: PLATFORMS = Query(..., description="Platform name"),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     user_id: Optional[str] = Query(None),
-    service: SessionService = Depends(get_session_service),
+    cursor: Optional[str] = Query(None, description="Cursor from meta.next_cursor; takes precedence over page"),
+    include_total: bool = Query(False, description="Include the (briefly cached) total session count"),
+    service: SessionService = Depends(get_read_session_service),
 ):
     """
     Get all sessions under a platform
     """
-    session_list, total = await service.session_list(
+    result = await service.session_list(
         page=page,
         page_size=page_size,
         platform=platform,
         user_id=user_id,
+        cursor=cursor,
+        include_total=include_total,
     )
 
     return ListResponse(
         message="Session list retrieved successfully!",
-        data=session_list,
+        data=result.items,
         page=page,
         page_size=page_size,
-        total=total,
+        total=result.total,
+        next_cursor=result.next_cursor,
+        has_more=result.has_more,
     )
 
 
@@ -55,35 +69,69 @@ async def get_session_messages(
     session_id: UUID,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
-    service: SessionService = Depends(get_session_service),
+    cursor: Optional[str] = Query(None, description="Cursor from meta.next_cursor; takes precedence over page"),
+    service: SessionService = Depends(get_read_session_service),
 ):
     """
     Get session messages with a session_id
     """
-    message_list, total = await service.get_messages(
+    result = await service.get_messages(
         session_id=session_id,
         page=page,
-        page_size=page_size
+        page_size=page_size,
+        cursor=cursor,
     )
 
     return ListResponse(
         message="Session messages retrieved successfully!",
-        data=message_list,
+        data=result.items,
         page=page,
         page_size=page_size,
-        total=total,
+        total=result.total,
+        next_cursor=result.next_cursor,
+        has_more=result.has_more,
+    )
+
+
+@router.delete("/sessions", response_model=DataResponse)
+async def delete_sessions(
+    response: Response,
+    platform: PLATFORMS = Query(..., description="Platform name"),
+    user_id: Optional[str] = Query(None, description="Only this user's sessions; every session of the platform when omitted"),
+    service: SessionService = Depends(get_session_service),
+):
+    """
+    Delete all sessions of a user, or of a whole platform, with their messages
+    """
+    result = await service.delete_sessions(platform, user_id)
+    if result.task_id:
+        response.status_code = 202
+        return DataResponse(
+            message="Session deletion scheduled",
+            data={"task_id": result.task_id},
+        )
+
+    return DataResponse(
+        message="Sessions deleted successfully!",
+        data={"deleted": result.sessions},
     )
 
 
 @router.delete("/sessions/{session_id}", response_model=BaseResponse)
 async def delete_session(
     session_id: UUID,
+    response: Response,
     service: SessionService = Depends(get_session_service),
 ):
     """
     Delete session with a session_id
     """
-    await service.delete_session(session_id)
+    result = await service.delete_session(session_id)
+    if result.task_id:
+        # Large sessions are deleted in batches in the background
+        response.status_code = 202
+        return BaseResponse(message="Session deletion scheduled")
+
     return BaseResponse(message="Session deleted successfully!")
 
 
@@ -97,18 +145,12 @@ async def get_chat_service(
     file: Optional[UploadFile] = File(None),
 ) -> TradingAgentClient:
 
-    parsed_data = None
-
-    if trade_data:
-        try:
-            parsed_data = json.loads(trade_data)
-        except json.JSONDecodeError:
-            raise ValueError("Invalid JSON in trade_data")
-
-    elif file:
-        parsed_data = await file_parser(file)
+    trade_data_hash, trade_analytics = await load_trade_data(
+        trade_data=trade_data,
+        file=file,
+    )
 
-    return TradingAgentClient(db, platform, parsed_data)
+    return TradingAgentClient(db, platform, trade_analytics, trade_data_hash)
 
 
 
@@ -117,16 +159,61 @@ async def chat(
     user_query: str = Form(...),
     user_id: str = Form(...),
     session_id: Optional[str] = Form(None),
+    idempotency_key: Optional[str] = Header(
+        None,
+        max_length=255,
+        description="Retries with the same key get the first request's response",
+    ),
     service: TradingAgentClient = Depends(get_chat_service),
 ):
     # Attach to request state
     new_message = await service.chat(
         user_query,
         user_id=user_id,
-        session_id=session_id
+        session_id=session_id,
+        idempotency_key=idempotency_key,
     )
 
     return DataResponse(
         data=new_message,
         message="You have received a new message"
-    )
\ No newline at end of file
+    )
+
+
+def _sse_event(event: str, data: dict) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@router.post("/stream")
+async def chat_stream(
+    user_query: str = Form(...),
+    user_id: str = Form(...),
+    session_id: Optional[str] = Form(None),
+    service: TradingAgentClient = Depends(get_chat_service),
+):
+    """
+    Stream the agent's reply as server-sent events:
+    `session`, `partial`, `tool_call`, `tool_result`, `error` and the final `message`
+    """
+    events = service.chat_stream(
+        user_query,
+        user_id=user_id,
+        session_id=session_id
+    )
+    # Errors before the first event (e.g. a busy session) get a regular error response
+    first_event = await anext(events)
+
+    async def event_stream():
+        yield _sse_event(first_event["event"], first_event["data"])
+        async for event in events:
+            yield _sse_event(event["event"], event["data"])
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        },
+    )
@@ -1,8 +1,25 @@
+from typing import NamedTuple, Optional
 from uuid import uuid4, UUID
 
+from app.core.config import get_settings
+from app.core.logging import setup_logging
 from chat.db.crud import SessionCRUD
+from chat.db.writer import message_writer
 from chat.schema import SessionCreate
 from chat.utils.choices import PLATFORMS
+from trading_agent.runtime import agent_runtime
+
+logger = setup_logging()
+settings = get_settings()
+
+# Sessions deleted per statement by bulk deletes
+DELETE_BATCH_SESSIONS = 100
+
+
+class DeleteResult(NamedTuple):
+    """Outcome of a deletion; `task_id` is set when it was handed to Celery"""
+    sessions: int
+    task_id: Optional[str] = None
 
 
 class SessionService:
@@ -15,26 +32,85 @@ class SessionService:
         page_size: int,
         platform: PLATFORMS,
         user_id: str | None = None,
+        cursor: str | None = None,
+        include_total: bool = False,
     ):
         return await self.session_crud.get_list(
             page=page,
             page_size=page_size,
             platform=platform,
             user_id=user_id,
+            cursor=cursor,
+            include_total=include_total,
         )
 
     
-    async def delete_session(self, session_id):
-        return await self.session_crud.delete(session_id)
+    async def _delete_adk_sessions(self, platform: PLATFORMS, session_ids) -> None:
+        try:
+            await agent_runtime.delete_sessions(platform, [str(session_id) for session_id in session_ids])
+        except Exception as e:
+            # The chat history is gone either way; orphans only cost storage
+            logger.error(f"Failed to delete ADK sessions of {platform.value}: {e}")
+
+    async def delete_session(self, session_id: UUID) -> DeleteResult:
+        """
+        Delete a session, its messages and its ADK session. Sessions with at
+        least `chat_delete_celery_min_messages` messages are deleted in
+        batches on Celery instead.
+        """
+        # Write the turns already queued, then keep later ones from recreating it
+        await message_writer.wait_for_session(session_id)
+        await message_writer.forget_sessions([session_id])
+
+        threshold = settings.chat_delete_celery_min_messages
+        deleted = await self.session_crud.delete(
+            session_id,
+            max_messages=threshold - 1 if threshold else None,
+        )
+        if deleted is None:
+            from chat.tasks import delete_chat_sessions
+
+            task = delete_chat_sessions.delay(session_ids=[str(session_id)])
+            return DeleteResult(sessions=1, task_id=task.id)
+
+        await self._delete_adk_sessions(deleted.platform, [session_id])
+        return DeleteResult(sessions=1)
+
+    async def delete_sessions(self, platform: PLATFORMS, user_id: Optional[str] = None) -> DeleteResult:
+        """
+        Delete every session of a platform, or of one user on it. Runs on
+        Celery when batched deletion is enabled, else here in batches.
+        """
+        if settings.chat_delete_celery_min_messages:
+            from chat.tasks import delete_chat_sessions
+
+            task = delete_chat_sessions.delay(platform=platform.value, user_id=user_id)
+            return DeleteResult(sessions=0, task_id=task.id)
+
+        total = 0
+        while True:
+            deleted = await self.session_crud.delete_many(platform, user_id, limit=DELETE_BATCH_SESSIONS)
+            if deleted:
+                session_ids = [row.session_id for row in deleted]
+                await message_writer.forget_sessions(session_ids)
+                await self._delete_adk_sessions(platform, session_ids)
+            total += len(deleted)
+            if len(deleted) < DELETE_BATCH_SESSIONS:
+                return DeleteResult(sessions=total)
 
     async def get_messages(
         self,
         session_id: UUID,
         page: int = 1,
         page_size: int = 20,
+        cursor: str | None = None,
     ):
+        # Turns still queued for write-behind must be visible to their reader
+        await message_writer.wait_for_session(session_id)
+
         return await self.session_crud.get_session_messages(
             session_id=session_id,
             page=page,
             page_size=page_size,
+            cursor=cursor,
         )
@@ -0,0 +1,27 @@
+from app.core.celery_worker import celery_app
+from chat.db.deletion import purge_sessions
+from chat.db.partitions import run_maintenance
+from chat.utils.choices import PLATFORMS
+
+
+@celery_app.task(name="tasks.maintain_chat_partitions")
+def maintain_chat_partitions() -> dict:
+    """
+    Create the upcoming monthly partitions of chat_messages and archive
+    the ones past the retention window (scheduled nightly on Celery beat).
+    """
+    return run_maintenance()
+
+
+@celery_app.task(name="tasks.delete_chat_sessions")
+def delete_chat_sessions(
+    session_ids: list | None = None,
+    platform: str | None = None,
+    user_id: str | None = None,
+) -> dict:
+    """Delete chat sessions, their messages and ADK sessions in batches"""
+    return purge_sessions(
+        session_ids=session_ids,
+        platform=PLATFORMS(platform) if platform else None,
+        user_id=user_id,
+    )
@@ -10,11 +10,19 @@ if [ "$APP_ENV" = "prod" ]; then
   echo "Running database migrations..."
   alembic upgrade head
 
-  echo "Starting server with Uvicorn on port 8080"
+  # Workers share metrics through files; stale ones from a previous run are dropped
+  export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus}
+  rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+  mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
+  # Read by the app too, to split the DB connection budget across workers
+  export WEB_CONCURRENCY=${WEB_CONCURRENCY:-4}
+
+  echo "Starting server with Uvicorn on port 8080 ($WEB_CONCURRENCY workers)"
   exec uvicorn app.main:app \
     --host 0.0.0.0 \
     --port 8080 \
-    --workers 4 \
+    --workers "$WEB_CONCURRENCY" \
     --log-level info \
     --access-log \
     --no-use-colors \
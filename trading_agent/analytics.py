@@ -0,0 +1,427 @@
+import re
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from app.core.exceptions import ValidationError
+from app.core.logging import setup_logging
+
+logger = setup_logging()
+
+# Canonical trade columns and the (normalized) header aliases brokers use for them
+COLUMN_ALIASES: Dict[str, tuple] = {
+    "symbol": ("symbol", "instrument", "ticker", "pair", "market", "asset"),
+    "side": ("side", "type", "direction", "action"),
+    "volume": ("volume", "lots", "lot", "size", "quantity", "qty"),
+    "entryPrice": ("entryprice", "openprice", "priceopen", "entry"),
+    "exitPrice": ("exitprice", "closeprice", "priceclose", "exit"),
+    "pnl": ("pnl", "profit", "netprofit", "netpnl", "pl", "profitloss", "realizedpnl"),
+    "pnlPercent": ("pnlpercent", "pnlpct", "profitpercent", "returnpct", "return"),
+    "openTime": ("opentime", "opendate", "entrytime", "entrydate", "timeopen"),
+    "closeTime": ("closetime", "closedate", "exittime", "exitdate", "timeclose"),
+    "strategyTag": ("strategytag", "strategy", "tag", "setup"),
+}
+
+NUMERIC_COLUMNS = ("volume", "entryPrice", "exitPrice", "pnl", "pnlPercent")
+TIME_COLUMNS = ("openTime", "closeTime")
+CATEGORY_COLUMNS = ("symbol", "side", "strategyTag")
+
+MAX_QUERY_LIMIT = 100
+
+
+def _normalize_header(name: Any) -> str:
+    return re.sub(r"[^a-z0-9]", "", str(name).lower())
+
+
+def _to_builtin(value: Any) -> Any:
+    """Convert numpy/pandas scalars to JSON friendly python values"""
+    if value is None or value is pd.NaT or value is pd.NA:
+        return None
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return None if pd.isna(value) else pd.Timestamp(value).isoformat()
+    if isinstance(value, (np.integer,)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        if not np.isfinite(value):
+            return None
+        return round(float(value), 4)
+    if isinstance(value, np.bool_):
+        return bool(value)
+    return value
+
+
+def _longest_streak(mask: np.ndarray) -> int:
+    """Longest run of True values in a boolean array"""
+    if not mask.any():
+        return 0
+    padded = np.concatenate(([0], mask.astype(np.int8), [0]))
+    edges = np.flatnonzero(np.diff(padded))
+    return int((edges[1::2] - edges[::2]).max())
+
+
+def _to_datetime(values: pd.Series, column: str) -> pd.Series:
+    """
+    Parse trade times as UTC. ISO 8601 first, which copes with mixed precision
+    ("2024-01-02" next to "2024-01-01 10:00"); anything else is parsed value by
+    value, so one format never decides how the rest of the column is read.
+    """
+    parsed = pd.to_datetime(values, errors="coerce", utc=True, format="ISO8601")
+    retry = parsed.isna() & values.notna()
+    if retry.any():
+        parsed[retry] = pd.to_datetime(values[retry], errors="coerce", utc=True, format="mixed")
+
+    coerced = int((parsed.isna() & values.notna()).sum())
+    if coerced:
+        logger.warning(f"Could not parse {coerced} {column} value(s), they are left empty")
+    return parsed
+
+
+def match_trade_columns(columns) -> Dict[str, Any]:
+    """Map canonical trade columns to the matching raw column names of an export"""
+    lookup = {}
+    for column in columns:
+        lookup.setdefault(_normalize_header(column), column)
+
+    matched = {}
+    for canonical, aliases in COLUMN_ALIASES.items():
+        for alias in (_normalize_header(canonical),) + aliases:
+            if alias in lookup:
+                matched[canonical] = lookup[alias]
+                break
+    return matched
+
+
+def normalize_trade_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Project a broker export onto the canonical trade columns with explicit dtypes.
+    Unknown columns are dropped.
+    """
+    matched = match_trade_columns(df.columns)
+
+    if "pnl" not in matched:
+        raise ValidationError(
+            "Trade history must contain a profit/PnL column",
+            details={"columns": [str(column) for column in df.columns]},
+        )
+
+    frame = pd.DataFrame({canonical: df[raw] for canonical, raw in matched.items()})
+    for column in NUMERIC_COLUMNS:
+        if column in frame:
+            frame[column] = pd.to_numeric(frame[column], errors="coerce").astype("float64")
+    for column in TIME_COLUMNS:
+        if column in frame:
+            frame[column] = _to_datetime(frame[column], column)
+    for column in CATEGORY_COLUMNS:
+        if column in frame and not isinstance(frame[column].dtype, pd.CategoricalDtype):
+            frame[column] = frame[column].astype("string").str.strip().astype("category")
+
+    frame["pnl"] = frame["pnl"].fillna(0.0)
+    return frame
+
+
+def concat_trade_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate normalized chunks, keeping categorical columns categorical"""
+    if len(frames) == 1:
+        return frames[0]
+
+    for column in CATEGORY_COLUMNS:
+        if column in frames[0]:
+            categories = union_categoricals([frame[column] for frame in frames]).categories
+            for frame in frames:
+                frame[column] = frame[column].cat.set_categories(categories)
+
+    return pd.concat(frames, ignore_index=True)
+
+
+class TradeAnalytics:
+    """
+    Columnar trade-history analytics.
+    Every metric is computed once, vectorized, when the object is built;
+    the agent tools only read the precomputed results.
+    """
+
+    def __init__(self, df: pd.DataFrame, source: Optional[str] = None):
+        self.source = source
+        self.frame = self._sort(normalize_trade_columns(df))
+        self._compute()
+
+    @classmethod
+    def from_parsed(cls, parsed_data: Any) -> "TradeAnalytics":
+        """Build analytics from a DataFrame, a list of trades or a parsed upload dict"""
+        if isinstance(parsed_data, TradeAnalytics):
+            return parsed_data
+        if isinstance(parsed_data, pd.DataFrame):
+            return cls(parsed_data)
+
+        source = None
+        if isinstance(parsed_data, dict):
+            source = parsed_data.get("source")
+            parsed_data = parsed_data.get("data", parsed_data)
+
+        if isinstance(parsed_data, pd.DataFrame):
+            return cls(parsed_data, source=source)
+        if isinstance(parsed_data, list):
+            return cls(pd.DataFrame.from_records(parsed_data), source=source)
+        if isinstance(parsed_data, dict):
+            try:
+                return cls(pd.DataFrame(parsed_data), source=source)
+            except ValueError:
+                pass
+
+        raise ValidationError("Trade history must be a list of trades")
+
+    @staticmethod
+    def _sort(frame: pd.DataFrame) -> pd.DataFrame:
+        for column in ("closeTime", "openTime"):
+            if column in frame:
+                return frame.sort_values(column, kind="stable").reset_index(drop=True)
+        return frame.reset_index(drop=True)
+
+    # Computation
+    # ======================================
+    def _compute_curve(self) -> np.ndarray:
+        """Holding times, equity curve and drawdown; returns the running equity peak"""
+        frame = self.frame
+
+        if "openTime" in frame and "closeTime" in frame:
+            frame["holdingSeconds"] = (
+                frame["closeTime"] - frame["openTime"]
+            ).dt.total_seconds()
+
+        equity = np.cumsum(frame["pnl"].to_numpy(dtype="float64"))
+        peak = np.maximum.accumulate(np.concatenate(([0.0], equity)))[1:]
+        self.equity = equity
+        self.drawdown = equity - peak
+        return peak
+
+    def _compute(self) -> None:
+        frame = self.frame
+        pnl = frame["pnl"].to_numpy(dtype="float64")
+
+        wins = pnl > 0
+        losses = pnl < 0
+
+        # Equity curve and drawdown
+        peak = self._compute_curve()
+        equity = self.equity
+        drawdown = self.drawdown
+
+        trough = int(drawdown.argmin()) if len(drawdown) else None
+        peak_index = None
+        if trough is not None and drawdown[trough] < 0:
+            at_peak = np.flatnonzero(equity[: trough + 1] >= peak[trough])
+            peak_index = int(at_peak[-1]) if len(at_peak) else None
+
+        gross_profit = pnl[wins].sum()
+        gross_loss = pnl[losses].sum()
+        avg_win = pnl[wins].mean() if wins.any() else 0.0
+        avg_loss = pnl[losses].mean() if losses.any() else 0.0
+        # Undefined below two samples; left as None rather than NaN
+        std = pnl.std(ddof=1) if len(pnl) > 1 else None
+        downside = pnl[losses].std(ddof=1) if losses.sum() > 1 else None
+        max_drawdown = drawdown.min() if len(drawdown) else 0.0
+
+        summary = {
+            "source": self.source,
+            "total_trades": len(pnl),
+            "winning_trades": int(wins.sum()),
+            "losing_trades": int(losses.sum()),
+            "breakeven_trades": int(len(pnl) - wins.sum() - losses.sum()),
+            "win_rate": wins.mean() * 100 if len(pnl) else 0.0,
+            "net_pnl": pnl.sum(),
+            "gross_profit": gross_profit,
+            "gross_loss": gross_loss,
+            "profit_factor": gross_profit / abs(gross_loss) if gross_loss else None,
+            "average_pnl": pnl.mean() if len(pnl) else 0.0,
+            "average_win": avg_win,
+            "average_loss": avg_loss,
+            "payoff_ratio": avg_win / abs(avg_loss) if avg_loss else None,
+            "largest_win": pnl.max() if len(pnl) else 0.0,
+            "largest_loss": pnl.min() if len(pnl) else 0.0,
+            "max_drawdown": max_drawdown,
+            "max_drawdown_start": self._trade_time(peak_index),
+            "max_drawdown_end": self._trade_time(trough) if max_drawdown < 0 else None,
+            "recovery_factor": pnl.sum() / abs(max_drawdown) if max_drawdown else None,
+            "longest_win_streak": _longest_streak(wins),
+            "longest_loss_streak": _longest_streak(losses),
+            "pnl_std": std,
+            "sharpe_per_trade": pnl.mean() / std if std else None,
+            "sortino_per_trade": pnl.mean() / downside if downside else None,
+        }
+
+        if "volume" in frame:
+            summary["total_volume"] = frame["volume"].sum()
+        if "holdingSeconds" in frame:
+            holding = frame["holdingSeconds"]
+            summary["average_holding_minutes"] = holding.mean() / 60
+            summary["median_holding_minutes"] = holding.median() / 60
+            summary["average_winner_holding_minutes"] = holding[wins].mean() / 60
+            summary["average_loser_holding_minutes"] = holding[losses].mean() / 60
+        for column in TIME_COLUMNS:
+            if column in frame:
+                summary[f"first_{column}"] = frame[column].min()
+                summary[f"last_{column}"] = frame[column].max()
+
+        self.summary = {key: _to_builtin(value) for key, value in summary.items()}
+        self.symbol_stats = self._group_stats("symbol")
+        self.strategy_stats = self._group_stats("strategyTag")
+        self.side_stats = self._group_stats("side")
+
+    @property
+    def metrics(self) -> dict:
+        """Precomputed metrics, JSON serializable"""
+        return {
+            "summary": self.summary,
+            "symbol_stats": self.symbol_stats,
+            "strategy_stats": self.strategy_stats,
+            "side_stats": self.side_stats,
+        }
+
+    @classmethod
+    def restore(cls, frame: pd.DataFrame, metrics: dict, source: Optional[str] = None) -> "TradeAnalytics":
+        """
+        Rebuild analytics from an already normalized and sorted frame and its
+        metrics (e.g. computed in a parser process) without recomputing them.
+        """
+        analytics = cls.__new__(cls)
+        analytics.source = source
+        analytics.frame = frame
+        analytics._compute_curve()
+        for name, value in metrics.items():
+            setattr(analytics, name, value)
+        return analytics
+
+    def _trade_time(self, index: Optional[int]) -> Optional[str]:
+        if index is None:
+            return None
+        for column in ("closeTime", "openTime"):
+            if column in self.frame:
+                return _to_builtin(self.frame[column].iloc[index])
+        return None
+
+    def _group_stats(self, column: str) -> Dict[str, dict]:
+        """Per-group aggregates for a categorical column"""
+        if column not in self.frame:
+            return {}
+
+        frame = self.frame
+        pnl = frame["pnl"]
+        grouped = frame.assign(
+            _win=pnl > 0,
+            _profit=pnl.clip(lower=0),
+            _loss=pnl.clip(upper=0),
+        ).groupby(column, observed=True)
+
+        aggregations = {
+            "trades": ("pnl", "size"),
+            "net_pnl": ("pnl", "sum"),
+            "average_pnl": ("pnl", "mean"),
+            "best_trade": ("pnl", "max"),
+            "worst_trade": ("pnl", "min"),
+            "win_rate": ("_win", "mean"),
+            "gross_profit": ("_profit", "sum"),
+            "gross_loss": ("_loss", "sum"),
+        }
+        if "volume" in frame:
+            aggregations["total_volume"] = ("volume", "sum")
+        if "holdingSeconds" in frame:
+            aggregations["average_holding_seconds"] = ("holdingSeconds", "mean")
+
+        stats = grouped.agg(**aggregations)
+        stats["win_rate"] = stats["win_rate"] * 100
+        stats["profit_factor"] = stats["gross_profit"] / stats["gross_loss"].abs().replace(0, np.nan)
+        if "average_holding_seconds" in stats:
+            stats["average_holding_minutes"] = stats.pop("average_holding_seconds") / 60
+
+        stats = stats.sort_values("net_pnl", ascending=False)
+        return {
+            str(name): {key: _to_builtin(value) for key, value in row.items()}
+            for name, row in stats.to_dict(orient="index").items()
+        }
+
+    # Queries
+    # ======================================
+    def get_summary(self) -> dict:
+        return self.summary
+
+    def get_group_stats(self, column: str, name: Optional[str] = None) -> dict:
+        stats = {
+            "symbol": self.symbol_stats,
+            "strategyTag": self.strategy_stats,
+            "side": self.side_stats,
+        }[column]
+
+        if name is None:
+            return stats
+
+        matches = {key: value for key, value in stats.items() if key.lower() == name.strip().lower()}
+        return matches
+
+    def get_equity_curve(self, points: int = 50) -> List[dict]:
+        """Equity curve downsampled to at most `points` samples"""
+        if not len(self.equity):
+            return []
+
+        points = max(2, min(points, len(self.equity)))
+        indexes = np.unique(np.linspace(0, len(self.equity) - 1, points).astype(int))
+        return [
+            {
+                "trade": int(index) + 1,
+                "time": self._trade_time(int(index)),
+                "equity": _to_builtin(self.equity[index]),
+                "drawdown": _to_builtin(self.drawdown[index]),
+            }
+            for index in indexes
+        ]
+
+    def query_trades(
+        self,
+        symbol: Optional[str] = None,
+        side: Optional[str] = None,
+        strategy: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        min_pnl: Optional[float] = None,
+        max_pnl: Optional[float] = None,
+        sort_by: str = "closeTime",
+        descending: bool = True,
+        limit: int = 20,
+    ) -> dict:
+        """Filter trades with a vectorized mask and return at most `limit` rows"""
+        frame = self.frame
+        mask = np.ones(len(frame), dtype=bool)
+
+        for column, value in (("symbol", symbol), ("side", side), ("strategyTag", strategy)):
+            if value is not None and column in frame:
+                wanted = value.strip().lower()
+                categories = [name for name in frame[column].cat.categories if name.lower() == wanted]
+                mask &= frame[column].isin(categories).to_numpy()
+
+        time_column = "closeTime" if "closeTime" in frame else "openTime" if "openTime" in frame else None
+        if time_column and start:
+            mask &= (frame[time_column] >= pd.Timestamp(start, tz="UTC")).to_numpy()
+        if time_column and end:
+            mask &= (frame[time_column] <= pd.Timestamp(end, tz="UTC")).to_numpy()
+        if min_pnl is not None:
+            mask &= frame["pnl"].to_numpy() >= min_pnl
+        if max_pnl is not None:
+            mask &= frame["pnl"].to_numpy() <= max_pnl
+
+        matched = frame[mask]
+        if sort_by in matched:
+            matched = matched.sort_values(sort_by, ascending=not descending, kind="stable")
+
+        limit = max(1, min(limit, MAX_QUERY_LIMIT))
+        rows = matched.head(limit)
+
+        return {
+            "matched_trades": int(mask.sum()),
+            "matched_net_pnl": _to_builtin(frame["pnl"].to_numpy()[mask].sum()),
+            "returned": len(rows),
+            "trades": [
+                {key: _to_builtin(value) for key, value in row.items()}
+                for row in rows.to_dict(orient="records")
+            ],
+        }
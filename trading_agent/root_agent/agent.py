@@ -1,14 +1,21 @@
 from google.adk.agents import Agent
 from google.adk.tools.agent_tool import AgentTool
 
+from app.core.config import get_settings
 from trading_agent.sub_agents import (
     create_trade_history_analyzer_agent, 
     create_market_intelligence_agent
 )
+from trading_agent.sub_agents.tools.cached_agent_tool import CachedAgentTool
+from trading_agent.utils.history import compact_history
 
-def create_root_agent(parsed_data) -> Agent:
+settings = get_settings()
+
+
+def create_root_agent() -> Agent:
     """
-    Creates the root trading assistant agent
+    Creates the root trading assistant agent.
+    Built once per process; request data is passed at invocation time.
     """
     
     llm_model = "gemini-2.0-flash"
@@ -19,8 +26,13 @@ def create_root_agent(parsed_data) -> Agent:
 
     
     #  sub-agents
-    trade_history_analyzer_agent = create_trade_history_analyzer_agent(parsed_data)
+    trade_history_analyzer_agent = create_trade_history_analyzer_agent()
     market_intelligence_agent = create_market_intelligence_agent()
+    market_intelligence_tool = (
+        CachedAgentTool(market_intelligence_agent)
+        if settings.market_intel_cache_enabled
+        else AgentTool(market_intelligence_agent)
+    )
 
     return Agent(
         name="root_trading_agent",
@@ -31,6 +43,7 @@ def create_root_agent(parsed_data) -> Agent:
             trade_history_analyzer_agent
         ],
         tools=[
-            AgentTool(market_intelligence_agent)
-        ]
+            market_intelligence_tool
+        ],
+        before_model_callback=compact_history if settings.history_compaction_enabled else None,
     )
\ No newline at end of file
@@ -0,0 +1,134 @@
+import asyncio
+import inspect
+from typing import Dict, List, Optional
+
+from google.adk.agents import Agent
+from google.adk.runners import Runner
+from google.adk.sessions import DatabaseSessionService
+
+from app.core.config import get_settings
+from app.core.logging import setup_logging
+from app.core.metrics import instrument_pool, timed_pool_class
+from chat.utils.choices import PLATFORMS
+from trading_agent.root_agent import create_root_agent
+from trading_agent.utils.adk_sessions import delete_adk_sessions
+from trading_agent.utils.metrics_plugin import MetricsPlugin
+
+logger = setup_logging()
+settings = get_settings()
+
+
+class AgentRuntime:
+    """Long-lived ADK objects for a single platform."""
+
+    def __init__(
+        self,
+        platform: PLATFORMS,
+        agent: Agent,
+        session_service: DatabaseSessionService,
+    ):
+        self.platform = platform
+        self.app_name = platform.value
+        self.session_service = session_service
+        self.runner = Runner(
+            app_name=self.app_name,
+            agent=agent,
+            session_service=session_service,
+            plugins=[MetricsPlugin()],
+        )
+
+
+class AgentRuntimeRegistry:
+    """
+    Process-wide registry holding one agent tree, plus one ADK session
+    service and runner per platform, so every chat request reuses the
+    same engine, connection pool and agents.
+    """
+
+    def __init__(self):
+        self._runtimes: Dict[PLATFORMS, AgentRuntime] = {}
+        self._root_agent: Optional[Agent] = None
+
+    @property
+    def is_started(self) -> bool:
+        return bool(self._runtimes)
+
+    def start(self) -> None:
+        """Create the per-platform runtimes (called from the app lifespan)"""
+        if self.is_started:
+            return
+
+        self._root_agent = create_root_agent()
+
+        for platform in PLATFORMS:
+            session_service = DatabaseSessionService(
+                db_url=settings.adk_db_url,
+                pool_size=settings.adk_pool_size,
+                max_overflow=settings.adk_max_overflow,
+                pool_timeout=settings.postgres_pool_timeout,
+                pool_recycle=settings.postgres_pool_recycle,
+                pool_pre_ping=True,
+                poolclass=timed_pool_class(f"adk_{platform.value}"),
+            )
+            instrument_pool(session_service.db_engine, f"adk_{platform.value}")
+            self._runtimes[platform] = AgentRuntime(
+                platform,
+                self._root_agent,
+                session_service,
+            )
+
+        logger.info(f"Agent runtimes initialized for {len(self._runtimes)} platform(s)")
+
+    def get(self, platform: PLATFORMS) -> AgentRuntime:
+        """Get the runtime of a platform, starting the registry lazily if needed"""
+        if not self.is_started:
+            self.start()
+        return self._runtimes[platform]
+
+    async def delete_sessions(self, platform: PLATFORMS, session_ids: List[str]) -> int:
+        """Delete a platform's ADK sessions and their events"""
+        engine = self.get(platform).session_service.db_engine
+        # The ADK engine is synchronous
+        return await asyncio.to_thread(delete_adk_sessions, engine, platform.value, session_ids)
+
+    async def close(self) -> None:
+        """Dispose every session service engine"""
+        for platform, runtime in self._runtimes.items():
+            engine = getattr(runtime.session_service, "db_engine", None)
+            if engine is None:
+                continue
+            try:
+                result = engine.dispose()
+                if inspect.isawaitable(result):
+                    await result
+                logger.info(f"ADK session engine closed for {platform.value}")
+            except Exception as e:
+                logger.error(f"Error closing ADK session engine for {platform.value}: {e}")
+
+        self._runtimes.clear()
+        self._root_agent = None
+
+    def runtimes(self) -> List[AgentRuntime]:
+        """The started runtimes, one per platform"""
+        return list(self._runtimes.values())
+
+    def pool_stats(self) -> Dict[str, Optional[dict]]:
+        """Connection pool statistics of each platform's ADK session engine"""
+        stats = {}
+        for platform, runtime in self._runtimes.items():
+            engine = getattr(runtime.session_service, "db_engine", None)
+            pool = getattr(engine, "pool", None)
+            if pool is None:
+                stats[platform.value] = None
+                continue
+
+            stats[platform.value] = {
+                "size": pool.size() if hasattr(pool, "size") else None,
+                "checked_in": pool.checkedin() if hasattr(pool, "checkedin") else None,
+                "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+                "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+            }
+        return stats
+
+
+agent_runtime = AgentRuntimeRegistry()
@@ -1,14 +1,20 @@
-from typing import Optional
-from google.adk.runners import Runner
-from google.adk.sessions import DatabaseSessionService
+from contextlib import asynccontextmanager, nullcontext
+from typing import AsyncIterator, Optional
+from google.adk.sessions import Session as AdkSession
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.coalesce import coalesce_key, request_coalescer
 from app.core.config import get_settings
+from app.core.exceptions import TooManyRequestsError
+from app.core.metrics import QUEUE_REJECTIONS, observe_stage
+from app.core.rate_limit import rate_limiter
 from app.core.logging import setup_logging
-from .root_agent import create_root_agent
+from .analytics import TradeAnalytics
+from .runtime import agent_runtime
 
 from chat.utils.choices import PLATFORMS
-from chat.db.crud import SessionCRUD
+from chat.db.crud import SessionCRUD, build_turn
+from chat.db.writer import message_writer
 from chat.schema import MessageCreate
 from chat.utils.choices import SENDER_OPTIONS
 
@@ -16,7 +22,14 @@ logger = setup_logging()
 
 
 # utils
-from .utils.call_agent import call_agent_async
+from .utils.call_agent import call_agent_async, stream_agent_async
+from .utils.trade_context import use_trade_data
+from .utils.history import history_compactor
+from .utils.llm_gate import is_quota_error, llm_gate
+from .utils.session_lock import session_turn_lock
+from .utils.upload_cache import upload_cache
+
+TRADE_DATA_STATE_KEY = "trade_data_hash"
 
 settings = get_settings()
 
@@ -29,25 +42,34 @@ class TradingAgentClient:
         self, 
         db: AsyncSession,
         platform: PLATFORMS,
-        parsed_data,
+        trade_analytics: Optional[TradeAnalytics] = None,
+        trade_data_hash: Optional[str] = None,
     ):
         self.db = db
         self.platform = platform
         self.app_name = platform.value
         self.session_crud = SessionCRUD(db)
 
-        # Initialize database session service for PostgreSQL
-        self.session_service = DatabaseSessionService(db_url=settings.adk_db_url)
+        # Shared database session service and runner for this platform
+        runtime = agent_runtime.get(platform)
+        self.session_service = runtime.session_service
+        self.runner = runtime.runner
         
         # Initial state for new sessions
         self.initial_state = {}
         
-        # Create the traidng root agent
-        self.trading_agent = create_root_agent(parsed_data)
+        # Trade analytics supplied to the shared agent tree per invocation
+        self.trade_analytics = trade_analytics
+        self.trade_data_hash = trade_data_hash
 
 
-    async def _get_or_create_session(self, user_id, session_id: Optional[str] = None) -> str:
+    async def _get_or_create_session(self, user_id, session_id: Optional[str] = None) -> AdkSession:
         """Get existing session or create a new one (async)."""
+        with observe_stage("session_get_or_create"):
+            return await self._load_or_create_session(user_id, session_id)
+
+
+    async def _load_or_create_session(self, user_id, session_id: Optional[str] = None) -> AdkSession:
         if session_id:
             # Try to get existing session
             try:
@@ -57,9 +79,9 @@ class TradingAgentClient:
                     session_id=session_id
                 )
                 if session:
-                    return session_id
+                    return session
             except Exception as e:
-                print(f"Session retrieval error: {e}")
+                logger.error(f"Session retrieval error: {e}")
         
         # Create new session
         new_session = await self.session_service.create_session(
@@ -67,44 +89,212 @@ class TradingAgentClient:
             user_id=user_id,
             state=self.initial_state
         )
-        session_data = {
-            "user_id": user_id,
-            "platform": self.platform
-        }
-        await self.session_crud.create_session(
-            session_id=new_session.id,
-            session_data=session_data
-        )
+        # The chat session row is upserted together with the turn's messages
+        return new_session
 
-        return new_session.id
+
+    async def _resolve_trade_data(self, session: AdkSession) -> Optional[dict]:
+        """
+        Attach this turn's upload to the session by content hash, or load the
+        upload of an earlier turn from the upload cache.
+        Returns the session state delta to apply, if any.
+        """
+        if self.trade_data_hash:
+            if session.state.get(TRADE_DATA_STATE_KEY) != self.trade_data_hash:
+                return {TRADE_DATA_STATE_KEY: self.trade_data_hash}
+            return None
+
+        digest = session.state.get(TRADE_DATA_STATE_KEY)
+        if digest:
+            self.trade_analytics = await upload_cache.get(digest)
+            if self.trade_analytics is None:
+                logger.info(f"Trade data {digest[:12]} of session {session.id} is no longer cached")
+
+        return None
 
 
     async def chat(
         self,
         user_query: str,
         user_id: str,
-        session_id: Optional[str] = None
+        session_id: Optional[str] = None,
+        idempotency_key: Optional[str] = None,
     ) -> dict:
-        """Process a chat message and return the agent's response."""
-        
-        active_session_id = await self._get_or_create_session(user_id, session_id)
+        """
+        Process a chat message and return the agent's response.
+        Identical concurrent requests (or requests sharing an idempotency key)
+        run the agent once and share its response.
+        """
+        if not settings.chat_coalesce_enabled:
+            return await self._chat(user_query, user_id, session_id)
 
-        # Create runner
-        runner = Runner(
-            app_name=self.app_name,
-            agent=self.trading_agent,
-            session_service=self.session_service 
+        if idempotency_key:
+            key = coalesce_key("chat", self.app_name, user_id, idempotency_key)
+            result_ttl = settings.chat_idempotency_ttl_seconds
+        else:
+            key = coalesce_key(
+                "chat", self.app_name, user_id, session_id, user_query, self.trade_data_hash
+            )
+            result_ttl = settings.chat_coalesce_result_seconds
+
+        return await request_coalescer.run(
+            key,
+            lambda: self._chat(user_query, user_id, session_id),
+            result_ttl=result_ttl,
         )
-        
-        text_response = await call_agent_async(
-            runner=runner,
-            user_id=user_id,
-            session_id=active_session_id,
-            query=user_query
+
+
+    def _turn_lock(self, session_id: Optional[str]):
+        """Serializes turns of an existing session; rejects with 429 when too many queue up"""
+        if not settings.session_lock_enabled:
+            return nullcontext()
+        return session_turn_lock.hold(session_id)
+
+
+    async def _check_rate_limit(self, user_id: str) -> None:
+        """Per-user agent turn budget, shared by every worker"""
+        if not settings.rate_limit_enabled:
+            return
+
+        result = await rate_limiter.hit(
+            f"agent:{self.app_name}:{user_id}",
+            settings.rate_limit_agent_per_minute,
         )
+        if not result.allowed:
+            QUEUE_REJECTIONS.labels("rate_limit", "agent").inc()
+            raise TooManyRequestsError(
+                "Too many messages, please slow down",
+                retry_after=result.retry_after,
+            )
+
+
+    @asynccontextmanager
+    async def _agent_slot(self, user_id: str):
+        """Hold an LLM slot for one agent run; quota errors become a 429"""
+        async with llm_gate.slot(user_id):
+            try:
+                yield
+            except Exception as e:
+                if not is_quota_error(e):
+                    raise
+                llm_gate.penalize(settings.llm_quota_retry_after_seconds)
+                raise TooManyRequestsError(
+                    "The assistant is busy, please retry shortly",
+                    retry_after=settings.llm_quota_retry_after_seconds,
+                ) from e
+
+
+    async def _chat(
+        self,
+        user_query: str,
+        user_id: str,
+        session_id: Optional[str] = None
+    ) -> dict:
+        await self._check_rate_limit(user_id)
+
+        async with self._turn_lock(session_id):
+            session = await self._get_or_create_session(user_id, session_id)
+            active_session_id = session.id
+            state_delta = await self._resolve_trade_data(session)
+
+            async with self._agent_slot(user_id):
+                with use_trade_data(self.trade_analytics), observe_stage("agent_run"):
+                    text_response = await call_agent_async(
+                        runner=self.runner,
+                        user_id=user_id,
+                        session_id=active_session_id,
+                        query=user_query,
+                        state_delta=state_delta,
+                    )
+
+            response = text_response or DEFAULT_RESPONSE
+            response_dict = await self._save_messages(active_session_id, user_id, user_query, response)
+
+        self._compact_history(session)
+        return response_dict
+
+
+    async def chat_stream(
+        self,
+        user_query: str,
+        user_id: str,
+        session_id: Optional[str] = None
+    ) -> AsyncIterator[dict]:
+        """
+        Process a chat message and yield the agent's progress events as they arrive.
+        Messages are persisted once the stream completes; a failed run ends
+        with an `error` event and persists nothing.
+        The first (`session`) event is yielded once the session's turn lock
+        and an LLM slot are held.
+        """
+        await self._check_rate_limit(user_id)
+
+        async with self._turn_lock(session_id):
+            session = await self._get_or_create_session(user_id, session_id)
+            active_session_id = session.id
+            state_delta = await self._resolve_trade_data(session)
+
+            started = False
+            failed = False
+            text_response = None
+            try:
+                async with self._agent_slot(user_id):
+                    yield {"event": "session", "data": {"session_id": active_session_id}}
+                    started = True
+
+                    with use_trade_data(self.trade_analytics), observe_stage("agent_run"):
+                        async for event in stream_agent_async(
+                            runner=self.runner,
+                            user_id=user_id,
+                            session_id=active_session_id,
+                            query=user_query,
+                            state_delta=state_delta,
+                        ):
+                            if event["event"] == "final":
+                                text_response = event["data"]["text"]
+                                continue
+                            if event["event"] == "error":
+                                failed = True
+                            yield event
+            except TooManyRequestsError as e:
+                if not started:
+                    raise
+                # The response has started, so the 429 travels as an error event
+                failed = True
+                yield {
+                    "event": "error",
+                    "data": {
+                        "message": e.message,
+                        "retry_after": settings.llm_quota_retry_after_seconds,
+                    },
+                }
+
+            if failed:
+                return
+
+            response = text_response or DEFAULT_RESPONSE
+            response_dict = await self._save_messages(active_session_id, user_id, user_query, response)
+
+        self._compact_history(session)
+        yield {"event": "message", "data": response_dict}
 
-        response = text_response or DEFAULT_RESPONSE
 
+    def _compact_history(self, session: AdkSession) -> None:
+        """
+        Fold old turns of a long session into its rolling summary, off the
+        request path. `session` was loaded before the turn, which is counted.
+        """
+        if settings.history_compaction_enabled and history_compactor.needs_compaction(session, new_turns=1):
+            history_compactor.schedule(
+                self.session_service,
+                self.app_name,
+                session.user_id,
+                session.id,
+            )
+
+
+    async def _save_messages(self, session_id: str, user_id: str, user_query: str, response: str) -> dict:
+        """Persist the session row, user query and agent reply of a chat turn."""
         messages = [
             MessageCreate(
                 message=user_query,
@@ -116,12 +306,19 @@ class TradingAgentClient:
             )
         ]
 
-        await self.session_crud.create_message_bulk(active_session_id, messages)
+        session_data = {
+            "user_id": user_id,
+            "platform": self.platform
+        }
+        turn = build_turn(session_id, session_data, messages)
+        if message_writer.enabled:
+            await message_writer.enqueue(turn)
+        else:
+            await self.session_crud.persist_turns([turn])
 
         response_dict = {
-            "session_id": active_session_id,
+            "session_id": session_id,
             "message": response,
         }
 
         return response_dict
-    
\ No newline at end of file
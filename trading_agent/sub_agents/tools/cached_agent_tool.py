@@ -0,0 +1,30 @@
+from typing import Any
+
+from google.adk.tools.agent_tool import AgentTool
+from google.adk.tools.tool_context import ToolContext
+
+from app.core.logging import setup_logging
+from trading_agent.utils.market_cache import market_intel_cache, normalize_market_query
+
+logger = setup_logging()
+
+
+class CachedAgentTool(AgentTool):
+    """
+    AgentTool whose responses are shared between users asking the same
+    market question. Requests that don't normalize to an instrument and
+    intent always reach the agent.
+    """
+
+    async def run_async(self, *, args: dict[str, Any], tool_context: ToolContext) -> Any:
+        query = normalize_market_query(args.get("request") or "")
+        if query is None:
+            return await super().run_async(args=args, tool_context=tool_context)
+
+        run_agent = super().run_async
+
+        async def fetch():
+            logger.info(f"Market intel cache miss for {query.key}")
+            return await run_agent(args=args, tool_context=tool_context)
+
+        return await market_intel_cache.get_or_fetch(query, fetch)
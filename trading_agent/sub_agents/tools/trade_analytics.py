@@ -0,0 +1,113 @@
+from typing import Optional
+
+from google.adk.tools import FunctionTool
+from app.core.logging import setup_logging
+from trading_agent.utils.trade_context import get_trade_data
+
+logger = setup_logging()
+
+NO_DATA_RESPONSE = {
+    "status": "error",
+    "message": "No trade history data was provided with this request.",
+}
+
+
+async def get_summary() -> dict:
+    """
+    Overall performance of the user's trade history: trade counts, win rate,
+    net/gross PnL, profit factor, averages, largest win/loss, max drawdown,
+    win/loss streaks, holding times and per-trade risk metrics.
+    """
+    analytics = get_trade_data()
+    if analytics is None:
+        return NO_DATA_RESPONSE
+
+    return {"status": "success", "summary": analytics.get_summary()}
+
+
+async def get_symbol_stats(symbol: Optional[str] = None) -> dict:
+    """
+    Per-instrument aggregates (trades, net PnL, win rate, profit factor, volume,
+    holding time). Pass a symbol such as "EURUSD" for one instrument, or omit it for all.
+    """
+    analytics = get_trade_data()
+    if analytics is None:
+        return NO_DATA_RESPONSE
+
+    return {"status": "success", "symbols": analytics.get_group_stats("symbol", symbol)}
+
+
+async def get_strategy_stats(strategy: Optional[str] = None) -> dict:
+    """
+    Per-strategy aggregates, plus buy/sell side aggregates.
+    Pass a strategy tag for one strategy, or omit it for all.
+    """
+    analytics = get_trade_data()
+    if analytics is None:
+        return NO_DATA_RESPONSE
+
+    return {
+        "status": "success",
+        "strategies": analytics.get_group_stats("strategyTag", strategy),
+        "sides": analytics.get_group_stats("side"),
+    }
+
+
+async def get_equity_curve(points: int = 50) -> dict:
+    """Cumulative PnL and drawdown sampled at up to `points` trades."""
+    analytics = get_trade_data()
+    if analytics is None:
+        return NO_DATA_RESPONSE
+
+    return {"status": "success", "equity_curve": analytics.get_equity_curve(points)}
+
+
+async def query_trades(
+    symbol: Optional[str] = None,
+    side: Optional[str] = None,
+    strategy: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    min_pnl: Optional[float] = None,
+    max_pnl: Optional[float] = None,
+    sort_by: str = "closeTime",
+    descending: bool = True,
+    limit: int = 20,
+) -> dict:
+    """
+    Individual trades matching the filter. `start`/`end` are ISO dates applied to
+    the close time, `sort_by` is a trade field such as "pnl" or "closeTime",
+    and at most 100 trades are returned.
+    """
+    analytics = get_trade_data()
+    if analytics is None:
+        return NO_DATA_RESPONSE
+
+    try:
+        result = analytics.query_trades(
+            symbol=symbol,
+            side=side,
+            strategy=strategy,
+            start=start,
+            end=end,
+            min_pnl=min_pnl,
+            max_pnl=max_pnl,
+            sort_by=sort_by,
+            descending=descending,
+            limit=limit,
+        )
+    except ValueError as e:
+        logger.warning(f"Invalid trade query: {e}")
+        return {"status": "error", "message": f"Invalid trade query: {e}"}
+
+    return {"status": "success", **result}
+
+
+def trade_analytics_tools():
+    return [
+        FunctionTool(get_summary),
+        FunctionTool(get_symbol_stats),
+        FunctionTool(get_strategy_stats),
+        FunctionTool(get_equity_curve),
+        FunctionTool(query_trades),
+    ]
@@ -1,52 +1,58 @@
 from google.adk.agents import Agent
 from app.core.config import get_settings
-from .tools.trade_history_retrieve import trade_history_data_parsing_tool
+from trading_agent.utils.history import compact_history
+from .tools.trade_analytics import trade_analytics_tools
 
 settings = get_settings()
 
-def create_trade_history_analyzer_agent(parsed_data) -> Agent:
+def create_trade_history_analyzer_agent() -> Agent:
     """
     Sub-agent: Trade History Analyzer. Analyze user's provided trading data.
+    The data itself is supplied per invocation, see `use_trade_data`.
     """
     llm_model = "gemini-2.0-flash"
 
     # tools
-    trade_history_data_parser = trade_history_data_parsing_tool(parsed_data) 
+    analytics_tools = trade_analytics_tools()
     
     # instruction
     instruction = (
-		"You are a Trade History Analyzer specialized in Forex and CFD trading analysis."
-		"Your responsibility is to analyze the user's trading history and answer questions strictly based on that data.\n\n"
+        "You are a Trade History Analyzer specialized in Forex and CFD trading analysis."
+        "Your responsibility is to analyze the user's trading history and answer questions strictly based on that data.\n\n"
 
-		"You have access to the following tools:\n"
-    "- trade_history_data_parser: this tool will provide the parsed data of user's trading history\n\n"
+        "You have access to the following tools:\n"
+        "- get_summary: overall performance, drawdown, streaks, holding times and risk metrics\n"
+        "- get_symbol_stats: per-instrument performance (optionally for one symbol)\n"
+        "- get_strategy_stats: per-strategy and buy/sell performance\n"
+        "- get_equity_curve: cumulative PnL and drawdown over time\n"
+        "- query_trades: individual trades filtered by symbol, side, strategy, date range or PnL\n\n"
 
-		"You MUST follow these rules:\n"
-		"1. Use the available tool to retrieve and parse the trading history data before answering.\n"
-		"2. NEVER assume, guess, or estimate values without using the tool.\n"
-		"3. If no trade history data is available, clearly inform the user and ask them to upload or provide data.\n"
-		"4. Treat the parsed data as the single source of truth.\n\n"
+        "You MUST follow these rules:\n"
+        "1. Use the available tools to retrieve the precomputed trading history metrics before answering.\n"
+        "2. NEVER assume, guess, or compute values yourself when a tool provides them.\n"
+        "3. If no trade history data is available, clearly inform the user and ask them to upload or provide data.\n"
+        "4. Treat the tool results as the single source of truth.\n\n"
 
-		"When responding to a user query:\n"
-		"• First, acknowledge that you are analyzing their trading history.\n"
-		"• Use the tool to load the full trade history dataset.\n"
-		"• Compute or infer insights such as performance, risk behavior, consistency, patterns, and mistakes.\n"
-		"• Use clear numbers, percentages, and examples from the trades.\n"
-		"• Keep the response conversational but professional.\n\n"
+        "When responding to a user query:\n"
+        "• First, acknowledge that you are analyzing their trading history.\n"
+        "• Call the most specific tool for the question; use query_trades for examples instead of loading every trade.\n"
+        "• Compute or infer insights such as performance, risk behavior, consistency, patterns, and mistakes.\n"
+        "• Use clear numbers, percentages, and examples from the trades.\n"
+        "• Keep the response conversational but professional.\n\n"
 
-		"You should be able to answer:\n"
-		"• Overall performance questions (profit, loss, win rate, drawdown)\n"
-		"• Instrument-specific analysis (e.g., EURUSD, XAUUSD)\n"
-		"• Strategy or behavior-based questions\n"
-		"• Risk management observations\n"
-		"• Follow-up questions that refer to previous analysis\n\n"
+        "You should be able to answer:\n"
+        "• Overall performance questions (profit, loss, win rate, drawdown)\n"
+        "• Instrument-specific analysis (e.g., EURUSD, XAUUSD)\n"
+        "• Strategy or behavior-based questions\n"
+        "• Risk management observations\n"
+        "• Follow-up questions that refer to previous analysis\n\n"
 
-		"The trade history data is provided in structured JSON format and may include fields such as:\n"
-		"symbol, side, volume, entryPrice, exitPrice, pnl, pnlPercent, openTime, closeTime, strategyTag, and risk metrics.\n\n"
+        "Trades returned by query_trades may include fields such as:\n"
+        "symbol, side, volume, entryPrice, exitPrice, pnl, pnlPercent, openTime, closeTime, strategyTag and holdingSeconds.\n\n"
 
-		"If a question is outside the scope of trade history analysis (e.g., market news), "
-		"politely indicate that another agent will handle it."
-	)
+        "If a question is outside the scope of trade history analysis (e.g., market news), "
+        "politely indicate that another agent will handle it."
+    )
 
 
     return Agent(
@@ -55,6 +61,7 @@ def create_trade_history_analyzer_agent(parsed_data) -> Agent:
         model=llm_model,
         instruction=instruction,
         tools=[
-            trade_history_data_parser
-        ]
+            *analytics_tools
+        ],
+        before_model_callback=compact_history if settings.history_compaction_enabled else None,
     )
\ No newline at end of file
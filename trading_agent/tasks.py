@@ -0,0 +1,28 @@
+from app.core.celery_worker import celery_app
+from app.core.exceptions import APIError
+from trading_agent.utils.parse_pool import parse_file_to_ipc
+
+
+@celery_app.task(name="tasks.parse_trade_upload")
+def parse_trade_upload(path: str, filename: str) -> dict:
+    """
+    Parse a spooled upload on a Celery worker.
+    The Arrow IPC result is written next to the upload and its path returned
+    as {"path": ...}. A rejected upload returns {"error": ...} instead, so the
+    API can answer with the same 4xx as when it parses the file itself.
+    """
+    try:
+        payload = parse_file_to_ipc(path, filename)
+    except APIError as e:
+        return {
+            "error": {
+                "status_code": e.status_code,
+                "message": e.message,
+                "details": e.details,
+            }
+        }
+
+    result_path = f"{path}.arrow"
+    with open(result_path, "wb") as result:
+        result.write(payload)
+    return {"path": result_path}
@@ -0,0 +1,43 @@
+from typing import Iterable, Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+_engine: Optional[Engine] = None
+
+
+def get_adk_engine() -> Engine:
+    """
+    Small engine on the ADK sessions database, for processes (Celery) that
+    clean up sessions without starting the agent runtimes
+    """
+    global _engine
+    if _engine is None:
+        _engine = create_engine(
+            settings.adk_db_url,
+            pool_size=1,
+            max_overflow=1,
+            pool_recycle=settings.postgres_pool_recycle,
+            pool_pre_ping=True,
+        )
+    return _engine
+
+
+def delete_adk_sessions(engine: Engine, app_name: str, session_ids: Iterable[str]) -> int:
+    """
+    Delete ADK sessions in one statement; their events go with them through
+    the events table's FK cascade. Chat session ids double as ADK session ids.
+    """
+    session_ids = [str(session_id) for session_id in session_ids]
+    if not session_ids:
+        return 0
+
+    with engine.begin() as conn:
+        return conn.execute(
+            text("DELETE FROM sessions WHERE app_name = :app_name AND id = ANY(:session_ids)"),
+            {"app_name": app_name, "session_ids": session_ids},
+        ).rowcount
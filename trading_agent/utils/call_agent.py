@@ -1,5 +1,15 @@
+from typing import AsyncIterator
+
+from google.adk.agents.run_config import RunConfig, StreamingMode
 from google.genai import types
 
+from app.core.config import get_settings
+from app.core.logging import setup_logging
+from trading_agent.utils.llm_gate import is_quota_error
+
+logger = setup_logging()
+settings = get_settings()
+
 async def _process_agent_response(event):
     if event.content and event.content.parts:        
         
@@ -12,7 +22,7 @@ async def _process_agent_response(event):
         return final_response
 
 
-async def call_agent_async(runner, user_id, session_id, query):
+async def call_agent_async(runner, user_id, session_id, query, state_delta=None):
     content = types.Content(
         role="user", parts=[types.Part(text=query)]
     )
@@ -22,7 +32,8 @@ async def call_agent_async(runner, user_id, session_id, query):
         async for event in runner.run_async(
             user_id=user_id, 
             session_id=session_id, 
-            new_message=content
+            new_message=content,
+            state_delta=state_delta,
         ):
             response = await _process_agent_response(event)
             
@@ -33,5 +44,64 @@ async def call_agent_async(runner, user_id, session_id, query):
             
 
     except Exception as e:
-        print("Error during agent call:", str(e))
+        if is_quota_error(e):
+            raise
+        logger.exception(f"Error during agent call: {e}")
         return None
+
+
+async def stream_agent_async(runner, user_id, session_id, query, state_delta=None) -> AsyncIterator[dict]:
+    """
+    Run the agent with SSE streaming and yield progress events as they arrive:
+    `partial` text chunks, `tool_call` / `tool_result` progress and the `final` text.
+    A failed run yields an `error` event instead of `final`; quota errors are
+    raised, as in `call_agent_async`, for the caller's quota policy.
+    """
+    content = types.Content(
+        role="user", parts=[types.Part(text=query)]
+    )
+    run_config = RunConfig(streaming_mode=StreamingMode.SSE)
+    final_response_text = None
+
+    try:
+        async for event in runner.run_async(
+            user_id=user_id,
+            session_id=session_id,
+            new_message=content,
+            state_delta=state_delta,
+            run_config=run_config,
+        ):
+            for call in event.get_function_calls():
+                yield {
+                    "event": "tool_call",
+                    "data": {"agent": event.author, "name": call.name},
+                }
+
+            for result in event.get_function_responses():
+                yield {
+                    "event": "tool_result",
+                    "data": {"agent": event.author, "name": result.name},
+                }
+
+            if event.partial:
+                if event.content and event.content.parts:
+                    text = "".join(part.text or "" for part in event.content.parts)
+                    if text:
+                        yield {
+                            "event": "partial",
+                            "data": {"agent": event.author, "text": text},
+                        }
+                continue
+
+            response = await _process_agent_response(event)
+            if response:
+                final_response_text = response
+
+    except Exception as e:
+        if is_quota_error(e):
+            raise
+        logger.exception(f"Error during streamed agent call: {e}")
+        yield {"event": "error", "data": {"message": "Agent call failed"}}
+        return
+
+    yield {"event": "final", "data": {"text": final_response_text}}
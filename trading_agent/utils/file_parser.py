@@ -1,50 +1,174 @@
-import io, json
+import asyncio, hashlib, json
+from typing import BinaryIO, Optional, Tuple
+
 import pandas as pd
 from fastapi import UploadFile
 
+from app.core.config import get_settings
+from app.core.exceptions import APIError, PayloadTooLargeError, ValidationError
 from app.core.logging import setup_logging
+from app.core.metrics import observe_stage
+from trading_agent.analytics import (
+    CATEGORY_COLUMNS,
+    TradeAnalytics,
+    concat_trade_frames,
+    match_trade_columns,
+    normalize_trade_columns,
+)
+from trading_agent.utils.upload_cache import content_hash, upload_cache
 
 logger = setup_logging()
+settings = get_settings()
+
+# Upload bytes read per step when hashing the spooled file
+READ_CHUNK_BYTES = 1024 * 1024
+
+# CSV rows parsed per chunk; bounds how many raw (unconverted) rows are held at once
+CSV_CHUNK_ROWS = 100_000
+
+
+def _read_csv(fileobj: BinaryIO) -> pd.DataFrame:
+    """
+    Read a CSV in chunks, projecting each chunk onto the trade columns and
+    converting it to compact dtypes (float64, category, datetime) before the
+    next one is parsed. The raw file is never held in memory at once, but
+    the converted frame is, since the analytics keep every trade: peak
+    memory still grows with the file, by roughly twice the converted frame
+    while the chunks are concatenated.
+    """
+    header = pd.read_csv(fileobj, nrows=0).columns
+    fileobj.seek(0)
+
+    matched = match_trade_columns(header)
+    dtype = {
+        raw: "string"
+        for canonical, raw in matched.items()
+        if canonical in CATEGORY_COLUMNS
+    }
+
+    chunks = [
+        normalize_trade_columns(chunk)
+        for chunk in pd.read_csv(
+            fileobj,
+            usecols=list(matched.values()),
+            dtype=dtype,
+            chunksize=CSV_CHUNK_ROWS,
+        )
+    ]
+    if not chunks:
+        raise ValidationError("Trade history file has no rows")
+
+    return concat_trade_frames(chunks)
+
 
-async def file_parser(file: UploadFile) -> dict:
-    """Parse uploaded file (CSV, Excel, JSON) to JSON structure."""
+def _read_excel(fileobj: BinaryIO) -> pd.DataFrame:
+    """Excel workbooks can't be read incrementally; only the trade columns are kept"""
+    header = pd.read_excel(fileobj, nrows=0).columns
+    fileobj.seek(0)
+
+    matched = match_trade_columns(header)
+    return normalize_trade_columns(
+        pd.read_excel(fileobj, usecols=list(matched.values()))
+    )
+
+
+def parse_upload(fileobj: BinaryIO, filename: str) -> TradeAnalytics:
+    """Parse an uploaded trade history file (CSV, Excel, JSON) into analytics."""
     try:
-        contents = await file.read()
-        filename = file.filename.lower()
-        
+        filename = filename.lower()
+        fileobj.seek(0)
+
         if filename.endswith('.csv'):
-            df = pd.read_csv(io.BytesIO(contents))
-            return {
-                "data": df.to_dict(orient='records'),
-                "columns": list(df.columns),
-                "row_count": len(df),
-                "source": "csv_file"
-            }
-        
+            return TradeAnalytics(_read_csv(fileobj), source="csv_file")
+
         elif filename.endswith(('.xlsx', '.xls')):
-            df = pd.read_excel(io.BytesIO(contents))
-            return {
-                "data": df.to_dict(orient='records'),
-                "columns": list(df.columns),
-                "row_count": len(df),
-                "source": "excel_file"
-            }
-        
+            return TradeAnalytics(_read_excel(fileobj), source="excel_file")
+
         elif filename.endswith('.json'):
-            json_data = json.loads(contents.decode('utf-8'))
+            json_data = json.load(fileobj)
             # Handle both array and object formats
             if isinstance(json_data, list):
-                return {
-                    "data": json_data,
-                    "row_count": len(json_data),
-                    "source": "json_file"
-                }
-            else:
-                return json_data
-        
+                json_data = {"data": json_data, "source": "json_file"}
+            return TradeAnalytics.from_parsed(json_data)
+
         else:
-            raise ValueError(f"Unsupported file format: {filename}")
-            
+            raise ValidationError(f"Unsupported file format: {filename}")
+
+    except APIError:
+        raise
     except Exception as e:
         logger.error(f"File parsing error: {e}")
-        raise ValueError(f"Could not parse file: {str(e)}")
+        raise ValidationError(f"Could not parse file: {str(e)}")
+
+
+def parse_trade_data(trade_data: str) -> TradeAnalytics:
+    """Parse trade history sent as a JSON form field into analytics."""
+    try:
+        parsed_data = json.loads(trade_data)
+    except json.JSONDecodeError:
+        raise ValidationError("Invalid JSON in trade_data")
+
+    return TradeAnalytics.from_parsed(parsed_data)
+
+
+async def hash_upload(file: UploadFile, max_bytes: Optional[int] = None) -> Tuple[str, int]:
+    """
+    SHA-256 and size of an upload, read chunk by chunk from the spooled temp file.
+    Uploads larger than `max_bytes` are rejected.
+    """
+    digest = hashlib.sha256()
+    size = 0
+
+    await file.seek(0)
+    while chunk := await file.read(READ_CHUNK_BYTES):
+        digest.update(chunk)
+        size += len(chunk)
+        if max_bytes is not None and size > max_bytes:
+            raise PayloadTooLargeError(
+                f"Trade history file exceeds {max_bytes // (1024 * 1024)} MB",
+                details={"max_bytes": max_bytes},
+            )
+    await file.seek(0)
+
+    return digest.hexdigest(), size
+
+
+async def load_trade_data(
+    trade_data: Optional[str] = None,
+    file: Optional[UploadFile] = None,
+) -> Tuple[Optional[str], Optional[TradeAnalytics]]:
+    """
+    Resolve the trade history of a chat request to its content hash and analytics.
+    Uploads already seen (same SHA-256) are served from the upload cache,
+    new ones are parsed off the event loop.
+    """
+    from trading_agent.utils.parse_pool import upload_parser
+
+    max_bytes = settings.upload_max_size_mb * 1024 * 1024
+
+    if trade_data:
+        contents = trade_data.encode("utf-8")
+        if len(contents) > max_bytes:
+            raise PayloadTooLargeError(
+                f"Trade history data exceeds {settings.upload_max_size_mb} MB",
+                details={"max_bytes": max_bytes},
+            )
+        digest = content_hash(contents)
+    elif file:
+        digest, size = await hash_upload(file, max_bytes)
+    else:
+        return None, None
+
+    analytics = await upload_cache.get(digest)
+    if analytics is not None:
+        return digest, analytics
+
+    with observe_stage("file_parse"):
+        if trade_data:
+            analytics = await asyncio.to_thread(parse_trade_data, trade_data)
+        else:
+            analytics = await upload_parser.parse(file, size)
+
+    await upload_cache.set(digest, analytics)
+
+    return digest, analytics
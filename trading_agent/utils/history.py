@@ -0,0 +1,247 @@
+import asyncio
+import hashlib
+import time
+from typing import Dict, List, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.events import Event, EventActions
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.sessions import BaseSessionService, Session as AdkSession
+from google.genai import Client, types
+
+from app.core.config import get_settings
+from app.core.exceptions import APIError
+from app.core.logging import setup_logging
+from trading_agent.utils.llm_gate import llm_gate
+from trading_agent.utils.session_lock import session_turn_lock
+
+logger = setup_logging()
+settings = get_settings()
+
+SUMMARY_STATE_KEY = "history_summary"
+SUMMARY_TURNS_STATE_KEY = "history_summary_turns"
+SUMMARY_CUT_STATE_KEY = "history_summary_cut"
+COMPACTOR_AUTHOR = "history_compactor"
+
+# Longer messages are clipped in the transcript handed to the summarizer
+MAX_MESSAGE_CHARS = 2000
+
+SUMMARY_INSTRUCTION = (
+    "You maintain a running summary of a conversation between a trader and a "
+    "trading assistant. Merge the previous summary and the new transcript into "
+    "one concise summary (at most 250 words). Keep instruments, numbers, dates, "
+    "the trader's goals and preferences, and any open questions. Do not add "
+    "information that isn't in the input."
+)
+
+
+def _text(event: Event) -> str:
+    if not event.content or not event.content.parts:
+        return ""
+    return "".join(part.text or "" for part in event.content.parts if not part.thought)
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def _user_turns(events: List[Event]) -> List[int]:
+    """Indices of the events opening each turn (the user's messages)"""
+    return [
+        index
+        for index, event in enumerate(events)
+        if event.author == "user" and _text(event)
+    ]
+
+
+def compact_history(
+    callback_context: CallbackContext,
+    llm_request: LlmRequest,
+) -> Optional[LlmResponse]:
+    """
+    before_model_callback: drop the turns already folded into the rolling
+    summary from the prompt and hand the model the summary instead.
+    The last `history_keep_turns` turns always stay verbatim: the summary
+    records the message opening the first turn it doesn't cover.
+    """
+    state = callback_context.state
+    summary = state.get(SUMMARY_STATE_KEY)
+    cut = state.get(SUMMARY_CUT_STATE_KEY)
+    if not summary or not cut:
+        return None
+
+    # The first match is the earliest candidate, so a repeated message can
+    # only keep more of the history, never drop an unsummarized turn
+    for position, content in enumerate(llm_request.contents):
+        if content.role != "user" or not content.parts:
+            continue
+        text = "".join(part.text or "" for part in content.parts)
+        if _text_hash(text) == cut:
+            if position == 0:
+                return None
+            llm_request.contents = llm_request.contents[position:]
+            llm_request.append_instructions(
+                [f"Summary of the earlier conversation with this trader:\n{summary}"]
+            )
+            return None
+
+    # Prompt layout not recognised; leave it untouched
+    return None
+
+
+class HistoryCompactor:
+    """
+    Folds old turns of long sessions into a rolling summary kept in the ADK
+    session state. Runs as background tasks after a turn completes, so the
+    user-facing path never waits for summarization.
+    """
+
+    def __init__(self, keep_turns: int, min_turns: int, model: str):
+        self.keep_turns = keep_turns
+        self.min_turns = min_turns
+        self.model = model
+        self._client: Optional[Client] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+        self.compactions = 0
+        self.failures = 0
+        self.skipped = 0
+
+    def _get_client(self) -> Client:
+        if self._client is None:
+            # Same environment-based credentials as the agents
+            self._client = Client()
+        return self._client
+
+    def needs_compaction(self, session: AdkSession, new_turns: int = 0) -> bool:
+        """
+        Whether enough turns beyond the verbatim window await folding.
+        `new_turns` counts turns run since `session` was loaded.
+        """
+        turns = len(_user_turns(session.events)) + new_turns
+        summarized = session.state.get(SUMMARY_TURNS_STATE_KEY, 0)
+        return turns - self.keep_turns - summarized >= self.min_turns
+
+    def schedule(
+        self,
+        session_service: BaseSessionService,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+    ) -> None:
+        """Start compacting a session in the background, once at a time per session"""
+        if session_id in self._tasks:
+            return
+
+        task = asyncio.create_task(
+            self._compact(session_service, app_name, user_id, session_id),
+            name=f"history-compaction-{session_id}",
+        )
+        self._tasks[session_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(session_id, None))
+
+    def _transcript(self, events: List[Event], start: int, end: int) -> str:
+        lines = []
+        for event in events[start:end]:
+            if event.partial:
+                continue
+            text = _text(event)
+            if not text or (event.author != "user" and not event.is_final_response()):
+                continue
+            speaker = "Trader" if event.author == "user" else "Assistant"
+            lines.append(f"{speaker}: {text[:MAX_MESSAGE_CHARS]}")
+        return "\n".join(lines)
+
+    async def _summarize(self, previous: Optional[str], transcript: str) -> str:
+        prompt = f"Previous summary:\n{previous or '(none)'}\n\nNew transcript:\n{transcript}"
+        async with llm_gate.slot(COMPACTOR_AUTHOR):
+            response = await self._get_client().aio.models.generate_content(
+                model=self.model,
+                contents=prompt,
+                config=types.GenerateContentConfig(
+                    system_instruction=SUMMARY_INSTRUCTION,
+                    temperature=0.2,
+                ),
+            )
+        return (response.text or "").strip()
+
+    async def _compact(
+        self,
+        session_service: BaseSessionService,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+    ) -> None:
+        started = time.perf_counter()
+        try:
+            session = await session_service.get_session(
+                app_name=app_name, user_id=user_id, session_id=session_id
+            )
+            if session is None or not self.needs_compaction(session):
+                return
+
+            turns = _user_turns(session.events)
+            summarized = session.state.get(SUMMARY_TURNS_STATE_KEY, 0)
+            fold_until = len(turns) - self.keep_turns
+
+            transcript = self._transcript(session.events, turns[summarized], turns[fold_until])
+            cut = _text_hash(_text(session.events[turns[fold_until]]))
+            summary = await self._summarize(session.state.get(SUMMARY_STATE_KEY), transcript)
+            if not summary:
+                return
+
+            # Written between turns so the session isn't modified mid-turn
+            async with session_turn_lock.hold(session_id):
+                session = await session_service.get_session(
+                    app_name=app_name, user_id=user_id, session_id=session_id
+                )
+                if session is None or session.state.get(SUMMARY_TURNS_STATE_KEY, 0) != summarized:
+                    return
+
+                await session_service.append_event(
+                    session,
+                    Event(
+                        author=COMPACTOR_AUTHOR,
+                        invocation_id=Event.new_id(),
+                        actions=EventActions(state_delta={
+                            SUMMARY_STATE_KEY: summary,
+                            SUMMARY_TURNS_STATE_KEY: fold_until,
+                            SUMMARY_CUT_STATE_KEY: cut,
+                        }),
+                    ),
+                )
+
+            self.compactions += 1
+            logger.info(
+                f"Compacted {fold_until - summarized} turn(s) of session {session_id} "
+                f"in {time.perf_counter() - started:.2f}s"
+            )
+        except APIError as e:
+            # Busy session or LLM queue; the next turn retries
+            self.skipped += 1
+            logger.info(f"History compaction of session {session_id} deferred: {e.message}")
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"History compaction of session {session_id} failed: {e}")
+
+    async def close(self) -> None:
+        """Cancel running compactions; they are retried after the next turn"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "running": len(self._tasks),
+            "compactions": self.compactions,
+            "skipped": self.skipped,
+            "failures": self.failures,
+        }
+
+
+history_compactor = HistoryCompactor(
+    keep_turns=settings.history_keep_turns,
+    min_turns=settings.history_compact_min_turns,
+    model=settings.history_summary_model,
+)
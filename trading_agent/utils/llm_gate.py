@@ -0,0 +1,152 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque
+
+from google.genai import errors as genai_errors
+
+from app.core.config import get_settings
+from app.core.exceptions import TooManyRequestsError
+from app.core.logging import setup_logging
+from app.core.metrics import QUEUE_REJECTIONS, QUEUE_WAIT
+
+logger = setup_logging()
+settings = get_settings()
+
+
+def is_quota_error(exc: BaseException) -> bool:
+    """Whether an agent run failed on an exhausted Gemini quota (HTTP 429)"""
+    return isinstance(exc, genai_errors.ClientError) and exc.code == 429
+
+
+class LLMGate:
+    """
+    Bounds the agent runs (and so the Gemini calls) in flight on this worker.
+
+    Runs beyond `max_concurrency` wait in per-user FIFO queues that are served
+    round-robin, so one user's burst can't starve everyone else. Once
+    `max_waiting` runs are queued, or a run waits longer than `wait_seconds`,
+    it's rejected with 429. After an upstream quota error, admissions pause
+    for the suggested cooldown instead of hammering the quota.
+    """
+
+    def __init__(self, max_concurrency: int, max_waiting: int, wait_seconds: float):
+        self.max_concurrency = max_concurrency
+        self.max_waiting = max_waiting
+        self.wait_seconds = wait_seconds
+
+        self._in_flight = 0
+        self._waiting = 0
+        self._queues: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self._cooldown_until = 0.0
+
+        self.admitted = 0
+        self.rejected = 0
+        self.quota_errors = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _reject(self, reason: str) -> TooManyRequestsError:
+        self.rejected += 1
+        QUEUE_REJECTIONS.labels("llm_gate", reason).inc()
+        return TooManyRequestsError(
+            "The assistant is handling too many requests, please retry shortly",
+            retry_after=max(1, int(self._cooldown_until - time.monotonic()) + 1),
+            details={"reason": reason},
+        )
+
+    def _wake_next(self) -> None:
+        """Hand free slots to waiters, one user at a time in turn"""
+        while self._in_flight < self.max_concurrency and self._queues:
+            user_id, queue = next(iter(self._queues.items()))
+            waiter = queue.popleft()
+            if queue:
+                self._queues.move_to_end(user_id)
+            else:
+                del self._queues[user_id]
+
+            if not waiter.done():
+                self._in_flight += 1
+                waiter.set_result(None)
+
+    def _forget(self, user_id: str, waiter: asyncio.Future) -> None:
+        queue = self._queues.get(user_id)
+        if queue is not None and waiter in queue:
+            queue.remove(waiter)
+            if not queue:
+                del self._queues[user_id]
+
+    async def _cooldown(self) -> None:
+        delay = self._cooldown_until - time.monotonic()
+        if delay > self.wait_seconds:
+            raise self._reject("upstream_quota")
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def penalize(self, retry_after: float) -> None:
+        """Pause admissions after the upstream reported its quota exhausted"""
+        self.quota_errors += 1
+        self._cooldown_until = max(self._cooldown_until, time.monotonic() + retry_after)
+
+    @asynccontextmanager
+    async def slot(self, user_id: str) -> AsyncIterator[None]:
+        """Hold one of the worker's agent run slots"""
+        started = time.perf_counter()
+        await self._cooldown()
+
+        if self._in_flight < self.max_concurrency and not self._queues:
+            self._in_flight += 1
+        else:
+            if self._waiting >= self.max_waiting:
+                raise self._reject("queue_full")
+
+            waiter = asyncio.get_running_loop().create_future()
+            self._queues.setdefault(user_id, deque()).append(waiter)
+            self._waiting += 1
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter), self.wait_seconds)
+            except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+                if waiter.done() and not waiter.cancelled():
+                    # Admitted just as the wait ended; give the slot back
+                    self._in_flight -= 1
+                    self._wake_next()
+                self._forget(user_id, waiter)
+                waiter.cancel()
+                if isinstance(e, asyncio.TimeoutError):
+                    raise self._reject("wait_timeout")
+                raise
+            finally:
+                self._waiting -= 1
+
+        waited = time.perf_counter() - started
+        QUEUE_WAIT.labels("llm_gate").observe(waited)
+        self.admitted += 1
+        self.total_wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+        try:
+            yield
+        finally:
+            self._in_flight -= 1
+            self._wake_next()
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "waiting_users": len(self._queues),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "quota_errors": self.quota_errors,
+            "avg_wait_seconds": self.total_wait_seconds / self.admitted if self.admitted else 0.0,
+            "max_wait_seconds": self.max_wait_seconds,
+        }
+
+
+llm_gate = LLMGate(
+    max_concurrency=settings.llm_max_concurrency,
+    max_waiting=settings.llm_max_waiting,
+    wait_seconds=settings.llm_queue_wait_seconds,
+)
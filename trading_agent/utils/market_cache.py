@@ -0,0 +1,261 @@
+import json
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, NamedTuple, Optional
+
+from redis import asyncio as aioredis
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.core.logging import setup_logging
+from app.core.singleflight import SingleFlight
+
+logger = setup_logging()
+settings = get_settings()
+
+REDIS_KEY_PREFIX = "market-intel:"
+
+CURRENCIES = {
+    "USD", "EUR", "GBP", "JPY", "CHF", "CAD", "AUD", "NZD",
+    "CNH", "HKD", "SGD", "SEK", "NOK", "MXN", "ZAR", "TRY",
+    "XAU", "XAG",
+}
+CRYPTO = {"BTC", "ETH", "SOL", "XRP", "LTC", "DOGE"}
+
+INSTRUMENT_ALIASES = {
+    "gold": "XAUUSD",
+    "silver": "XAGUSD",
+    "oil": "USOIL",
+    "crude": "USOIL",
+    "wti": "USOIL",
+    "brent": "UKOIL",
+    "nasdaq": "NAS100",
+    "nas100": "NAS100",
+    "us100": "NAS100",
+    "ndx": "NAS100",
+    "s&p": "SPX500",
+    "spx": "SPX500",
+    "sp500": "SPX500",
+    "spx500": "SPX500",
+    "us500": "SPX500",
+    "dow": "US30",
+    "us30": "US30",
+    "dax": "GER40",
+    "ger40": "GER40",
+    "de40": "GER40",
+    "ftse": "UK100",
+    "uk100": "UK100",
+    "nikkei": "JP225",
+    "jp225": "JP225",
+    "dxy": "DXY",
+    "cable": "GBPUSD",
+    "fiber": "EURUSD",
+    "loonie": "USDCAD",
+    "aussie": "AUDUSD",
+    "kiwi": "NZDUSD",
+    "bitcoin": "BTCUSD",
+    "btc": "BTCUSD",
+    "ethereum": "ETHUSD",
+    "eth": "ETHUSD",
+    "crypto": "CRYPTO",
+    "market": "MARKETS",
+    "markets": "MARKETS",
+}
+
+# Checked in order; the first intent with a matching keyword wins
+INTENT_KEYWORDS = (
+    ("calendar", {"calendar", "event", "events", "nfp", "cpi", "fomc", "ecb", "boe", "boj",
+                  "payrolls", "release", "releases", "schedule", "scheduled", "upcoming"}),
+    ("sentiment", {"sentiment", "risk-on", "risk-off", "mood", "positioning", "bias"}),
+    ("outlook", {"outlook", "forecast", "expect", "expected", "expectations", "prediction"}),
+    ("news", {"news", "headlines", "moving", "move", "moves", "happening", "why", "driving",
+              "drivers", "update", "latest", "today"}),
+)
+
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "what", "whats", "what's", "s", "how", "and", "or",
+    "of", "on", "in", "for", "to", "about", "with", "me", "give", "tell", "show", "current",
+    "currently", "right", "now", "any", "there", "this", "week", "weekly", "day", "daily",
+    "price", "prices", "pair", "pairs", "summary", "summarize", "recent", "key", "market",
+    "markets", "impact", "affecting", "affect", "please", "trading", "traders", "forex", "fx",
+}
+
+# Any unrecognised term ("hedge", "Powell", "not") can change what is being
+# asked, so only requests that normalise completely are shared
+MAX_RESIDUAL_TERMS = 0
+
+FX_PAIR = re.compile(r"\b([A-Z]{3})\s*/?\s*([A-Z]{3})T?\b")
+WORD = re.compile(r"[a-z0-9&'\-]+")
+
+
+class MarketQuery(NamedTuple):
+    """Normalized identity of a market intelligence request"""
+    instruments: tuple
+    intent: str
+    horizon: str
+
+    @property
+    def key(self) -> str:
+        return f"{','.join(self.instruments)}:{self.intent}:{self.horizon}"
+
+    @property
+    def crypto_only(self) -> bool:
+        return all(
+            instrument == "CRYPTO" or instrument[:3] in CRYPTO
+            for instrument in self.instruments
+        )
+
+
+def normalize_market_query(request: str) -> Optional[MarketQuery]:
+    """
+    Reduce a request to its instruments, intent and horizon.
+    Returns None when the request can't be safely shared between users.
+    """
+    instruments = set()
+    for base, quote in FX_PAIR.findall(request.upper()):
+        if (base in CURRENCIES or base in CRYPTO) and quote in CURRENCIES | {"USD"}:
+            instruments.add(base + quote)
+
+    words = WORD.findall(request.lower())
+    residual = []
+    for word in words:
+        if word in INSTRUMENT_ALIASES:
+            instruments.add(INSTRUMENT_ALIASES[word])
+        elif (
+            word not in STOPWORDS
+            and not any(word in keywords for _, keywords in INTENT_KEYWORDS)
+            and word.upper().rstrip("T") not in instruments
+            and word.upper() not in CURRENCIES | CRYPTO
+            and not word.isdigit()
+        ):
+            residual.append(word)
+
+    # Specific instruments make a generic "markets" mention redundant
+    if len(instruments) > 1:
+        instruments.discard("MARKETS")
+
+    if not instruments or len(residual) > MAX_RESIDUAL_TERMS:
+        return None
+
+    intent = next(
+        (name for name, keywords in INTENT_KEYWORDS if keywords.intersection(words)),
+        "news",
+    )
+    horizon = "week" if {"week", "weekly"}.intersection(words) else "day"
+
+    return MarketQuery(tuple(sorted(instruments)), intent, horizon)
+
+
+def market_ttl(query: MarketQuery, now: Optional[datetime] = None) -> int:
+    """
+    Seconds a response may be reused. Short while markets trade, never past
+    the weekly close; over the weekend, until the reopen (capped).
+    Crypto trades around the clock and always gets the short TTL.
+    """
+    now = now or datetime.now(timezone.utc)
+    open_ttl = settings.market_intel_cache_ttl_seconds
+
+    if query.crypto_only:
+        return open_ttl
+
+    # FX week: Sunday 22:00 UTC to Friday 22:00 UTC
+    week_start = (now - timedelta(days=(now.weekday() + 1) % 7)).replace(
+        hour=22, minute=0, second=0, microsecond=0
+    )
+    if week_start > now:
+        week_start -= timedelta(days=7)
+    close = week_start + timedelta(days=5)
+
+    if now < close:
+        return max(1, min(open_ttl, int((close - now).total_seconds())))
+
+    reopen = week_start + timedelta(days=7)
+    return max(
+        open_ttl,
+        min(settings.market_intel_cache_closed_ttl_seconds, int((reopen - now).total_seconds())),
+    )
+
+
+class MarketIntelCache:
+    """
+    Cache of market intelligence responses keyed by normalized query.
+    In-process LRU with an optional Redis tier shared by workers;
+    concurrent identical misses make a single upstream call.
+    """
+
+    def __init__(self, max_entries: int, redis_url: Optional[str] = None):
+        self._local = TTLCache(max_entries=max_entries)
+        self._redis = aioredis.from_url(redis_url, decode_responses=True) if redis_url else None
+        self._flights = SingleFlight()
+
+        self.redis_hits = 0
+
+    async def _get(self, key: str) -> Optional[Any]:
+        value = self._local.get(key)
+        if value is not None or self._redis is None:
+            return value
+
+        try:
+            pipe = self._redis.pipeline(transaction=False)
+            pipe.get(REDIS_KEY_PREFIX + key)
+            pipe.ttl(REDIS_KEY_PREFIX + key)
+            payload, ttl = await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Market intel cache redis read failed: {e}")
+            return None
+        if payload is None:
+            return None
+
+        value = json.loads(payload)
+        if ttl > 0:
+            self._local.set(key, value, ttl_seconds=ttl)
+        self.redis_hits += 1
+        return value
+
+    async def _set(self, key: str, value: Any, ttl: int) -> None:
+        self._local.set(key, value, ttl_seconds=ttl)
+        if self._redis is None:
+            return
+
+        try:
+            await self._redis.set(REDIS_KEY_PREFIX + key, json.dumps(value), ex=ttl)
+        except Exception as e:
+            logger.warning(f"Market intel cache redis write failed: {e}")
+
+    async def get_or_fetch(
+        self,
+        query: MarketQuery,
+        fetch: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """Cached response of a query, fetching it once on a miss"""
+        value = await self._get(query.key)
+        if value is not None:
+            return value
+
+        async def fetch_and_store():
+            # A concurrent leader may have filled the cache in the meantime
+            value = await self._get(query.key)
+            if value is None:
+                value = await fetch()
+                if value:
+                    await self._set(query.key, value, market_ttl(query))
+            return value
+
+        return await self._flights.do(query.key, fetch_and_store)
+
+    def stats(self) -> dict:
+        return {
+            **self._local.stats(),
+            "redis_hits": self.redis_hits,
+            **{f"upstream_{name}": value for name, value in self._flights.stats().items()},
+        }
+
+    async def close(self) -> None:
+        if self._redis is not None:
+            await self._redis.aclose()
+
+
+market_intel_cache = MarketIntelCache(
+    max_entries=settings.market_intel_cache_max_entries,
+    redis_url=settings.redis_url if settings.market_intel_cache_redis_enabled else None,
+)
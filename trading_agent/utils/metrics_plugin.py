@@ -0,0 +1,77 @@
+import time
+from typing import Any, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.tools import BaseTool, ToolContext
+
+from app.core.cache import TTLCache
+from app.core.metrics import AGENT_DURATION, LLM_DURATION, TOOL_DURATION
+
+
+class MetricsPlugin(BasePlugin):
+    """
+    Times every agent, model call and tool call inside `runner.run_async`,
+    including the runs nested in agent tools (they inherit the plugins).
+    """
+
+    def __init__(self):
+        super().__init__(name="metrics")
+        # Start times of runs in progress; entries of aborted runs expire
+        self._started = TTLCache(max_entries=10_000, ttl_seconds=3600)
+
+    def _start(self, key: tuple) -> None:
+        self._started.set(key, time.perf_counter())
+
+    def _elapsed(self, key: tuple) -> Optional[float]:
+        started = self._started.get(key)
+        if started is None:
+            return None
+        self._started.delete(key)
+        return time.perf_counter() - started
+
+    async def before_agent_callback(
+        self, *, agent: BaseAgent, callback_context: CallbackContext
+    ) -> None:
+        self._start(("agent", callback_context.invocation_id, agent.name))
+
+    async def after_agent_callback(
+        self, *, agent: BaseAgent, callback_context: CallbackContext
+    ) -> None:
+        elapsed = self._elapsed(("agent", callback_context.invocation_id, agent.name))
+        if elapsed is not None:
+            AGENT_DURATION.labels(agent.name).observe(elapsed)
+
+    async def before_model_callback(
+        self, *, callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> None:
+        self._start(("model", callback_context.invocation_id, callback_context.agent_name))
+
+    async def after_model_callback(
+        self, *, callback_context: CallbackContext, llm_response: LlmResponse
+    ) -> None:
+        # Streamed responses call back per chunk; only the first one is timed
+        elapsed = self._elapsed(("model", callback_context.invocation_id, callback_context.agent_name))
+        if elapsed is not None:
+            LLM_DURATION.labels(callback_context.agent_name).observe(elapsed)
+
+    async def before_tool_callback(
+        self, *, tool: BaseTool, tool_args: dict[str, Any], tool_context: ToolContext
+    ) -> None:
+        self._start(("tool", tool_context.function_call_id))
+
+    async def after_tool_callback(
+        self, *, tool: BaseTool, tool_args: dict[str, Any], tool_context: ToolContext, result: dict
+    ) -> None:
+        elapsed = self._elapsed(("tool", tool_context.function_call_id))
+        if elapsed is not None:
+            TOOL_DURATION.labels(tool.name, "success").observe(elapsed)
+
+    async def on_tool_error_callback(
+        self, *, tool: BaseTool, tool_args: dict[str, Any], tool_context: ToolContext, error: Exception
+    ) -> None:
+        elapsed = self._elapsed(("tool", tool_context.function_call_id))
+        if elapsed is not None:
+            TOOL_DURATION.labels(tool.name, "error").observe(elapsed)
@@ -0,0 +1,135 @@
+import asyncio
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from fastapi import UploadFile
+
+from app.core.config import get_settings
+from app.core.exceptions import PayloadTooLargeError, ValidationError
+from app.core.logging import setup_logging
+from trading_agent.analytics import TradeAnalytics
+from trading_agent.utils.file_parser import parse_upload
+from trading_agent.utils.upload_cache import from_arrow_ipc, to_arrow_ipc
+
+logger = setup_logging()
+settings = get_settings()
+
+
+def parse_file_to_ipc(path: str, filename: str) -> bytes:
+    """
+    Parse a spooled upload and return its analytics as Arrow IPC.
+    Runs in a parser process or a Celery worker.
+    """
+    with open(path, "rb") as fileobj:
+        return to_arrow_ipc(parse_upload(fileobj, filename))
+
+
+class UploadParser:
+    """
+    Keeps CPU-bound upload parsing off the event loop.
+    Small uploads are parsed on a thread, larger ones in a process pool,
+    and optionally the largest ones on the Celery app.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        concurrency: int,
+        inline_max_bytes: int,
+        celery_min_bytes: Optional[int] = None,
+        spool_dir: Optional[str] = None,
+    ):
+        self.workers = workers
+        self.inline_max_bytes = inline_max_bytes
+        self.celery_min_bytes = celery_min_bytes
+        self.spool_dir = spool_dir
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def _spool(self, file: UploadFile) -> str:
+        """Copy an upload to a named file the parser process can open"""
+        _, extension = os.path.splitext(file.filename or "")
+        file.file.seek(0)
+        with tempfile.NamedTemporaryFile(
+            dir=self.spool_dir,
+            suffix=extension,
+            delete=False,
+        ) as spooled:
+            shutil.copyfileobj(file.file, spooled)
+            return spooled.name
+
+    async def _parse_with_celery(self, path: str, filename: str) -> bytes:
+        from trading_agent.tasks import parse_trade_upload
+
+        result = parse_trade_upload.delay(path, filename)
+        outcome = await asyncio.to_thread(
+            result.get,
+            timeout=settings.celery_task_time_limit,
+        )
+
+        error = outcome.get("error")
+        if error:
+            # Same client errors as parsing in this process
+            if error["status_code"] == 413:
+                raise PayloadTooLargeError(error["message"], details=error["details"])
+            raise ValidationError(error["message"], details=error["details"])
+
+        result_path = outcome["path"]
+        try:
+            with open(result_path, "rb") as payload:
+                return payload.read()
+        finally:
+            os.unlink(result_path)
+
+    async def parse(self, file: UploadFile, size: int) -> TradeAnalytics:
+        """Parse an upload of `size` bytes without blocking the event loop"""
+        async with self._semaphore:
+            if size <= self.inline_max_bytes:
+                return await asyncio.to_thread(parse_upload, file.file, file.filename)
+
+            path = await asyncio.to_thread(self._spool, file)
+            try:
+                if self.celery_min_bytes is not None and size >= self.celery_min_bytes:
+                    payload = await self._parse_with_celery(path, file.filename)
+                else:
+                    loop = asyncio.get_running_loop()
+                    payload = await loop.run_in_executor(
+                        self._get_executor(),
+                        parse_file_to_ipc,
+                        path,
+                        file.filename,
+                    )
+            finally:
+                os.unlink(path)
+
+            return await asyncio.to_thread(from_arrow_ipc, payload)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            logger.info("Upload parser pool closed")
+
+
+upload_parser = UploadParser(
+    workers=settings.upload_parse_workers,
+    concurrency=settings.upload_parse_concurrency,
+    inline_max_bytes=settings.upload_parse_inline_max_kb * 1024,
+    celery_min_bytes=(
+        settings.upload_parse_celery_min_mb * 1024 * 1024
+        if settings.upload_parse_celery_min_mb else None
+    ),
+    spool_dir=settings.upload_spool_dir,
+)
@@ -0,0 +1,191 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+from redis import asyncio as aioredis
+from redis.exceptions import LockError, RedisError
+
+from app.core.config import get_settings
+from app.core.exceptions import TooManyRequestsError
+from app.core.logging import setup_logging
+from app.core.metrics import QUEUE_REJECTIONS, QUEUE_WAIT
+
+logger = setup_logging()
+settings = get_settings()
+
+LOCK_KEY_PREFIX = "session-lock:"
+QUEUE_KEY_PREFIX = "session-lock:queue:"
+
+
+class _SessionEntry:
+    __slots__ = ("lock", "turns")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        # Running turn plus the ones waiting for it
+        self.turns = 0
+
+
+class SessionTurnLock:
+    """
+    Serializes the turns of a conversation so concurrent requests on one
+    session don't interleave events in the ADK session store.
+
+    At most `max_queue` turns wait behind the running one; further turns, and
+    turns waiting longer than `wait_seconds`, are rejected with 429. With a
+    Redis URL the queue depth and the lock are shared by every worker.
+    """
+
+    def __init__(
+        self,
+        max_queue: int,
+        wait_seconds: float,
+        retry_after: int,
+        redis_url: Optional[str] = None,
+        lock_seconds: int = 300,
+    ):
+        self.max_queue = max_queue
+        self.wait_seconds = wait_seconds
+        self.retry_after = retry_after
+        self.lock_seconds = lock_seconds
+        self._redis = aioredis.from_url(redis_url, decode_responses=True) if redis_url else None
+        self._sessions: Dict[str, _SessionEntry] = {}
+
+        self.acquired = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _reject(self, session_id: str, reason: str) -> TooManyRequestsError:
+        QUEUE_REJECTIONS.labels("session_lock", reason).inc()
+        logger.warning(f"Rejected turn on session {session_id}: {reason}")
+        return TooManyRequestsError(
+            "Another message on this conversation is still being processed",
+            retry_after=self.retry_after,
+            details={"session_id": session_id, "reason": reason},
+        )
+
+    def _record_wait(self, started: float) -> None:
+        waited = time.perf_counter() - started
+        QUEUE_WAIT.labels("session_lock").observe(waited)
+        self.acquired += 1
+        self.total_wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    @asynccontextmanager
+    async def hold(self, session_id: Optional[str]) -> AsyncIterator[None]:
+        """Run the enclosed turn exclusively for its session"""
+        if not session_id:
+            # New conversation; nothing to race with yet
+            yield
+            return
+
+        session_id = str(session_id)
+        if self._redis is not None:
+            async with self._hold_across_workers(session_id):
+                yield
+        else:
+            async with self._hold_locally(session_id):
+                yield
+
+    @asynccontextmanager
+    async def _hold_locally(self, session_id: str) -> AsyncIterator[None]:
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            entry = self._sessions[session_id] = _SessionEntry()
+
+        if entry.turns > self.max_queue:
+            self.rejected += 1
+            raise self._reject(session_id, "queue_full")
+
+        entry.turns += 1
+        started = time.perf_counter()
+        try:
+            try:
+                await asyncio.wait_for(entry.lock.acquire(), self.wait_seconds)
+            except asyncio.TimeoutError:
+                self.timed_out += 1
+                raise self._reject(session_id, "wait_timeout")
+
+            self._record_wait(started)
+            try:
+                yield
+            finally:
+                entry.lock.release()
+        finally:
+            entry.turns -= 1
+            if entry.turns == 0:
+                self._sessions.pop(session_id, None)
+
+    @asynccontextmanager
+    async def _hold_across_workers(self, session_id: str) -> AsyncIterator[None]:
+        queue_key = QUEUE_KEY_PREFIX + session_id
+        try:
+            pipe = self._redis.pipeline(transaction=True)
+            pipe.incr(queue_key)
+            pipe.expire(queue_key, self.lock_seconds)
+            turns, _ = await pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Session lock redis unavailable, serializing in-process only: {e}")
+            turns = None
+
+        if turns is None:
+            async with self._hold_locally(session_id):
+                yield
+            return
+
+        try:
+            if turns > self.max_queue + 1:
+                self.rejected += 1
+                raise self._reject(session_id, "queue_full")
+
+            lock = self._redis.lock(
+                LOCK_KEY_PREFIX + session_id,
+                timeout=self.lock_seconds,
+                blocking_timeout=self.wait_seconds,
+            )
+            started = time.perf_counter()
+            if not await lock.acquire():
+                self.timed_out += 1
+                raise self._reject(session_id, "wait_timeout")
+
+            self._record_wait(started)
+            try:
+                yield
+            finally:
+                try:
+                    await lock.release()
+                except LockError:
+                    logger.warning(f"Session lock of {session_id} expired before its turn finished")
+        finally:
+            try:
+                await self._redis.decr(queue_key)
+            except RedisError as e:
+                logger.warning(f"Session lock queue of {session_id} not released: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "backend": "redis" if self._redis is not None else "in-process",
+            "active_sessions": len(self._sessions),
+            "queued_turns": sum(max(entry.turns - 1, 0) for entry in self._sessions.values()),
+            "acquired": self.acquired,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "avg_wait_seconds": self.total_wait_seconds / self.acquired if self.acquired else 0.0,
+            "max_wait_seconds": self.max_wait_seconds,
+        }
+
+    async def close(self) -> None:
+        if self._redis is not None:
+            await self._redis.aclose()
+
+
+session_turn_lock = SessionTurnLock(
+    max_queue=settings.session_lock_max_queue,
+    wait_seconds=settings.session_lock_wait_seconds,
+    retry_after=settings.session_lock_retry_after_seconds,
+    redis_url=settings.redis_url if settings.session_lock_redis_enabled else None,
+    lock_seconds=settings.session_lock_ttl_seconds,
+)
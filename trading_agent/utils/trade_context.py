@@ -0,0 +1,22 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator
+
+# Trade history data of the current agent invocation.
+# Set per request so the shared agent tree never captures user data.
+current_trade_data: ContextVar[Any] = ContextVar("current_trade_data", default=None)
+
+
+def get_trade_data() -> Any:
+    """Trade history data supplied to the current invocation"""
+    return current_trade_data.get()
+
+
+@contextmanager
+def use_trade_data(parsed_data: Any) -> Iterator[None]:
+    """Expose the parsed trade data to agent tools for the duration of a run"""
+    token = current_trade_data.set(parsed_data)
+    try:
+        yield
+    finally:
+        current_trade_data.reset(token)
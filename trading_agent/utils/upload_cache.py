@@ -0,0 +1,160 @@
+import asyncio
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Optional
+
+import pyarrow as pa
+from redis import asyncio as aioredis
+
+from app.core.config import get_settings
+from app.core.logging import setup_logging
+from trading_agent.analytics import TradeAnalytics
+
+logger = setup_logging()
+settings = get_settings()
+
+REDIS_KEY_PREFIX = "upload-cache:"
+
+
+def content_hash(data: bytes) -> str:
+    """SHA-256 hex digest used as the cache key of an upload"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def to_arrow_ipc(analytics: TradeAnalytics) -> bytes:
+    """Serialize the normalized trade frame and its metrics to an Arrow IPC stream"""
+    table = pa.Table.from_pandas(analytics.frame, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[b"source"] = (analytics.source or "").encode()
+    metadata[b"metrics"] = json.dumps(analytics.metrics).encode()
+    table = table.replace_schema_metadata(metadata)
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def from_arrow_ipc(payload: bytes) -> TradeAnalytics:
+    """Rebuild trade analytics from an Arrow IPC stream"""
+    table = pa.ipc.open_stream(payload).read_all()
+    metadata = table.schema.metadata or {}
+    source = metadata.get(b"source", b"").decode() or None
+
+    if b"metrics" in metadata:
+        return TradeAnalytics.restore(
+            table.to_pandas(),
+            json.loads(metadata[b"metrics"]),
+            source=source,
+        )
+    return TradeAnalytics(table.to_pandas(), source=source)
+
+
+class UploadCache:
+    """
+    Content-addressed cache of parsed trade uploads.
+    In-process LRU bounded by memory size, with an optional Redis tier
+    holding the columnar (Arrow IPC) representation.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        redis_url: Optional[str] = None,
+        ttl_seconds: int = 3600,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple[TradeAnalytics, int]]" = OrderedDict()
+        self._size = 0
+        self._redis = aioredis.from_url(redis_url) if redis_url else None
+
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _entry_size(analytics: TradeAnalytics) -> int:
+        return int(
+            analytics.frame.memory_usage(deep=True).sum()
+            + analytics.equity.nbytes
+            + analytics.drawdown.nbytes
+        )
+
+    def _remember(self, digest: str, analytics: TradeAnalytics) -> None:
+        size = self._entry_size(analytics)
+        if size > self.max_bytes:
+            return
+
+        if digest in self._entries:
+            self._size -= self._entries.pop(digest)[1]
+
+        self._entries[digest] = (analytics, size)
+        self._size += size
+
+        while self._size > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._size -= evicted_size
+            self.evictions += 1
+
+    async def get(self, digest: str) -> Optional[TradeAnalytics]:
+        """Get cached analytics of an upload, or None on a miss"""
+        entry = self._entries.get(digest)
+        if entry is not None:
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return entry[0]
+
+        if self._redis is not None:
+            try:
+                payload = await self._redis.get(REDIS_KEY_PREFIX + digest)
+            except Exception as e:
+                logger.warning(f"Upload cache redis read failed: {e}")
+                payload = None
+
+            if payload is not None:
+                # Decoding rebuilds the frame and its metrics; keep it off the loop
+                analytics = await asyncio.to_thread(from_arrow_ipc, payload)
+                self._remember(digest, analytics)
+                self.redis_hits += 1
+                return analytics
+
+        self.misses += 1
+        return None
+
+    async def set(self, digest: str, analytics: TradeAnalytics) -> None:
+        """Cache analytics of an upload in every tier"""
+        self._remember(digest, analytics)
+
+        if self._redis is not None:
+            try:
+                payload = await asyncio.to_thread(to_arrow_ipc, analytics)
+                await self._redis.set(REDIS_KEY_PREFIX + digest, payload, ex=self.ttl_seconds)
+            except Exception as e:
+                logger.warning(f"Upload cache redis write failed: {e}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.redis_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "size_bytes": self._size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.redis_hits) / lookups if lookups else 0.0,
+        }
+
+    async def close(self) -> None:
+        if self._redis is not None:
+            await self._redis.aclose()
+
+
+upload_cache = UploadCache(
+    max_bytes=settings.upload_cache_max_mb * 1024 * 1024,
+    redis_url=settings.redis_url if settings.upload_cache_redis_enabled else None,
+    ttl_seconds=settings.upload_cache_ttl_seconds,
+)